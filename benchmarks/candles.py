@@ -0,0 +1,82 @@
+"""Benchmark of OHLCV resampling: CandleBuilder vs a per-sample Python loop
+
+    python -m benchmarks.candles [-n POINTS] [--step SECONDS]
+
+Resamples a synthetic market chart (by default a year of 5-minute prices and
+volumes) into 1h, 4h, 1d and 1w candles and reports the best time of a few
+resamplings. The loop baseline is the usual hand-written resampler: a dict of
+buckets updated sample by sample. The builder's gain grows with the number of
+samples per candle; with one sample per candle (e.g. --step 3600 into 1h) the
+per-candle work dominates and the loop is faster.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.payloads import market_chart  # noqa: E402
+from pycoingecko.candles import build_candles, parse_interval  # noqa: E402
+
+INTERVALS = ('1h', '4h', '1d', '1w')
+
+
+def loop_candles(prices, volumes, interval):
+    """Per-sample reference implementation"""
+
+    step = parse_interval(interval) * 1000
+    buckets = {}
+    for t, price in prices:
+        start = t - t % step
+        candle = buckets.get(start)
+        if candle is None:
+            buckets[start] = [start, price, price, price, price, 0.0, 0]
+        else:
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[4] = price
+    for t, volume in volumes:
+        candle = buckets.get(t - t % step)
+        if candle is not None:
+            candle[5] += volume
+            candle[6] += 1
+    scale = step / 86400000
+    return [candle[:5] + [candle[5] / candle[6] * scale if candle[6] else None] for candle in buckets.values()]
+
+
+def best_of(func, repeat=7):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--points', type=int, default=105120)
+    parser.add_argument('--step', type=int, default=300, help='seconds between samples')
+    args = parser.parse_args(argv)
+
+    chart = market_chart(points=args.points, step=args.step * 1000)
+    prices, volumes = chart['prices'], chart['total_volumes']
+
+    print('{0:<10}{1:>10}{2:>14}{3:>14}{4:>10}'.format('interval', 'candles', 'loop ms', 'builder ms', 'speedup'))
+    for interval in INTERVALS:
+        loop_time, expected = best_of(lambda: loop_candles(prices, volumes, interval))
+        builder_time, table = best_of(lambda: build_candles(prices, interval, volumes))
+        rows = table.rows()
+        assert [row[:5] for row in rows] == [row[:5] for row in expected], interval
+        print('{0:<10}{1:>10}{2:>14.2f}{3:>14.2f}{4:>9.1f}x'.format(
+            interval, len(rows), loop_time * 1000, builder_time * 1000, loop_time / builder_time))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Micro-benchmark of per-call client overhead on the cache-hit path
+
+    python -m benchmarks.overhead [-n CALLS]
+
+Responses from the local stub carry Cache-Control max-age, so after the first
+call every CoinGeckoAPI call is served from the response cache and the time
+measured is the client's own work: argument preprocessing, url and params
+building, cache lookup and statistics.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import make_client  # noqa: E402
+from benchmarks.stub_server import StubConfig, StubServer  # noqa: E402
+
+CALLS = (
+    ('ping', (), {}),
+    ('get_price', ('bitcoin,ethereum', 'usd,eur'), {'include_market_cap': True}),
+    ('get_price', (['bitcoin', 'ethereum'], ['usd', 'eur']), {}),
+    ('get_coin_by_id', ('bitcoin',), {'localization': False, 'tickers': False}),
+    ('get_coin_market_chart_range_by_id', ('bitcoin', 'usd', 1699862400, 1731484800), {}),
+)
+
+
+def measure(cg, method, args, kwargs, calls):
+    func = getattr(cg, method)
+    func(*args, **kwargs)
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--calls', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    with StubServer(StubConfig(cache_max_age=3600)) as stub:
+        cg = make_client(stub.base_url, cache=True)
+        for method, call_args, kwargs in CALLS:
+            per_call = measure(cg, method, call_args, kwargs, args.calls)
+            print('{0:<36}{1:>8.2f} us/call'.format(method, per_call * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark of passthrough tools: upstream JSON bodies returned as is vs decoded and re-encoded
+
+    python -m benchmarks.passthrough [-n CALLS] [--cache]
+
+get_exchange_by_id and get_coin_by_id are called through server.py with
+their passthrough flag on and off, each in its own subprocess, one call at a
+time. Reported per call: p50 / p99 latency and the CPU time of the server
+process (the stub runs in the parent process and is not counted). With
+--cache the stub sends Cache-Control max-age and calls are answered from the
+response cache, leaving only the encode (or passthrough) work.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import make_client  # noqa: E402
+from benchmarks.stub_server import StubConfig, StubServer  # noqa: E402
+from pycoingecko.stats import percentile  # noqa: E402
+
+TOOLS = (
+    ('get_exchange_by_id', {'id': 'binance'}),
+    ('get_coin_by_id', {'id': 'bitcoin'}),
+)
+
+
+def run_worker(args):
+    """Call one tool args.calls times in this process and print the result as JSON"""
+
+    import server
+    from pycoingecko.tools import TOOLS_BY_NAME
+
+    server.cg = make_client(args.base_url, args.cache)
+    tool = TOOLS_BY_NAME[args.worker]
+    tool.passthrough = args.passthrough
+    arguments = dict(TOOLS)[args.worker]
+
+    async def main():
+        # warm up connections and the stub's lazily built bodies
+        await server.app.call_tool(tool.name, dict(arguments))
+        latencies = []
+        cpu = time.process_time()
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            content = await server.app.call_tool(tool.name, dict(arguments))
+            latencies.append(time.perf_counter() - start)
+        cpu = time.process_time() - cpu
+        return latencies, cpu, len(content[0].text)
+
+    latencies, cpu, size = asyncio.run(main())
+    print(json.dumps({'tool': tool.name, 'passthrough': args.passthrough, 'p50': percentile(latencies, 50),
+                      'p99': percentile(latencies, 99), 'cpu_per_call': cpu / args.calls, 'text_bytes': size}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--calls', type=int, default=200)
+    parser.add_argument('--cache', action='store_true', help='answer from the response cache after the first call')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--passthrough', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    print('{0:<22}{1:>13}{2:>12}{3:>12}{4:>14}{5:>12}'.format('tool', 'mode', 'p50 ms', 'p99 ms', 'cpu ms/call',
+                                                              'text KiB'))
+    with StubServer(StubConfig(cache_max_age=3600 if args.cache else None)) as stub:
+        for name, _ in TOOLS:
+            for passthrough in (False, True):
+                command = [sys.executable, '-m', 'benchmarks.passthrough', '--worker', name, '--base-url',
+                           stub.base_url, '--calls', str(args.calls)]
+                if args.cache:
+                    command.append('--cache')
+                if passthrough:
+                    command.append('--passthrough')
+                output = subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.PIPE,
+                                        universal_newlines=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print('{0:<22}{1:>13}{2:>12.2f}{3:>12.2f}{4:>14.2f}{5:>12.1f}'.format(
+                    name, 'passthrough' if passthrough else 'decoded', result['p50'] * 1000, result['p99'] * 1000,
+                    result['cpu_per_call'] * 1000, result['text_bytes'] / 1024))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Realistic CoinGecko payloads for the benchmark stub server
+
+Each builder starts from a record captured from the public API and scales it
+to the size of the real response (e.g. ~15k entries for /coins/list), so the
+stub serves bodies with realistic shape and weight without shipping
+megabytes of fixtures. Builders are deterministic for a given size.
+"""
+import json
+import random
+
+SIMPLE_PRICE = {"bitcoin": {"usd": 67187.34, "usd_market_cap": 1327528367286.23, "usd_24h_vol": 23843029120.4,
+                            "usd_24h_change": 1.2295378479069035, "last_updated_at": 1731484800}}
+
+COIN_LIST_ENTRY = {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin",
+                   "platforms": {"ethereum": "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599"}}
+
+TOKEN_LIST_ENTRY = {"chainId": 1, "address": "0xdac17f958d2ee523a2206206994597c13d831ec7", "name": "Tether",
+                    "symbol": "USDT", "decimals": 6,
+                    "logoURI": "https://assets.coingecko.com/coins/images/325/thumb/Tether.png?1696501661"}
+
+MARKETS_ROW = {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin",
+               "image": "https://coin-images.coingecko.com/coins/images/1/large/bitcoin.png?1696501400",
+               "current_price": 67187.34, "market_cap": 1327528367286, "market_cap_rank": 1,
+               "fully_diluted_valuation": 1410698426358, "total_volume": 23843029120, "high_24h": 67952.0,
+               "low_24h": 66010.0, "price_change_24h": 813.54, "price_change_percentage_24h": 1.22564,
+               "market_cap_change_24h": 16213617290, "market_cap_change_percentage_24h": 1.23643,
+               "circulating_supply": 19767262.0, "total_supply": 21000000.0, "max_supply": 21000000.0,
+               "ath": 73738.0, "ath_change_percentage": -8.88354, "ath_date": "2024-03-14T07:10:36.635Z",
+               "atl": 67.81, "atl_change_percentage": 98985.52, "atl_date": "2013-07-06T00:00:00.000Z",
+               "roi": None, "last_updated": "2024-11-13T08:00:00.000Z"}
+
+TICKER = {"base": "BTC", "target": "USDT",
+          "market": {"name": "Binance", "identifier": "binance", "has_trading_incentive": False},
+          "last": 67180.0, "volume": 21000.5, "converted_last": {"btc": 1.0, "eth": 22.4, "usd": 67190.0},
+          "converted_volume": {"btc": 21000.5, "eth": 470400.0, "usd": 1411000000.0}, "trust_score": "green",
+          "bid_ask_spread_percentage": 0.010001, "timestamp": "2024-11-13T08:00:00+00:00",
+          "last_traded_at": "2024-11-13T08:00:00+00:00", "last_fetch_at": "2024-11-13T08:01:00+00:00",
+          "is_anomaly": False, "is_stale": False, "trade_url": "https://www.binance.com/en/trade/BTC_USDT",
+          "token_info_url": None, "coin_id": "bitcoin", "target_coin_id": "tether"}
+
+
+def simple_price():
+    return SIMPLE_PRICE
+
+
+def coins_list(size=15000, platforms=True):
+    rng = random.Random(1)
+    entries = []
+    for i in range(size):
+        entry = dict(COIN_LIST_ENTRY, id='coin-{0}'.format(i), symbol='c{0}'.format(i), name='Coin {0}'.format(i))
+        entry['platforms'] = {'ethereum': '0x{0:040x}'.format(rng.getrandbits(160))} if platforms else {}
+        entries.append(entry)
+    return entries
+
+
+def token_list(size=8000):
+    rng = random.Random(2)
+    tokens = [dict(TOKEN_LIST_ENTRY, address='0x{0:040x}'.format(rng.getrandbits(160)),
+                   name='Token {0}'.format(i), symbol='TK{0}'.format(i)) for i in range(size)]
+    return {"name": "CoinGecko", "logoURI": "https://static.coingecko.com/s/thumbnail.png",
+            "keywords": ["defi"], "timestamp": "2024-11-13T08:00:00.000+00:00", "tokens": tokens}
+
+
+def coins_markets(size=250):
+    rng = random.Random(3)
+    rows = []
+    for i in range(size):
+        price = MARKETS_ROW['current_price'] * rng.uniform(0.0001, 1.0)
+        rows.append(dict(MARKETS_ROW, id='coin-{0}'.format(i), symbol='c{0}'.format(i), name='Coin {0}'.format(i),
+                         current_price=price, market_cap=price * MARKETS_ROW['circulating_supply'],
+                         market_cap_rank=i + 1, price_change_percentage_24h=rng.uniform(-20, 20)))
+    return rows
+
+
+def coin_by_id(tickers=100):
+    """Full /coins/{id} response with localization, description and tickers"""
+
+    localization = {lang: "Bitcoin" for lang in ("en", "de", "es", "fr", "it", "pl", "ro", "hu", "nl", "pt", "sv",
+                                                 "vi", "tr", "ru", "ja", "zh", "zh-tw", "ko", "ar", "th", "id")}
+    description = {lang: "Bitcoin is the first successful internet money based on peer-to-peer technology. " * 40
+                   for lang in localization}
+    currencies = ("usd", "eur", "jpy", "gbp", "btc", "eth", "aud", "cad", "chf", "cny", "inr", "krw", "rub")
+    market_data = {field: {c: 67187.34 for c in currencies}
+                   for field in ("current_price", "ath", "atl", "market_cap", "total_volume", "high_24h", "low_24h",
+                                 "price_change_24h_in_currency", "price_change_percentage_1h_in_currency",
+                                 "price_change_percentage_24h_in_currency", "price_change_percentage_7d_in_currency")}
+    return {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "localization": localization,
+            "description": description, "market_data": market_data,
+            "tickers": [dict(TICKER, last=TICKER['last'] + i) for i in range(tickers)]}
+
+
+def exchange_by_id(tickers=100):
+    return {"name": "Binance", "year_established": 2017, "country": "Cayman Islands",
+            "description": "", "url": "https://www.binance.com/", "trust_score": 10, "trust_score_rank": 1,
+            "trade_volume_24h_btc": 331124.5, "tickers": [dict(TICKER, last=TICKER['last'] + i) for i in range(tickers)]}
+
+
+def market_chart(points=8760, start=1699862400000, step=3600000):
+    """Hourly /coins/{id}/market_chart for a year (prices, market caps, volumes)"""
+
+    rng = random.Random(4)
+    price = 35000.0
+    prices, caps, volumes = [], [], []
+    for i in range(points):
+        price *= 1 + rng.gauss(0, 0.004)
+        t = start + i * step
+        prices.append([t, price])
+        caps.append([t, price * 19.5e6])
+        volumes.append([t, rng.uniform(1e10, 4e10)])
+    return {"prices": prices, "market_caps": caps, "total_volumes": volumes}
+
+
+# path template -> builder; the stub server resolves request paths against these
+PAYLOADS = {
+    'ping': lambda: {"gecko_says": "(V3) To the Moon!"},
+    'simple/price': simple_price,
+    'coins/list': coins_list,
+    'coins/markets': coins_markets,
+    'coins/{id}': coin_by_id,
+    'coins/{id}/market_chart': market_chart,
+    'coins/{id}/market_chart/range': market_chart,
+    'exchanges/{id}': exchange_by_id,
+    'token_lists/{asset_platform_id}/all.json': token_list,
+}
+
+
+def encode(payload):
+    """Serialize a payload the way the API does (compact JSON, utf-8)"""
+
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
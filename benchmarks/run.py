@@ -0,0 +1,249 @@
+"""Offline benchmarks of CoinGeckoAPI and the server.py tools against a local stub server
+
+    python -m benchmarks.run                               # every scenario
+    python -m benchmarks.run -s simple_price -s coin_by_id -n 500 -c 8
+    python -m benchmarks.run --latency 0.05 --error-rate 0.01 --rate-limit-rate 0.01
+    python -m benchmarks.run -s simple_price --slow-rate 0.02 --hedge   # tail latency with hedged requests
+    python -m benchmarks.run --name baseline               # results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Each scenario runs in its own subprocess (so peak RSS is per scenario) against
+a stub server in the parent process, and reports throughput, p50/p99 latency,
+errors and peak RSS. Results are written to benchmarks/results/ as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stub_server import StubConfig, StubServer  # noqa: E402
+from pycoingecko.stats import percentile  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# name -> (target, callable name, kwargs); target is 'client' (CoinGeckoAPI method) or 'server' (server.py tool)
+SCENARIOS = {
+    'simple_price': ('client', 'get_price', {'ids': 'bitcoin', 'vs_currencies': 'usd'}),
+    'coin_by_id': ('client', 'get_coin_by_id', {'id': 'bitcoin'}),
+    'coins_list': ('client', 'get_coins_list', {}),
+    'token_list': ('client', 'get_asset_platform_by_id', {'asset_platform_id': 'ethereum'}),
+    'market_chart': ('client', 'get_coin_market_chart_by_id', {'id': 'bitcoin', 'vs_currency': 'usd', 'days': 365}),
+    'tool_get_price': ('server', 'get_price', {'ids': 'bitcoin', 'vs_currencies': 'usd'}),
+    'tool_get_coin_by_id': ('server', 'get_coin_by_id', {'id': 'bitcoin'}),
+    'tool_get_exchange_by_id': ('server', 'get_exchange_by_id', {'id': 'binance'}),
+    'tool_market_chart': ('server', 'get_coin_market_chart_by_id', {'id': 'bitcoin', 'vs_currency': 'usd', 'days': '365'}),
+}
+
+# default number of calls per scenario, lower for the heavy payloads
+DEFAULT_CALLS = {'coins_list': 30, 'token_list': 30, 'market_chart': 50, 'tool_market_chart': 50,
+                 'coin_by_id': 200, 'tool_get_coin_by_id': 200, 'tool_get_exchange_by_id': 200}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def make_client(base_url, cache, hedge=False):
+    from pycoingecko import CoinGeckoAPI
+
+    cg = CoinGeckoAPI(cache=cache, hedge=hedge)
+    cg.api_base_url = base_url
+    # the stub speaks plain http: use the same (instrumented) adapter as https
+    cg.session.mount('http://', cg.session.get_adapter('https://'))
+    return cg
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        func()
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, type(e).__name__
+
+
+def run_client(cg, method, kwargs, calls, concurrency):
+    func = getattr(cg, method)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda _: _timed(lambda: func(**dict(kwargs))), range(calls)))
+
+
+def run_server(cg, tool, kwargs, calls, concurrency):
+    import server
+
+    server.cg = cg
+
+    async def call():
+        start = time.perf_counter()
+        content = await server.app.call_tool(tool, dict(kwargs))
+        # tools report upstream failures in their payload instead of raising
+        error = None if '"success": true' in content[0].text[:32] else 'ToolError'
+        return time.perf_counter() - start, error
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                return await call()
+
+        return await asyncio.gather(*(bounded() for _ in range(calls)))
+
+    return asyncio.run(main())
+
+
+def run_worker(args):
+    """Run one scenario in this process and print its result as JSON"""
+
+    target, name, kwargs = SCENARIOS[args.worker]
+    cg = make_client(args.base_url, args.cache, args.hedge)
+    runner = run_client if target == 'client' else run_server
+
+    # warm up connections and lazily built stub bodies
+    runner(cg, name, kwargs, min(args.concurrency, 2), 1)
+    cg.stats.reset()
+
+    start = time.perf_counter()
+    samples = runner(cg, name, kwargs, args.calls, args.concurrency)
+    wall = time.perf_counter() - start
+
+    latencies = [latency for latency, error in samples]
+    errors = {}
+    for latency, error in samples:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    stats = cg.stats.snapshot()
+    result = {
+        'scenario': args.worker,
+        'target': target,
+        'calls': args.calls,
+        'concurrency': args.concurrency,
+        'wall_seconds': wall,
+        'throughput': args.calls / wall if wall else None,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'errors': errors,
+        'retries': sum(s['retries'] for s in stats.values()),
+        'hedges': sum(s['hedges']['fired'] for s in stats.values()),
+        'hedges_won': sum(s['hedges']['won'] for s in stats.values()),
+        'bytes_decompressed': sum(s['bytes']['decompressed'] for s in stats.values()),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(json.dumps(result))
+
+
+def load_results(path):
+    """Return the results of a previous run keyed by scenario"""
+
+    with open(path) as f:
+        return {r['scenario']: r for r in json.load(f)['results']}
+
+
+def compare(results, baseline, baseline_path, threshold):
+    """Print the change of each metric against a previous run; return the regressions"""
+
+    regressions = []
+    print('\n{0:<26}{1:>14}{2:>14}{3:>14}{4:>14}'.format('vs ' + os.path.basename(baseline_path),
+                                                        'throughput', 'p50', 'p99', 'peak RSS'))
+    for result in results:
+        before = baseline.get(result['scenario'])
+        if before is None:
+            continue
+        cells = []
+        for metric, higher_is_better in (('throughput', True), ('p50', False), ('p99', False), ('peak_rss_mb', False)):
+            if not before.get(metric) or result.get(metric) is None:
+                cells.append('n/a')
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append((result['scenario'], metric, change))
+            cells.append('{0:+.1%}'.format(change))
+        print('{0:<26}{1:>14}{2:>14}{3:>14}{4:>14}'.format(result['scenario'], *cells))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('-n', '--calls', type=int, help='calls per scenario (default depends on payload size)')
+    parser.add_argument('-c', '--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0, help='injected latency per response (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra uniform random latency (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of responses delayed by --slow-latency')
+    parser.add_argument('--slow-latency', type=float, default=1.0, help='extra latency of slow responses (seconds)')
+    parser.add_argument('--hedge', action='store_true', help='send hedged requests after the p95 latency')
+    parser.add_argument('--cache-max-age', type=int, help='Cache-Control max-age sent by the stub')
+    parser.add_argument('--cache', action='store_true', help='keep the client response cache enabled')
+    parser.add_argument('--name', help='results file name (default: timestamp)')
+    parser.add_argument('--compare', metavar='RESULTS', help='previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change reported as regression')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    # read before this run's results are written, in case they share a name
+    baseline = load_results(args.compare) if args.compare else None
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, cache_max_age=args.cache_max_age,
+                        slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    results = []
+    with StubServer(config) as stub:
+        for scenario in args.scenario or sorted(SCENARIOS):
+            calls = args.calls or DEFAULT_CALLS.get(scenario, 500)
+            command = [sys.executable, '-m', 'benchmarks.run', '--worker', scenario, '--base-url', stub.base_url,
+                       '--calls', str(calls), '--concurrency', str(args.concurrency)]
+            if args.cache:
+                command.append('--cache')
+            if args.hedge:
+                command.append('--hedge')
+            output = subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.PIPE,
+                                    universal_newlines=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print('{scenario:<26}{throughput:>10.1f}/s  p50 {p50_ms:>8.2f} ms  p99 {p99_ms:>8.2f} ms  '
+                  'rss {peak_rss_mb:>7.1f} MiB  errors {errors}  hedges won {hedges_won}/{hedges}'.format(
+                      p50_ms=result['p50'] * 1000, p99_ms=result['p99'] * 1000, **result))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, '{0}.json'.format(args.name or time.strftime('%Y%m%d-%H%M%S')))
+    with open(path, 'w') as f:
+        json.dump({'created': time.time(), 'python': platform.python_version(), 'platform': platform.platform(),
+                   'config': {k: v for k, v in vars(args).items() if k not in ('worker', 'base_url')},
+                   'results': results}, f, indent=2)
+    print('results written to {0}'.format(path))
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.compare, args.threshold)
+        if regressions:
+            print('\nregressions beyond {0:.0%}:'.format(args.threshold))
+            for scenario, metric, change in regressions:
+                print('  {0} {1} {2:+.1%}'.format(scenario, metric, change))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Startup benchmark of server.py
+
+    python -m benchmarks.startup [-n RUNS] [--budget-ms MS] [--top N]
+
+Measures, over several fresh processes:
+
+  * import time of ``import server`` as reported by ``python -X importtime``,
+    with the slowest direct imports of server.py
+  * time from spawning ``python server.py`` on the stdio transport to the
+    response of the MCP ``initialize`` request, i.e. what a client such as
+    client/ui.py waits for on every spawn
+
+The exit status is 1 when the median time to initialize exceeds --budget-ms.
+No network access is needed: the server does not call the API before the
+handshake.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# default budget (milliseconds) for spawn -> initialize response
+DEFAULT_BUDGET_MS = 1500
+
+INITIALIZE = {
+    'jsonrpc': '2.0',
+    'id': 1,
+    'method': 'initialize',
+    'params': {
+        'protocolVersion': '2024-11-05',
+        'capabilities': {},
+        'clientInfo': {'name': 'startup-benchmark', 'version': '0'},
+    },
+}
+
+
+def import_times(top):
+    """Return (total_us, [(cumulative_us, module)]) of ``import server``, its slowest direct imports first"""
+
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import server'], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True).stderr
+    # a module is reported after its own imports, indented two spaces per level
+    children = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == 'server':
+                children.sort(reverse=True)
+                return int(cumulative), children[:top]
+            children = []
+
+    raise RuntimeError('server was not imported')
+
+
+def time_to_initialize(timeout=30.0):
+    """Spawn server.py on stdio and return the seconds until its initialize response"""
+
+    env = dict(os.environ, MCP_TRANSPORT='stdio')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'server.py'], cwd=ROOT, env=env, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        process.stdin.write(json.dumps(INITIALIZE) + '\n')
+        process.stdin.flush()
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError('server.py exited before answering initialize')
+            try:
+                message = json.loads(line)
+            except ValueError:
+                raise RuntimeError('server.py wrote non-JSON to stdout: {0!r}'.format(line[:80]))
+            if message.get('id') == INITIALIZE['id']:
+                return time.perf_counter() - start
+        raise RuntimeError('no initialize response within {0}s'.format(timeout))
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=8, help='number of slowest imports to list')
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(args.runs):
+        total, modules = import_times(args.top)
+        totals.append(total)
+    print('import server: {0:.1f} ms (median of {1})'.format(statistics.median(totals) / 1000, args.runs))
+    for cumulative, name in modules:
+        print('  {0:<40}{1:>8.1f} ms'.format(name, cumulative / 1000))
+
+    runs = [time_to_initialize() for _ in range(args.runs)]
+    median = statistics.median(runs) * 1000
+    print('spawn -> initialize: median {0:.1f} ms, max {1:.1f} ms (budget {2:.0f} ms)'.format(
+        median, max(runs) * 1000, args.budget_ms))
+
+    if median > args.budget_ms:
+        print('over budget', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Local CoinGecko stub HTTP server replaying benchmark payloads
+
+Serves /api/v3/<path> for every template in payloads.PAYLOADS with optional
+injected latency, 429 and 5xx responses, and gzip when the client accepts it.
+"""
+import gzip
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from pycoingecko.stats import endpoint_template
+
+try:
+    from . import payloads
+except ImportError:
+    import payloads
+
+API_PREFIX = '/api/v3/'
+
+
+class StubConfig:
+    """Fault and latency injection settings of the stub server"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, cache_max_age=None,
+                 seed=0, slow_rate=0.0, slow_latency=1.0):
+        # seconds added before every response, plus a uniform random jitter
+        self.latency = latency
+        self.jitter = jitter
+        # fraction of requests delayed by a further slow_latency seconds (tail latency)
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        # fraction of requests answered with 503 / 429
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        # Cache-Control max-age sent with 200 responses (None: no header)
+        self.cache_max_age = cache_max_age
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self):
+        """Return the injected delay and two uniform draws for the fault checks of one request"""
+
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                delay += self.slow_latency
+            return delay, self.random.random(), self.random.random()
+
+
+class StubServer:
+    """Threaded stub server; use as a context manager or call start() / stop()"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or StubConfig()
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}{2}'.format(host, port, API_PREFIX)
+
+    def body(self, template):
+        """Return (identity, gzip) encoded bodies of a template, built once"""
+
+        with self._lock:
+            bodies = self._bodies.get(template)
+            if bodies is None:
+                raw = payloads.encode(payloads.PAYLOADS[template]())
+                bodies = self._bodies[template] = (raw, gzip.compress(raw, 6))
+            return bodies
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # send headers and body in one segment, without waiting on delayed ACKs
+            disable_nagle_algorithm = True
+            wbufsize = -1
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                config = stub.config
+                path = urlsplit(self.path).path
+                delay, fault, limit = config.roll()
+                if delay:
+                    time.sleep(delay)
+
+                if fault < config.error_rate:
+                    return self._send(503, b'{"error":"Service Unavailable"}')
+                if limit < config.rate_limit_rate:
+                    return self._send(429, b'{"status":{"error_code":429,"error_message":"Rate limited"}}',
+                                      {'Retry-After': '1'})
+
+                template = endpoint_template(path, API_PREFIX) if path.startswith(API_PREFIX) else None
+                if template not in payloads.PAYLOADS:
+                    return self._send(404, b'{"error":"Not Found"}')
+
+                raw, compressed = stub.body(template)
+                headers = {}
+                if config.cache_max_age is not None:
+                    headers['Cache-Control'] = 'public, max-age={0}'.format(config.cache_max_age)
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    headers['Content-Encoding'] = 'gzip'
+                    return self._send(200, compressed, headers)
+                return self._send(200, raw, headers)
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,7 @@
+"""Export CoinGecko data to Parquet, Arrow IPC or CSV files (see pycoingecko/export.py)"""
+import sys
+
+from pycoingecko.export import main
+
+if __name__ == "__main__":
+    sys.exit(main())
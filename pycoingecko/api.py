@@ -1,21 +1,42 @@
+import contextvars
 import json
-import requests
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-
-from .utils import func_args_preprocessing
+from .cache import ResponseCache, cache_key
+from .endpoints import endpoint_methods
+from .keys import DEMO, PRO, KeyPool
+from .resilience import OPEN, CircuitBreakers, CircuitOpenError, HedgePolicy, RetryPolicy, parse_retry_after
+from .stats import ClientStats, RequestSample, connection_timings, reset_connection_timings
 
 
+# one method per entry of the declarative table in endpoints.py (e.g. get_price,
+# get_coins_markets, get_coin_by_id), compiled once at import
+@endpoint_methods()
 class CoinGeckoAPI:
     __API_URL_BASE = 'https://api.coingecko.com/api/v3/'
     __PRO_API_URL_BASE = 'https://pro-api.coingecko.com/api/v3/'
+    __CHUNK_SIZE = 64 * 1024
 
-    def __init__(self, api_key: str = '', retries=5, demo_api_key: str = ''):
+    def __init__(self, api_key: str = '', retries=5, demo_api_key: str = '', cache=True, retry_policy=None,
+                 hedge=False, circuit_breakers=True, api_keys=None, scheduler=None):
 
         self.extra_params = None
+        # several keys: every request picks one from the pool (see keys.KeyPool)
+        self.key_pool = None
+        if api_keys:
+            if not isinstance(api_keys, KeyPool):
+                api_keys = list(api_keys)
+                if api_key:
+                    api_keys.insert(0, (api_key, PRO))
+                if demo_api_key:
+                    api_keys.append((demo_api_key, DEMO))
+                api_keys = KeyPool(api_keys)
+            self.key_pool = api_keys
+            self.api_base_url = self.key_pool.keys[0].base_url
         # self.headers = None
-        if api_key:
+        elif api_key:
             self.api_base_url = self.__PRO_API_URL_BASE
             self.extra_params = {'x_cg_pro_api_key': api_key}
             # self.headers = {"accept": "application/json",
@@ -27,33 +48,181 @@ class CoinGeckoAPI:
                 # self.headers = {"accept": "application/json",
                 #                 "x-cg-demo-api-key": demo_api_key}
 
-        self.request_timeout = 120
-
-        self.session = requests.Session()
-        retries = Retry(total=retries, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-
-        # self.session.headers = self.headers
+        # (connect, read) timeouts in seconds; endpoints with very large bodies set
+        # their own, and timeouts maps method names to overrides
+        self.request_timeout = (3.05, 30)
+        self.timeouts = {}
+
+        # 429 / 5xx responses and connection failures are retried with jittered
+        # exponential backoff, within a deadline and a client-wide retry budget
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy(retries=retries)
+
+        # hedge=True (or a HedgePolicy) sends a duplicate request once a call is
+        # slower than the recent p95 latency of its endpoint; the first response wins
+        if hedge is True:
+            hedge = HedgePolicy()
+        elif hedge is False:
+            hedge = None
+        self.hedge = hedge
+        self.__hedge_executor = None
+
+        # the requests session is created on first use (see session)
+        self.__session = None
+        self.__session_lock = threading.Lock()
+
+        # conditional requests (ETag / Last-Modified) and Cache-Control max-age;
+        # pass cache=False to disable or a ResponseCache instance to share one
+        if cache is True:
+            cache = ResponseCache()
+        elif cache is False:
+            cache = None
+        self.cache = cache
+
+        # per-endpoint request counters, bytes and latencies
+        self.stats = ClientStats()
+
+        # one circuit breaker per endpoint family (coins, simple, exchanges, ...):
+        # while open, calls fail fast with CircuitOpenError or get stale cached data;
+        # pass circuit_breakers=False to disable or a CircuitBreakers instance to tune
+        if circuit_breakers is True:
+            circuit_breakers = CircuitBreakers()
+        elif circuit_breakers is False:
+            circuit_breakers = None
+        self.circuit_breakers = circuit_breakers
+        self.stats.circuits = circuit_breakers
+        self.stats.key_pool = self.key_pool
+
+        # optional scheduler.RequestScheduler admitting upstream requests by priority
+        # class (see scheduler.priority) under a shared rate budget
+        self.scheduler = scheduler
+        self.stats.scheduler = scheduler
+
+        # the endpoint methods returning the undecoded JSON body (see RawResponses)
+        self.raw = RawResponses(self.__raw_request)
+
+    @property
+    def session(self):
+        """requests.Session used for every call, created on first access"""
+
+        session = self.__session
+        if session is None:
+            with self.__session_lock:
+                if self.__session is None:
+                    self.__session = self.__create_session()
+                session = self.__session
+        return session
+
+    @session.setter
+    def session(self, session):
+        self.__session = session
+
+    def __create_session(self):
+        # requests and the adapters built on it are imported here rather than at
+        # module level, so importing pycoingecko (and spawning server.py) stays cheap
+        import requests
+        from requests.packages.urllib3.util.request import ACCEPT_ENCODING
+
+        from .transport import InstrumentedHTTPAdapter
+
+        session = requests.Session()
+        # retries are made by the client (see __send), not by urllib3
+        session.mount('https://', InstrumentedHTTPAdapter())
+
+        # session.headers = self.headers
+        # negotiate every content-coding urllib3 can decode here (gzip, deflate,
+        # plus br / zstd when brotli / zstandard are installed)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+        return session
+
+    def __request(self, path, params, endpoint, raw=False):
+        if self.key_pool is not None:
+            due = self.key_pool.due()
+            if due:
+                threading.Thread(target=self.refresh_key_usage, args=(due,), name='coingecko-key-usage',
+                                 daemon=True).start()
+
+        sample = self.stats.sample(endpoint.template)
+        try:
+            return self.__measured_request(path, params, endpoint, sample, raw)
+        except Exception as e:
+            sample.error = type(e).__name__
+            # the last response status and the retries this call made, for callers that
+            # retry on their own (see jobs.run_units)
+            e.status = sample.status
+            e.retries = sample.retries
+            raise
+        finally:
+            self.stats.finish(sample)
+
+    def __raw_request(self, path, params, endpoint):
+        return self.__request(path, params, endpoint, raw=True)
+
+    def __measured_request(self, path, params, endpoint, sample, raw=False):
+        # serve from cache while still fresh, otherwise revalidate with the stored validators
+        # (except for requests pinned to a key, whose responses are specific to it)
+        key = entry = headers = None
+        if self.cache is not None and (self.key_pool is None or self.key_pool.pinned_key() is None):
+            key = cache_key(self.api_base_url + path, params)
+            entry = self.cache.get(key)
+            if entry is not None:
+                if entry.is_fresh():
+                    sample.cache = 'hit'
+                    return self.__cached_result(entry, raw, sample)
+                headers = entry.validators()
+            sample.cache = 'miss'
 
-    def __request(self, url, params):
         # if using pro or demo version of CoinGecko with api key, inject key in every call
+        # (keys from the pool are added per attempt)
         if self.extra_params is not None:
             params.update(self.extra_params)
 
-        try:
-            response = self.session.get(url, params=params, timeout=self.request_timeout)
-        except requests.exceptions.RequestException:
-            raise
+        breaker = self.circuit_breakers.get(endpoint.family) if self.circuit_breakers is not None else None
+        if breaker is None:
+            response, body = self.__send(path, params, headers, endpoint, sample)
+        else:
+            if not breaker.allow():
+                sample.rejected = True
+                if entry is not None:
+                    sample.cache = 'stale'
+                    return self.__cached_result(entry, raw, sample)
+                raise CircuitOpenError(endpoint.family, breaker.retry_in())
+            # every upstream attempt is recorded on its own (see __fetch): backoff sleeps,
+            # Retry-After waits and time queued in the scheduler are not upstream latency
+            attempts = []
+
+            def record(ok, duration):
+                attempts.append(ok)
+                breaker.record(ok, duration)
+
+            try:
+                response, body = self.__send(path, params, headers, endpoint, sample, record)
+            finally:
+                # an allowed call that failed before reaching upstream still ends its admission
+                if not attempts:
+                    breaker.record(False, 0.0)
+
+        if entry is not None and response.status_code == 304:
+            sample.cache = 'revalidated'
+            entry = self.cache.revalidated(key, entry, response.headers)
+            return self.__cached_result(entry, raw, sample)
 
         try:
             response.raise_for_status()
             # self._headers = response.headers
-            content = json.loads(response.content.decode('utf-8'))
+            if key is not None:
+                self.cache.store(key, response.headers, body)
+            if raw:
+                # passed through undecoded
+                return body
+            start = time.perf_counter()
+            content = json.loads(body.decode('utf-8'))
+            sample.decode = time.perf_counter() - start
             return content
         except Exception as e:
             # check if json (with error message) is returned
             try:
-                content = json.loads(response.content.decode('utf-8'))
+                content = json.loads(body.decode('utf-8'))
                 raise ValueError(content)
             # if no json
             except json.decoder.JSONDecodeError:
@@ -61,680 +230,208 @@ class CoinGeckoAPI:
 
             raise
 
-    # def __api_url_params(self, api_url, params, api_url_has_params=False):
-    #     # if using pro version of CoinGecko, inject key in every call
-    #     if self.api_key:
-    #         params['x_cg_pro_api_key'] = self.api_key
-    #
-    #     if params:
-    #         # if api_url contains already params and there is already a '?' avoid
-    #         # adding second '?' (api_url += '&' if '?' in api_url else '?'); causes
-    #         # issues with request parametes (usually for endpoints with required
-    #         # arguments passed as parameters)
-    #         api_url += '&' if api_url_has_params else '?'
-    #         for key, value in params.items():
-    #             if type(value) == bool:
-    #                 value = str(value).lower()
-    #
-    #             api_url += "{0}={1}&".format(key, value)
-    #         api_url = api_url[:-1]
-    #     return api_url
-
-    # ---------- PING ----------#
-    def ping(self, **kwargs):
-        """Check API server status"""
-
-        api_url = '{0}ping'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- KEY ----------#
-    def key(self, **kwargs):
-        """Monitor your account's API usage, including rate limits, monthly total credits, remaining credits, and more"""
-
-        api_url = '{0}key'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- SIMPLE ----------#
-    @func_args_preprocessing
-    def get_price(self, ids, vs_currencies, **kwargs):
-        """Get the current price of any cryptocurrencies in any other supported currencies that you need"""
-
-        ids = ids.replace(' ', '')
-        kwargs['ids'] = ids
-        vs_currencies = vs_currencies.replace(' ', '')
-        kwargs['vs_currencies'] = vs_currencies
-
-        api_url = '{0}simple/price'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_token_price(self, id, contract_addresses, vs_currencies, **kwargs):
-        """Get the current price of any tokens on this coin (ETH only at this stage as per api docs) in any other supported currencies that you need"""
-
-        contract_addresses = contract_addresses.replace(' ', '')
-        kwargs['contract_addresses'] = contract_addresses
-        vs_currencies = vs_currencies.replace(' ', '')
-        kwargs['vs_currencies'] = vs_currencies
-
-        api_url = '{0}simple/token_price/{1}'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_supported_vs_currencies(self, **kwargs):
-        """Get list of supported_vs_currencies"""
-
-        api_url = '{0}simple/supported_vs_currencies'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- COINS ----------#
-    @func_args_preprocessing
-    def get_coins(self, **kwargs):
-        """List all coins with data (name, price, market, developer, community, etc)"""
-
-        api_url = '{0}coins/list'.format(self.api_base_url)
-        # ['order', 'per_page', 'page', 'localization']
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_top_gainers_losers(self, vs_currency, **kwargs):
-        """Get top gainers and losers"""
-
-        kwargs['vs_currency'] = vs_currency
-
-        api_url = '{0}coins/top_gainers_losers'.format(self.api_base_url)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coins_list_new(self, **kwargs):
-        """This endpoint allows you to query the latest 200 coins that recently listed on CoinGecko"""
-
-        api_url = '{0}coins/list/new'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coins_list(self, **kwargs):
-        """List all supported coins id, name and symbol (no pagination required)"""
-
-        api_url = '{0}coins/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coins_markets(self, vs_currency, **kwargs):
-        """List all supported coins price, market cap, volume, and market related data"""
-
-        kwargs['vs_currency'] = vs_currency
-
-        api_url = '{0}coins/markets'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_by_id(self, id, **kwargs):
-        """Get current data (name, price, market, ... including exchange tickers) for a coin"""
-
-        api_url = '{0}coins/{1}/'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_ticker_by_id(self, id, **kwargs):
-        """Get coin tickers (paginated to 100 items)"""
-
-        api_url = '{0}coins/{1}/tickers'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_history_by_id(self, id, date, **kwargs):
-        """Get historical data (name, price, market, stats) at a given date for a coin"""
-
-        kwargs['date'] = date
-
-        api_url = '{0}coins/{1}/history'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_market_chart_by_id(self, id, vs_currency, days, **kwargs):
-        """Get historical market data include price, market cap, and 24h volume (granularity auto)"""
-
-        # api_url = '{0}coins/{1}/market_chart?vs_currency={2}&days={3}'.format(self.api_base_url, id, vs_currency, days)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}coins/{1}/market_chart'.format(self.api_base_url, id, vs_currency, days)
-        kwargs['vs_currency'] = vs_currency
-        kwargs['days'] = days
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_market_chart_range_by_id(self, id, vs_currency, from_timestamp, to_timestamp, **kwargs):
-        """Get historical market data include price, market cap, and 24h volume within a range of timestamp (granularity auto)"""
-
-        # api_url = '{0}coins/{1}/market_chart/range?vs_currency={2}&from={3}&to={4}'.format(self.api_base_url, id,
-        #                                                                                    vs_currency, from_timestamp,
-        #                                                                                    to_timestamp)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}coins/{1}/market_chart/range'.format(self.api_base_url, id)
-        kwargs['vs_currency'] = vs_currency
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-
-        return self.__request(api_url, kwargs)
-
-    # @func_args_preprocessing
-    # def get_coin_status_updates_by_id(self, id, **kwargs):
-    #     """Get status updates for a given coin"""
-    #
-    #     api_url = '{0}coins/{1}/status_updates'.format(self.api_base_url, id)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-
-    @func_args_preprocessing
-    def get_coin_ohlc_by_id(self, id, vs_currency, days, **kwargs):
-        """Get coin's OHLC"""
-
-        # api_url = '{0}coins/{1}/ohlc?vs_currency={2}&days={3}'.format(self.api_base_url, id, vs_currency, days)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}coins/{1}/ohlc'.format(self.api_base_url, id)
-        kwargs['vs_currency'] = vs_currency
-        kwargs['days'] = days
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_ohlc_by_id_range(self, id, vs_currency, from_timestamp, to_timestamp, interval, **kwargs):
-        """Get coin's OHLC within a range of timestamp"""
-
-        kwargs['vs_currency'] = vs_currency
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-        kwargs['interval'] = interval
-
-        api_url = '{0}coins/{1}/ohlc/range'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_circulating_supply_chart(self, id, days, **kwargs):
-        """Get coin's circulating supply chart"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}coins/{1}/circulating_supply_chart'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_circulating_supply_chart_range(self, id, from_timestamp, to_timestamp, **kwargs):
-        """Get coin's circulating supply chart within a range of timestamp"""
-
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-
-        api_url = '{0}coins/{1}/circulating_supply_chart/range'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_total_supply_chart(self, id, days, **kwargs):
-        """Get coin's total supply chart"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}coins/{1}/total_supply_chart'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_total_supply_chart_range(self, id, from_timestamp, to_timestamp, **kwargs):
-        """Get coin's total supply chart within a range of timestamp"""
-
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-
-        api_url = '{0}coins/{1}/total_supply_chart/range'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- Contract ----------#
-    @func_args_preprocessing
-    def get_coin_info_from_contract_address_by_id(self, id, contract_address, **kwargs):
-        """Get coin info from contract address"""
-
-        api_url = '{0}coins/{1}/contract/{2}'.format(self.api_base_url, id, contract_address)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_market_chart_from_contract_address_by_id(self, id, contract_address, vs_currency, days, **kwargs):
-        """Get historical market data include price, market cap, and 24h volume (granularity auto) from a contract address"""
-
-        # api_url = '{0}coins/{1}/contract/{2}/market_chart/?vs_currency={3}&days={4}'.format(self.api_base_url, id,
-        #                                                                                     contract_address,
-        #                                                                                     vs_currency, days)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}coins/{1}/contract/{2}/market_chart'.format(self.api_base_url, id, contract_address)
-        kwargs['vs_currency'] = vs_currency
-        kwargs['days'] = days
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coin_market_chart_range_from_contract_address_by_id(self, id, contract_address, vs_currency, from_timestamp,
-                                                                to_timestamp, **kwargs):
-        """Get historical market data include price, market cap, and 24h volume within a range of timestamp (granularity auto) from a contract address"""
+    @staticmethod
+    def __cached_result(entry, raw, sample):
+        # the cache keeps bytes: every caller gets its own decoded object
+        if raw:
+            return entry.body
+        start = time.perf_counter()
+        content = entry.decode()
+        sample.decode = time.perf_counter() - start
+        return content
+
+    def __send(self, path, params, headers, endpoint, sample, record=None):
+        # retry retryable statuses and connection failures with jittered backoff
+        # (at least Retry-After), while the policy's count, deadline and budget allow;
+        # with a key pool, a request answered with 401 / 403 / 429 is first sent
+        # again right away with another key
+        from .transport import RETRYABLE_EXCEPTIONS
+
+        pool = self.key_pool
+        policy = self.retry_policy
+        budget = policy.budget
+        timeout = self.timeouts.get(endpoint.name) or endpoint.timeout or self.request_timeout
+        started = time.perf_counter()
+        if budget is not None:
+            budget.deposit()
+
+        retry = rotations = 0
+        while True:
+            api_key = pool.acquire() if pool is not None else None
+            if api_key is None:
+                url, attempt_params = self.api_base_url + path, params
+            else:
+                url, attempt_params = api_key.base_url + path, dict(params, **{api_key.param: api_key.key})
 
-        # api_url = '{0}coins/{1}/contract/{2}/market_chart/range?vs_currency={3}&from={4}&to={5}'.format(
-        #     self.api_base_url, id, contract_address, vs_currency, from_timestamp, to_timestamp)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}coins/{1}/contract/{2}/market_chart/range'.format(self.api_base_url, id, contract_address)
-        kwargs['vs_currency'] = vs_currency
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- ASSET PLATFORMS ----------#
-    @func_args_preprocessing
-    def get_asset_platforms(self, **kwargs):
-        """List all asset platforms (Blockchain networks)"""
-
-        api_url = '{0}asset_platforms'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_asset_platform_by_id(self, asset_platform_id, **kwargs):
-        """ List all asset platforms (Blockchain networks) by platform id """
-
-        api_url = '{0}token_lists/{1}/all.json'.format(self.api_base_url, asset_platform_id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- CATEGORIES ----------#
-    @func_args_preprocessing
-    def get_coins_categories_list(self, **kwargs):
-        """List all categories"""
-
-        api_url = '{0}coins/categories/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_coins_categories(self, **kwargs):
-        """List all categories with market data"""
-
-        api_url = '{0}coins/categories'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- EXCHANGES ----------#
-    @func_args_preprocessing
-    def get_exchanges_list(self, **kwargs):
-        """List all exchanges"""
-
-        api_url = '{0}exchanges'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_exchanges_id_name_list(self, **kwargs):
-        """List all supported markets id and name (no pagination required)"""
-
-        api_url = '{0}exchanges/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_exchanges_by_id(self, id, **kwargs):
-        """Get exchange volume in BTC and tickers"""
-
-        api_url = '{0}exchanges/{1}'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_exchanges_tickers_by_id(self, id, **kwargs):
-        """Get exchange tickers (paginated, 100 tickers per page)"""
-
-        api_url = '{0}exchanges/{1}/tickers'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # @func_args_preprocessing
-    # def get_exchanges_status_updates_by_id(self, id, **kwargs):
-    #     """Get status updates for a given exchange"""
-    #
-    #     api_url = '{0}exchanges/{1}/status_updates'.format(self.api_base_url, id)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-
-    @func_args_preprocessing
-    def get_exchanges_volume_chart_by_id(self, id, days, **kwargs):
-        """Get volume chart data for a given exchange"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}exchanges/{1}/volume_chart'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_exchanges_volume_chart_by_id_within_time_range(self, id, from_timestamp, to_timestamp, **kwargs):
-        """Get volume chart data for a given exchange within a time range"""
-
-        kwargs['from'] = from_timestamp
-        kwargs['to'] = to_timestamp
-
-        api_url = '{0}exchanges/{1}/volume_chart/range'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # # ---------- FINANCE ----------#
-    # @func_args_preprocessing
-    # def get_finance_platforms(self, **kwargs):
-    #     """Get cryptocurrency finance platforms data"""
-    #
-    #     api_url = '{0}finance_platforms'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-    #
-    # @func_args_preprocessing
-    # def get_finance_products(self, **kwargs):
-    #     """Get cryptocurrency finance products data"""
-    #
-    #     api_url = '{0}finance_products'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-
-    # ---------- INDEXES ----------#
-    @func_args_preprocessing
-    def get_indexes(self, **kwargs):
-        """List all market indexes"""
-
-        api_url = '{0}indexes'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # @func_args_preprocessing
-    # def get_indexes_by_id(self, id, **kwargs):
-    #    """Get market index by id"""
-    #
-    #    api_url = '{0}indexes/{1}'.format(self.api_base_url, id)
-    #    api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #    return self.__request(api_url)
-
-    @func_args_preprocessing
-    def get_indexes_by_market_id_and_index_id(self, market_id, id, **kwargs):
-        """Get market index by market id and index id"""
-
-        api_url = '{0}indexes/{1}/{2}'.format(self.api_base_url, market_id, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_indexes_list(self, **kwargs):
-        """List market indexes id and name"""
-
-        api_url = '{0}indexes/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- DERIVATIVES ----------#
-    @func_args_preprocessing
-    def get_derivatives(self, **kwargs):
-        """List all derivative tickers"""
-
-        api_url = '{0}derivatives'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_derivatives_exchanges(self, **kwargs):
-        """List all derivative tickers"""
-
-        api_url = '{0}derivatives/exchanges'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_derivatives_exchanges_by_id(self, id, **kwargs):
-        """List all derivative tickers"""
-
-        api_url = '{0}derivatives/exchanges/{1}'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_derivatives_exchanges_list(self, **kwargs):
-        """List all derivative tickers"""
-
-        api_url = '{0}derivatives/exchanges/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- NFTS (BETA) ----------#
-    @func_args_preprocessing
-    def get_nfts_list(self, **kwargs):
-        """List all supported NFT ids, paginated by 100 items per page, paginated to 100 items"""
-
-        api_url = '{0}nfts/list'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_nfts_by_id(self, id, **kwargs):
-        """Get current data (name, price_floor, volume_24h ...) for an NFT collection. native_currency (string) is only a representative of the currency"""
-
-        api_url = '{0}nfts/{1}'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_nfts_by_asset_platform_id_and_contract_address(self, asset_platform_id, contract_address, **kwargs):
-        """Get current data (name, price_floor, volume_24h ...) for an NFT collection. native_currency (string) is only a representative of the currency"""
-
-        api_url = '{0}nfts/{1}/contract/{2}'.format(self.api_base_url, asset_platform_id, contract_address)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_nfts_markets(self, **kwargs):
-        """This endpoint allows you to query all the supported NFT collections with floor price, market cap, volume and market related data on CoinGecko"""
-
-        api_url = '{0}nfts/markets'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_nfts_market_chart_by_id(self, id, days, **kwargs):
-        """This endpoint allows you query historical market data of a NFT collection, including floor price, market cap, and 24h volume, by number of days away from now"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}nfts/{1}/market_chart'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_ntfs_market_chart_by_asset_platform_id_and_contract_address(self, asset_platform_id, contract_address, days, **kwargs):
-        """This endpoint allows you query historical market data of a NFT collection, including floor price, market cap, and 24h volume, by number of days away from now based on the provided contract address"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}nfts/{1}/contract/{2}/market_chart'.format(self.api_base_url, asset_platform_id, contract_address)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    @func_args_preprocessing
-    def get_nfts_tickers_by_id(self, id, **kwargs):
-        """This endpoint allows you to query the latest floor price and 24h volume of a NFT collection, on each NFT marketplace, e.g. OpenSea and LooksRare"""
-
-        api_url = '{0}nfts/{1}/tickers'.format(self.api_base_url, id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # # ---------- STATUS UPDATES ----------#
-    # @func_args_preprocessing
-    # def get_status_updates(self, **kwargs):
-    #     """List all status_updates with data (description, category, created_at, user, user_title and pin)"""
-    #
-    #     api_url = '{0}status_updates'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-
-    # # ---------- EVENTS ----------#
-    # @func_args_preprocessing
-    # def get_events(self, **kwargs):
-    #     """Get events, paginated by 100"""
-    #
-    #     api_url = '{0}events'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-    #
-    # @func_args_preprocessing
-    # def get_events_countries(self, **kwargs):
-    #     """Get list of event countries"""
-    #
-    #     api_url = '{0}events/countries'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-    #
-    # @func_args_preprocessing
-    # def get_events_types(self, **kwargs):
-    #     """Get list of event types"""
-    #
-    #     api_url = '{0}events/types'.format(self.api_base_url)
-    #     api_url = self.__api_url_params(api_url, kwargs)
-    #
-    #     return self.__request(api_url)
-
-    # ---------- EXCHANGE-RATES ----------#
-    @func_args_preprocessing
-    def get_exchange_rates(self, **kwargs):
-        """Get BTC-to-Currency exchange rates"""
-
-        api_url = '{0}exchange_rates'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- SEARCH ----------#
-    @func_args_preprocessing
-    def search(self, query, **kwargs):
-        """Search for coins, categories and markets on CoinGecko"""
-
-        # api_url = '{0}search?query={1}'.format(self.api_base_url, query)
-        # api_url = self.__api_url_params(api_url, kwargs, api_url_has_params=True)
-        api_url = '{0}search'.format(self.api_base_url)
-        kwargs['query'] = query
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- TRENDING ----------#
-    @func_args_preprocessing
-    def get_search_trending(self, **kwargs):
-        """Get top 7 trending coin searches"""
-
-        api_url = '{0}search/trending'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- GLOBAL ----------#
-    @func_args_preprocessing
-    def get_global(self, **kwargs):
-        """Get cryptocurrency global data"""
-
-        api_url = '{0}global'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)['data']
-
-    @func_args_preprocessing
-    def get_global_decentralized_finance_defi(self, **kwargs):
-        """Get cryptocurrency global decentralized finance(defi) data"""
-
-        api_url = '{0}global/decentralized_finance_defi'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)['data']
-
-    @func_args_preprocessing
-    def get_global_market_cap_chart(self, days, **kwargs):
-        """Get cryptocurrency global market cap chart data"""
-
-        kwargs['days'] = days
-
-        api_url = '{0}global/market_cap_chart'.format(self.api_base_url)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
-
-    # ---------- COMPANIES ----------#
-    @func_args_preprocessing
-    def get_companies_public_treasury_by_coin_id(self, coin_id, **kwargs):
-        """Get public companies data"""
-
-        api_url = '{0}companies/public_treasury/{1}'.format(self.api_base_url, coin_id)
-        # api_url = self.__api_url_params(api_url, kwargs)
-
-        return self.__request(api_url, kwargs)
+            try:
+                response, body = self.__attempt(url, attempt_params, headers, timeout, sample, record)
+            except RETRYABLE_EXCEPTIONS:
+                delay = policy.delay(retry)
+                if not self.__can_retry(retry, started, delay, endpoint, sample):
+                    raise
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if api_key is not None:
+                    pool.release(api_key, response.status_code, retry_after)
+                    if (response.status_code in (401, 403, 429) and pool.pinned_key() is None
+                            and rotations < len(pool) - 1 and pool.usable()):
+                        rotations += 1
+                        sample.retries = retry + rotations
+                        continue
+                if response.status_code not in policy.statuses:
+                    return response, body
+                delay = policy.delay(retry, retry_after)
+                if not self.__can_retry(retry, started, delay, endpoint, sample):
+                    return response, body
+
+            time.sleep(delay)
+            retry += 1
+            sample.retries = retry + rotations
+
+    def __can_retry(self, retry, started, delay, endpoint, sample):
+        policy = self.retry_policy
+        if not policy.can_retry(retry, started, delay):
+            return False
+        # stop retrying once other calls have opened the circuit
+        if self.circuit_breakers is not None and self.circuit_breakers.get(endpoint.family).state == OPEN:
+            return False
+        if policy.budget is not None and not policy.budget.withdraw():
+            sample.retries_denied += 1
+            return False
+        return True
+
+    def __attempt(self, url, params, headers, timeout, sample, record=None):
+        delay = self.hedge.delay(self.stats, sample.endpoint) if self.hedge is not None else None
+        if delay is None:
+            return self.__fetch(url, params, headers, timeout, sample, record)
+        return self.__hedged_fetch(url, params, headers, timeout, sample, delay, record)
+
+    def __fetch(self, url, params, headers, timeout, sample, record=None):
+        # every upstream request (retries, key rotations and hedges included) takes its own
+        # scheduler admission, so no slot is held during backoff sleeps
+        if self.scheduler is None:
+            return self.__get(url, params, headers, timeout, sample, record)
+        with self.scheduler.slot() as waited:
+            sample.queue += waited
+            return self.__get(url, params, headers, timeout, sample, record)
+
+    def __get(self, url, params, headers, timeout, sample, record=None):
+        # record(ok, seconds), when given, gets the outcome of this one upstream request
+        started = time.perf_counter()
+        ok = False
+        try:
+            reset_connection_timings()
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+            self.__record_response(response, sample)
+            body = self.__read_body(response, sample)
+            ok = response.status_code < 500
+        finally:
+            if record is not None:
+                record(ok, time.perf_counter() - started)
+        return response, body
+
+    def __hedged_fetch(self, url, params, headers, timeout, sample, delay, record=None):
+        # send the request from the hedge pool and, if it is still outstanding
+        # after delay, a duplicate; the first successful attempt is used and the
+        # other one is left to finish in the background
+        executor = self.__hedge_pool()
+        attempts = {}
+        primary_sample = RequestSample(sample.endpoint)
+        # pool threads do not inherit the caller's priority class (see scheduler.priority)
+        primary = executor.submit(contextvars.copy_context().run, self.__fetch, url, params, headers, timeout,
+                                  primary_sample, record)
+        attempts[primary] = primary_sample
+
+        done, _ = wait(attempts, timeout=delay)
+        if not done:
+            sample.hedged = True
+            hedge_sample = RequestSample(sample.endpoint)
+            attempts[executor.submit(contextvars.copy_context().run, self.__fetch, url, params, headers, timeout,
+                                     hedge_sample, record)] = hedge_sample
+
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    sample.hedge_won = future is not primary
+                    sample.copy_attempt(attempts[future])
+                    sample.queue += attempts[future].queue
+                    return future.result()
+        raise error
+
+    def __hedge_pool(self):
+        if self.__hedge_executor is None:
+            with self.__session_lock:
+                if self.__hedge_executor is None:
+                    self.__hedge_executor = ThreadPoolExecutor(max_workers=self.hedge.max_workers,
+                                                               thread_name_prefix='coingecko-hedge')
+        return self.__hedge_executor
+
+    def refresh_key_usage(self, keys=None):
+        """Refresh the rate limit and credits of pool keys (default: every pro key) from the key() endpoint"""
+
+        if self.key_pool is None:
+            return
+        if keys is None:
+            keys = [k for k in self.key_pool.keys if k.kind == PRO and not k.disabled]
+        for api_key in keys:
+            try:
+                with self.key_pool.pinned(api_key):
+                    usage = self.key()
+            except Exception:
+                # kept as is until the next poll
+                continue
+            self.key_pool.update_usage(api_key, usage)
+
+    @staticmethod
+    def __record_response(response, sample):
+        # status and time to the response headers, minus the connection setup
+        # measured by the instrumented connections
+        sample.status = response.status_code
+        sample.connect, sample.tls = connection_timings()
+        sample.ttfb = max(0.0, response.elapsed.total_seconds() - sample.connect - sample.tls)
+
+    def __read_body(self, response, sample):
+        # decompress the body chunk by chunk as it is read from the socket and
+        # record its compressed (on the wire) and decompressed size
+        start = time.perf_counter()
+        body = b''.join(response.iter_content(self.__CHUNK_SIZE))
+        sample.download = time.perf_counter() - start
+
+        tell = getattr(response.raw, 'tell', None)
+        sample.compressed_bytes = tell() if tell is not None else len(body)
+        sample.decompressed_bytes = len(body)
+        sample.encoding = response.headers.get('Content-Encoding')
+
+        return body
+
+    # ---------- HELPERS ----------#
+    def get_coin_candles(self, id, vs_currency, interval, from_timestamp, to_timestamp, gaps='skip', max_workers=4):
+        """Get OHLCV candles of any interval ('15m', '4h', '1w', ...) between two unix timestamps
+
+        Built from /coins/{id}/market_chart/range windows (see pycoingecko.candles);
+        returns an OHLCVTable.
+        """
+
+        from .candles import get_candles
+        return get_candles(self, id, vs_currency, interval, from_timestamp, to_timestamp, gaps=gaps,
+                           max_workers=max_workers)
+
+
+@endpoint_methods(raw=True)
+class RawResponses:
+    """The endpoint methods of a CoinGeckoAPI returning the JSON body as bytes, without decoding it
+
+    cg.raw.get_coin_by_id('bitcoin') goes through the same cache, retries,
+    circuit breakers and statistics as cg.get_coin_by_id('bitcoin'). Endpoints
+    returning a key of their body (get_global, ...) return the whole body.
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    def __request(self, path, params, endpoint):
+        return self._request(path, params, endpoint)
@@ -0,0 +1,145 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_MAX_AGE_RE = re.compile(r'(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+
+def cache_key(url, params):
+    """Return the cache key of a GET request (url with its params in a stable order)"""
+
+    return url, tuple(sorted(params.items()))
+
+
+def parse_max_age(headers):
+    """Return the freshness lifetime (seconds) given by Cache-Control/Age headers, or None if not cacheable
+
+    no-store makes a response uncacheable; no-cache stores it but always
+    revalidates (lifetime 0).
+    """
+
+    cache_control = headers.get('Cache-Control', '')
+    directives = cache_control.lower()
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+
+    match = _MAX_AGE_RE.search(cache_control)
+    if match is None:
+        return 0
+
+    max_age = int(match.group(1))
+    try:
+        age = int(headers.get('Age', 0))
+    except (TypeError, ValueError):
+        age = 0
+
+    return max(0, max_age - age)
+
+
+class CacheEntry:
+    """Cached response body with its validators and expiry time"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, body, etag=None, last_modified=None, expires_at=0.0):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def decode(self):
+        """Return a newly decoded JSON body, so callers may modify what they get"""
+
+        return json.loads(self.body.decode('utf-8'))
+
+    def is_fresh(self, now=None):
+        """Return True while the server-provided max-age has not elapsed"""
+
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def validators(self):
+        """Return the conditional request headers for revalidating this entry"""
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """In-memory HTTP response cache honouring ETag / Last-Modified validators and Cache-Control max-age
+
+    Entries are evicted least-recently-used once max_entries is reached.
+    Bodies are kept as bytes and decoded again for every hit.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry stored under key (fresh or not), or None"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, headers, body):
+        """Store a 200 response; return the entry, or None if the response is not cacheable"""
+
+        max_age = parse_max_age(headers)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if max_age is None or (not max_age and not etag and not last_modified):
+            self.discard(key)
+            return None
+
+        entry = CacheEntry(body, etag=etag, last_modified=last_modified, expires_at=time.time() + max_age)
+        return self.put(key, entry)
+
+    def put(self, key, entry):
+        """Store an entry as most recently used, evicting the least recently used ones past max_entries"""
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, key):
+        """Remove the entry stored under key, if any"""
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def revalidated(self, key, entry, headers):
+        """Refresh an entry after a 304 Not Modified response"""
+
+        max_age = parse_max_age(headers)
+        if max_age is None:
+            self.discard(key)
+            return entry
+
+        entry.expires_at = time.time() + max_age
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified', entry.last_modified)
+        return entry
+
+    def clear(self):
+        """Remove every entry"""
+
+        with self._lock:
+            self._entries.clear()
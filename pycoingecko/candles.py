@@ -0,0 +1,325 @@
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import CandleTable
+from .scheduler import current_priority, priority
+
+# candle interval names -> seconds
+INTERVALS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '2h': 7200,
+    '4h': 14400,
+    '6h': 21600,
+    '12h': 43200,
+    '1d': 86400,
+    '1w': 604800,
+}
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_INTERVAL = re.compile(r'^(\d+)([smhdw])$')
+
+# /market_chart/range granularity is automatic: 5-minutely within the last day,
+# hourly for ranges up to 90 days, daily beyond
+DAY = 86400
+HOURLY_WINDOW = 90 * DAY
+
+# how empty candle periods are handled: left out, filled with a flat candle at
+# the previous close (volume 0), or kept with NaN prices
+GAPS = ('skip', 'fill', 'nan')
+
+_NAN = float('nan')
+
+
+def parse_interval(interval):
+    """Return an interval ('15m', '4h', '1w', ... or seconds) in seconds"""
+
+    if isinstance(interval, (int, float)):
+        seconds = int(interval)
+    else:
+        match = _INTERVAL.match(str(interval).strip().lower())
+        if match is None:
+            raise ValueError('Invalid candle interval {0!r}; use e.g. {1} or a number of seconds'.format(
+                interval, ', '.join(INTERVALS)))
+        seconds = int(match.group(1)) * _UNITS[match.group(2)]
+    if seconds < 60:
+        raise ValueError('Candle interval must be at least 60 seconds, got {0!r}'.format(interval))
+    return seconds
+
+
+def split_range(from_timestamp, to_timestamp, interval, now=None):
+    """Split [from_timestamp, to_timestamp] (unix seconds) into /market_chart/range windows
+
+    Windows are sized so that upstream returns data at least as fine as the
+    candles where it can: 90 days (hourly data) for intervals under a day,
+    with the last day requested on its own (5-minutely data) for intervals
+    under an hour, and a single request for daily and longer candles.
+    """
+
+    from_timestamp = int(from_timestamp)
+    to_timestamp = int(to_timestamp)
+    if from_timestamp >= to_timestamp:
+        raise ValueError('from_timestamp must be before to_timestamp')
+    interval = parse_interval(interval)
+    if interval >= DAY:
+        return [(from_timestamp, to_timestamp)]
+
+    recent = to_timestamp
+    if interval < 3600:
+        now = time.time() if now is None else now
+        recent = max(from_timestamp, min(to_timestamp, int(now) - DAY))
+
+    windows = []
+    start = from_timestamp
+    while start < recent:
+        end = min(start + HOURLY_WINDOW, recent)
+        windows.append((start, end))
+        start = end
+    if recent < to_timestamp:
+        windows.append((recent, to_timestamp))
+    return windows
+
+
+class OHLCVTable(CandleTable):
+    """CandleTable with a volume and a sample count per candle
+
+    volume estimates the quantity traded during the candle from the rolling
+    24h total_volumes samples of /market_chart (their mean scaled to the
+    candle length); count is the number of price samples in the candle.
+    """
+
+    __slots__ = ('volume', 'count')
+
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, timestamp=(), open=(), high=(), low=(), close=(), volume=(), count=()):
+        super().__init__(timestamp, open, high, low, close)
+        self.volume = array('d', volume)
+        self.count = array('L', count)
+
+    @classmethod
+    def concat(cls, tables):
+        """Join tables in order into one"""
+
+        table = cls()
+        for part in tables:
+            table.extend(part)
+        return table
+
+    def append(self, timestamp, open, high, low, close, volume=_NAN, count=0):
+        """Append one candle"""
+
+        super().append(timestamp, open, high, low, close)
+        self.volume.append(volume)
+        self.count.append(count)
+
+    def extend(self, other):
+        """Append the candles of another table"""
+
+        for name in CandleTable.__slots__ + self.__slots__:
+            getattr(self, name).extend(getattr(other, name))
+
+    def rows(self):
+        """Return the candles as [timestamp, open, high, low, close, volume] lists (NaN as None)"""
+
+        return [[t] + [None if math.isnan(v) else v for v in values]
+                for t, *values in zip(self.timestamp, self.open, self.high, self.low, self.close, self.volume)]
+
+
+class CandleBuilder:
+    """Builds OHLCV candles of a fixed interval from streamed [[timestamp_ms, value], ...] series
+
+    feed() takes consecutive chunks of the prices and total_volumes series
+    (e.g. successive /market_chart/range windows, which may overlap) and
+    returns the candles completed so far; the last, possibly incomplete one is
+    held back until a later sample or finish(). Candles start at multiples of
+    the interval since the epoch. The candle boundaries are found with one
+    bisect each over typed arrays and each candle's high / low / volume is one
+    C-level min / max / sum over an array slice, instead of a Python loop per
+    sample.
+    """
+
+    def __init__(self, interval, gaps='skip'):
+        if gaps not in GAPS:
+            raise ValueError('gaps must be one of {0}, got {1!r}'.format(', '.join(GAPS), gaps))
+        self.interval = parse_interval(interval)
+        self.gaps = gaps
+        self._step = self.interval * 1000
+        # millisecond timestamps as doubles (exact below 2 ** 53)
+        self._times = array('d')
+        self._prices = array('d')
+        self._volume_times = array('d')
+        self._volumes = array('d')
+        # start of the next candle to emit and the close of the last one (for gap filling)
+        self._next = None
+        self._close = _NAN
+
+    @staticmethod
+    def _append(times, values, series):
+        # column lists rather than zip(*series): no tuple per sample for the garbage collector to track
+        new_values = [point[1] for point in series]
+        if None in new_values:
+            series = [point for point in series if point[1] is not None]
+            new_values = [point[1] for point in series]
+        new_times = array('d', [point[0] for point in series])
+        # overlapping windows repeat their boundary samples
+        start = bisect_right(new_times, times[-1]) if times else 0
+        times.extend(new_times[start:])
+        values.extend(array('d', new_values[start:]))
+
+    def _start(self, timestamp):
+        # start of the candle holding a timestamp (milliseconds)
+        timestamp = int(timestamp)
+        return timestamp - timestamp % self._step
+
+    def feed(self, prices, total_volumes=()):
+        """Add series samples; return an OHLCVTable of the candles completed by them"""
+
+        self._append(self._times, self._prices, prices)
+        self._append(self._volume_times, self._volumes, total_volumes)
+        if not self._times:
+            return OHLCVTable()
+        return self._emit(self._start(self._times[-1]))
+
+    def finish(self):
+        """Return the remaining candles, including the last incomplete one"""
+
+        if not self._times:
+            return OHLCVTable()
+        return self._emit(self._start(self._times[-1]) + self._step)
+
+    def _emit(self, end):
+        # emit the candles starting before end (milliseconds)
+        times, prices = self._times, self._prices
+        volume_times, volumes = self._volume_times, self._volumes
+        step = self._step
+        scale = self.interval / DAY
+        first = self._start(times[0])
+        last = max(first, min(end, self._start(times[-1]) + step))
+
+        # every candle boundary in one pass: bounds[k] is the first sample at or after first + k * step
+        # (edges as floats, like the samples: comparing an int with a float is about twice as slow)
+        edges = [float(edge) for edge in range(first, last + step, step)]
+        bounds = [bisect_left(times, edge) for edge in edges]
+        # total_volumes normally has the timestamps of prices: reuse the price bounds
+        aligned = len(volume_times) == len(times) and volume_times.tobytes() == times.tobytes()
+        volume_bounds = bounds if aligned else [bisect_left(volume_times, edge) for edge in edges]
+        kept = [k for k, (i, j) in enumerate(zip(bounds, bounds[1:])) if j > i]
+
+        lows = [bounds[k] for k in kept]
+        highs = [bounds[k + 1] for k in kept]
+        windows = [prices[i:j] for i, j in zip(lows, highs)]
+        volume_sums = [(volume_bounds[k], volume_bounds[k + 1]) for k in kept]
+        candles = (
+            [first + k * step for k in kept],
+            [prices[i] for i in lows],
+            [max(window) for window in windows],
+            [min(window) for window in windows],
+            [prices[j - 1] for j in highs],
+            [sum(volumes[v:w]) / (w - v) * scale if w > v else _NAN for v, w in volume_sums],
+            [j - i for i, j in zip(lows, highs)],
+        )
+
+        if self.gaps == 'skip':
+            columns = candles
+        else:
+            columns = ([], [], [], [], [], [], [])
+            if self._next is not None:
+                self._fill(columns, self._next, first)
+            # runs of consecutive candles, each followed by the empty candles up to the next run (or last)
+            breaks = [r for r in range(1, len(kept)) if kept[r] != kept[r - 1] + 1] + [len(kept)]
+            run = 0
+            for r in breaks:
+                for column, values in zip(columns, candles):
+                    column.extend(values[run:r])
+                self._fill(columns, candles[0][r - 1] + step if r else first, candles[0][r] if r < len(kept) else last)
+                run = r
+
+        if columns[4]:
+            self._close = columns[4][-1]
+        self._next = last
+        del times[:bounds[-1]]
+        del prices[:bounds[-1]]
+        del volume_times[:volume_bounds[-1]]
+        del volumes[:volume_bounds[-1]]
+        return OHLCVTable(*columns)
+
+    def _fill(self, columns, start, end):
+        # empty candles from start to end (milliseconds)
+        starts = range(start, end, self._step)
+        if self.gaps == 'fill':
+            close = columns[4][-1] if columns[4] else self._close
+            volume = 0.0
+        else:
+            close, volume = _NAN, _NAN
+        columns[0].extend(starts)
+        for column, value in zip(columns[1:], (close, close, close, close, volume, 0)):
+            column.extend([value] * len(starts))
+
+
+def build_candles(prices, interval, total_volumes=(), gaps='skip'):
+    """Return an OHLCVTable of interval candles from [[timestamp_ms, value], ...] series"""
+
+    builder = CandleBuilder(interval, gaps=gaps)
+    table = builder.feed(prices, total_volumes)
+    table.extend(builder.finish())
+    return table
+
+
+def iter_candles(cg, coin_id, vs_currency, interval, from_timestamp, to_timestamp, gaps='skip', max_workers=4,
+                 now=None):
+    """Yield OHLCVTable chunks of a coin's candles, one per /market_chart/range window
+
+    The windows of split_range() are fetched up to max_workers ahead of the
+    window being resampled, so memory holds a few windows whatever the range.
+    """
+
+    builder = CandleBuilder(interval, gaps=gaps)
+    windows = split_range(from_timestamp, to_timestamp, builder.interval, now=now)
+    first = int(from_timestamp) * 1000
+    last = int(to_timestamp) * 1000
+
+    # pool threads do not inherit the caller's priority class, so each fetch enters it
+    priority_class = current_priority()
+
+    def fetch(window):
+        with priority(priority_class):
+            return cg.get_coin_market_chart_range_by_id(coin_id, vs_currency, from_timestamp=window[0],
+                                                        to_timestamp=window[1])
+
+    def clip(series):
+        return [point for point in series if first <= point[0] <= last]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = deque()
+        windows = iter(windows)
+        for window in windows:
+            pending.append(executor.submit(fetch, window))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            chart = pending.popleft().result()
+            for window in windows:
+                pending.append(executor.submit(fetch, window))
+                break
+            table = builder.feed(clip(chart.get('prices') or ()), clip(chart.get('total_volumes') or ()))
+            if len(table):
+                yield table
+    table = builder.finish()
+    if len(table):
+        yield table
+
+
+def get_candles(cg, coin_id, vs_currency, interval, from_timestamp, to_timestamp, gaps='skip', max_workers=4):
+    """Return a coin's candles between two unix timestamps as one OHLCVTable"""
+
+    return OHLCVTable.concat(iter_candles(cg, coin_id, vs_currency, interval, from_timestamp, to_timestamp,
+                                          gaps=gaps, max_workers=max_workers))
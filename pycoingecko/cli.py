@@ -0,0 +1,231 @@
+"""pycoingecko command line: bulk API pulls driven by a file of requests
+
+    pycoingecko fetch requests.jsonl -o results.jsonl --workers 8 --rate 500
+    cat requests.jsonl | pycoingecko fetch > results.jsonl
+    pycoingecko export markets markets.parquet
+
+fetch reads one JSON request per line (blank lines and lines starting with #
+are skipped), runs them concurrently through the client's rate limiter,
+retries and response cache, and writes one JSON line per call as it
+completes. A request names an endpoint method and its arguments:
+
+    {"method": "get_price", "ids": "bitcoin,ethereum", "vs_currencies": "usd"}
+    {"method": "get_coin_by_id", "ids": ["bitcoin", "ethereum"], "tickers": false}
+    {"method": "get_coin_history_by_id", "id": "bitcoin", "date": "2024-01-01"}
+    {"method": "get_coin_market_chart_range_by_id", "id": "bitcoin", "vs_currency": "usd",
+     "from": "2023-01-01", "to": "2024-01-01", "window": "90d"}
+
+"ids" makes one call per id for methods taking a single id; "from" / "to"
+accept unix timestamps or dates ("to" defaults to now) and "window" splits
+the range into one call per window; dates may be given as yyyy-mm-dd. Each
+output line is {"request": {...}, "success": true, "data": ...} (data as the
+client method returns it) or {"request": {...}, "success": false, "error": "..."}.
+
+API keys are read from COINGECKO_API_KEY / COINGECKO_DEMO_API_KEY (or the
+comma-separated COINGECKO_API_KEYS / COINGECKO_DEMO_API_KEYS); --rate and
+--cache-dir default to COINGECKO_RATE_LIMIT and COINGECKO_CACHE_DIR, as for
+the MCP server.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from .endpoints import ENDPOINTS_BY_NAME
+from .keys import DEMO, PRO
+
+# request keys that are not endpoint arguments
+_CONTROL_KEYS = ('method', 'ids', 'from', 'to', 'window')
+
+
+def _env_keys(name, kind):
+    return [(key.strip(), kind) for key in os.getenv(name, '').split(',') if key.strip()]
+
+
+def client_from_env(rate_limit=None, cache_dir=None):
+    """Return a CoinGeckoAPI configured from the COINGECKO_* environment variables
+
+    rate_limit: requests per minute shared by every call (None: no limit)
+    cache_dir: directory of a DiskCache shared with other processes (None: in-memory cache)
+    """
+
+    from .api import CoinGeckoAPI
+    from .scheduler import RequestScheduler
+
+    cache = True
+    if cache_dir:
+        from .diskcache import DiskCache
+        cache = DiskCache(os.path.join(cache_dir, 'responses.sqlite'))
+    return CoinGeckoAPI(api_key=os.getenv('COINGECKO_API_KEY', ''),
+                        demo_api_key=os.getenv('COINGECKO_DEMO_API_KEY', ''),
+                        api_keys=_env_keys('COINGECKO_API_KEYS', PRO) + _env_keys('COINGECKO_DEMO_API_KEYS', DEMO),
+                        scheduler=RequestScheduler(rate=rate_limit / 60 if rate_limit else None), cache=cache)
+
+
+def expand_request(request):
+    """Return the jobs.Unit calls of one request dict (see the module docstring); raise ValueError if invalid"""
+
+    from .candles import parse_interval
+    from .export import parse_timestamp
+    from .history import parse_date
+    from .jobs import Unit, windows
+
+    if not isinstance(request, dict):
+        raise ValueError('A request must be a JSON object')
+    endpoint = ENDPOINTS_BY_NAME.get(request.get('method'))
+    if endpoint is None:
+        raise ValueError('Unknown method {0!r}'.format(request.get('method')))
+
+    params = {k: v for k, v in request.items() if k not in _CONTROL_KEYS}
+    ids = None
+    if 'ids' in request:
+        if 'ids' in endpoint.args:
+            params['ids'] = request['ids']
+        elif 'id' in endpoint.args:
+            ids = request['ids']
+            ids = ids.split(',') if isinstance(ids, str) else ids
+            if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+                raise ValueError('ids must be a comma-separated string or a list of strings')
+            ids = [i.strip() for i in ids if i.strip()]
+            if not ids:
+                raise ValueError('ids is empty')
+        else:
+            raise ValueError('{0} does not take ids'.format(endpoint.name))
+    if 'date' in params and 'date' in endpoint.args:
+        params['date'] = parse_date(params['date']).strftime('%d-%m-%Y')
+
+    spans = [None]
+    if 'from' in request or 'to' in request:
+        if 'from_timestamp' not in endpoint.args:
+            raise ValueError('{0} does not take a time range'.format(endpoint.name))
+        if 'from' not in request:
+            raise ValueError('"to" needs a "from"')
+        start = parse_timestamp(request['from'])
+        end = parse_timestamp(request.get('to', int(time.time())))
+        spans = windows(start, end, parse_interval(request['window'])) if 'window' in request else [(start, end)]
+
+    missing = [arg for arg in endpoint.args
+               if arg not in params and not (arg == 'id' and ids)
+               and not (arg in ('from_timestamp', 'to_timestamp') and spans[0] is not None)]
+    if missing:
+        raise ValueError('{0} requires {1}'.format(endpoint.name, ', '.join(missing)))
+
+    units = []
+    for coin_id in ids or [None]:
+        for span in spans:
+            call = dict(params)
+            if coin_id is not None:
+                call['id'] = coin_id
+            if span is not None:
+                call['from_timestamp'], call['to_timestamp'] = span
+            units.append(Unit(endpoint.name, call))
+    return units
+
+
+def read_requests(lines):
+    """Return ([Unit], [(line number, error)]) from JSON request lines"""
+
+    units, errors = [], []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            units.extend(expand_request(json.loads(line)))
+        except (TypeError, ValueError, KeyError) as e:
+            # e.g. invalid JSON, an unknown method or a date that is not a string
+            errors.append((number, str(e)))
+    return units, errors
+
+
+def _output_line(unit, body=None, error=None):
+    request = json.dumps(dict(unit.params, method=unit.method), sort_keys=True).encode()
+    if error is not None:
+        return b'{"request": ' + request + b', "success": false, "error": ' + json.dumps(error).encode() + b'}\n'
+    result_key = ENDPOINTS_BY_NAME[unit.method].result_key
+    if result_key is not None:
+        # the same data as the decoded method returns (get_global, ...), not the wrapping body
+        body = json.dumps(json.loads(body)[result_key]).encode()
+    # otherwise the body is written as received, without decoding and re-encoding it
+    return b'{"request": ' + request + b', "success": true, "data": ' + body.strip() + b'}\n'
+
+
+def fetch(args):
+    from .jobs import run_units
+    from .scheduler import INTERACTIVE
+
+    try:
+        source = sys.stdin if args.input == '-' else open(args.input)
+    except OSError as e:
+        print('pycoingecko fetch: error: cannot read {0}: {1}'.format(args.input, e.strerror), file=sys.stderr)
+        return 1
+    try:
+        units, errors = read_requests(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    for number, error in errors:
+        print('line {0}: {1}'.format(number, error), file=sys.stderr)
+
+    try:
+        output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    except OSError as e:
+        print('pycoingecko fetch: error: cannot write {0}: {1}'.format(args.output, e.strerror), file=sys.stderr)
+        return 1
+
+    unexpected = []
+
+    def commit(done, failed):
+        for unit, body in done:
+            try:
+                line = _output_line(unit, body)
+            except (TypeError, ValueError, KeyError) as e:
+                # a body without its result_key (or not a JSON object): reported like a failed call
+                line = _output_line(unit, error='Unexpected response: {0!r}'.format(e))
+                unexpected.append(unit)
+            output.write(line)
+        for unit, error in failed:
+            output.write(_output_line(unit, error=error))
+        output.flush()
+
+    try:
+        cg = client_from_env(rate_limit=args.rate, cache_dir=args.cache_dir)
+        report = run_units(cg, units, commit, max_workers=args.workers, max_attempts=args.attempts,
+                           checkpoint_every=1, priority_class=INTERACTIVE)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    print('{0} calls: {1} ok, {2} failed, {3} retries in {4:.1f}s ({5:.1f} calls/s)'.format(
+        report['units'], report['done'], report['failed'], report['retries'], report['elapsed'],
+        report['units_per_second']), file=sys.stderr)
+    return 1 if errors or report['failed'] or unexpected else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pycoingecko', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pull = commands.add_parser('fetch', help='run the requests of a JSON-lines file concurrently')
+    pull.add_argument('input', nargs='?', default='-', help='JSON-lines requests (default: stdin)')
+    pull.add_argument('-o', '--output', default='-', help='JSON-lines results (default: stdout)')
+    pull.add_argument('-w', '--workers', type=int, default=4, help='calls in flight at once')
+    pull.add_argument('--rate', type=float, default=float(os.getenv('COINGECKO_RATE_LIMIT', '0')),
+                      help='requests per minute (default: COINGECKO_RATE_LIMIT, else no client-side limit)')
+    pull.add_argument('--cache-dir', default=os.getenv('COINGECKO_CACHE_DIR'),
+                      help='share an on-disk response cache in this directory (default: COINGECKO_CACHE_DIR)')
+    pull.add_argument('--attempts', type=int, default=5,
+                      help='attempts per call on 429 / 5xx / connection errors')
+
+    commands.add_parser('export', add_help=False, help='write markets, charts, tickers or history to files '
+                                                       '(see pycoingecko export -h)')
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['export']:
+        from .export import main as export_main
+        return export_main(argv[1:], prog='pycoingecko export')
+
+    args = parser.parse_args(argv)
+    return fetch(args)
@@ -0,0 +1,131 @@
+import threading
+import time
+from array import array
+
+# money-valued /coins/markets fields (percentages, ranks and supplies are not converted)
+MARKET_MONEY_FIELDS = (
+    'current_price',
+    'market_cap',
+    'fully_diluted_valuation',
+    'total_volume',
+    'high_24h',
+    'low_24h',
+    'price_change_24h',
+    'market_cap_change_24h',
+    'ath',
+    'atl',
+)
+
+# /market_chart series holding money values
+CHART_SERIES = ('prices', 'market_caps', 'total_volumes')
+
+# suffixes of the money-valued keys of a /simple/price entry (e.g. usd, usd_market_cap, usd_24h_vol)
+PRICE_SUFFIXES = ('', '_market_cap', '_24h_vol')
+
+
+class CurrencyConverter:
+    """Converts amounts between vs_currencies locally, from the BTC-denominated /exchange_rates
+
+    The rates are fetched once and refreshed after ttl seconds, so the same
+    data in N currencies costs one upstream call plus the shared rates call.
+    Every value is converted at the current rate: exact for current prices,
+    an approximation for past values such as ath / atl or market chart points.
+    """
+
+    def __init__(self, cg, ttl=300):
+        self.cg = cg
+        self.ttl = ttl
+        self._rates = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def rates(self):
+        """Return {currency: units per BTC}, fetched again once older than ttl"""
+
+        with self._lock:
+            if self._rates is None or time.time() - self._fetched_at > self.ttl:
+                response = self.cg.get_exchange_rates()
+                self._rates = {code: float(rate['value']) for code, rate in response['rates'].items()}
+                self._fetched_at = time.time()
+            return self._rates
+
+    def currencies(self):
+        """Return the supported currency codes"""
+
+        return sorted(self.rates())
+
+    def factor(self, from_currency, to_currency):
+        """Return the multiplier converting from_currency amounts into to_currency"""
+
+        from_currency = from_currency.lower()
+        to_currency = to_currency.lower()
+        if from_currency == to_currency:
+            return 1.0
+        rates = self.rates()
+        for code in (from_currency, to_currency):
+            if not rates.get(code):
+                raise ValueError('Unsupported currency {0!r}; supported: {1}'.format(code, ', '.join(sorted(rates))))
+
+        return rates[to_currency] / rates[from_currency]
+
+    def convert(self, amount, from_currency, to_currency):
+        """Convert a single amount (None stays None)"""
+
+        if amount is None:
+            return None
+        return amount * self.factor(from_currency, to_currency)
+
+    def convert_array(self, values, from_currency, to_currency):
+        """Convert a sequence of amounts into an array of doubles (None becomes NaN)"""
+
+        factor = self.factor(from_currency, to_currency)
+        return array('d', [v * factor if v is not None else float('nan') for v in values])
+
+    def convert_series(self, series, from_currency, to_currency):
+        """Convert a [[timestamp, value], ...] time series"""
+
+        factor = self.factor(from_currency, to_currency)
+        return [[t, v * factor if v is not None else None] for t, v in series]
+
+    def convert_market_chart(self, chart, from_currency, to_currency):
+        """Convert the prices, market_caps and total_volumes of a /market_chart response"""
+
+        return {key: self.convert_series(series, from_currency, to_currency) if key in CHART_SERIES else series
+                for key, series in chart.items()}
+
+    def convert_markets(self, rows, from_currency, to_currency, fields=MARKET_MONEY_FIELDS):
+        """Return copies of /coins/markets rows with their money fields converted"""
+
+        factor = self.factor(from_currency, to_currency)
+        converted = []
+        for row in rows:
+            row = dict(row)
+            for field in fields:
+                value = row.get(field)
+                if value is not None:
+                    row[field] = value * factor
+            converted.append(row)
+        return converted
+
+    def convert_prices(self, prices, from_currency, to_currencies):
+        """Add to_currencies values to a /simple/price response fetched in from_currency
+
+        Prices, market caps and 24h volumes are converted; 24h changes are
+        percentages of the from_currency price and are not copied.
+        """
+
+        from_currency = from_currency.lower()
+        if isinstance(to_currencies, str):
+            to_currencies = to_currencies.split(',')
+        factors = [(c.strip().lower(), self.factor(from_currency, c.strip())) for c in to_currencies]
+
+        converted = {}
+        for coin, values in prices.items():
+            values = dict(values)
+            for currency, factor in factors:
+                for suffix in PRICE_SUFFIXES:
+                    value = values.get(from_currency + suffix)
+                    if value is not None:
+                        values[currency + suffix] = value * factor
+            converted[coin] = values
+        return converted
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from .cache import CacheEntry, ResponseCache, parse_max_age
+
+# minimum freshness (seconds) of slowly changing responses, by url pattern, so a
+# newly started process answers them from disk although the server's max-age is short
+DEFAULT_MIN_TTLS = (
+    (re.compile(r'/(simple/supported_vs_currencies|asset_platforms|coins/categories/list|exchanges/list|'
+                r'derivatives/exchanges/list|indexes/list)$'), 6 * 3600),
+    (re.compile(r'/coins/list$'), 3600),
+    (re.compile(r'/coins/[^/]+/(market_chart|ohlc)(/range)?$'), 300),
+)
+
+# seconds between two updates of an entry's access time (reads mostly do not write)
+ACCESS_RESOLUTION = 60.0
+
+# stores between two size checks
+EVICT_EVERY = 16
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+'''
+
+
+def _key(key):
+    url, params = key
+    return json.dumps([url, params], separators=(',', ':'), default=str)
+
+
+class DiskCache:
+    """Response cache persisted in a SQLite database, shared by the processes using the same file
+
+    Bodies are stored zlib-compressed with their validators and expiry time;
+    the database runs in WAL mode so readers do not block the writer. Once the
+    compressed bodies exceed max_bytes the least recently used entries are
+    deleted. The most recent memory_entries bodies are also kept decompressed
+    (raw bytes, decoded on every hit) in an in-memory ResponseCache. Same
+    interface as ResponseCache: CoinGeckoAPI(cache=DiskCache(path)).
+
+    min_ttls: (compiled url regex, seconds) pairs raising the freshness of
+              matching responses (no-store responses are never stored)
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, min_ttls=DEFAULT_MIN_TTLS, memory_entries=256,
+                 compress_level=6):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.min_ttls = min_ttls
+        self.compress_level = compress_level
+        self.memory = ResponseCache(max_entries=memory_entries)
+        self._local = threading.local()
+        self._stores = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(_SCHEMA)
+        self.evict()
+
+    def _connection(self):
+        # one connection per thread; sqlite3 connections are not shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _min_ttl(self, url):
+        for pattern, seconds in self.min_ttls:
+            if pattern.search(url):
+                return seconds
+        return 0
+
+    def _max_age(self, url, headers):
+        max_age = parse_max_age(headers)
+        if max_age is None:
+            return None
+        return max(max_age, self._min_ttl(url))
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def size(self):
+        """Total size of the compressed bodies, in bytes"""
+
+        return self._connection().execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        """Return the entry stored under key (fresh or not), or None"""
+
+        now = time.time()
+        memory = self.memory.get(key)
+        if memory is not None and memory.is_fresh(now):
+            return memory
+
+        # another process may have stored a fresher response
+        connection = self._connection()
+        row = connection.execute('SELECT body, etag, last_modified, expires_at, accessed_at FROM responses '
+                                 'WHERE key = ?', (_key(key),)).fetchone()
+        if row is None:
+            return memory
+        body, etag, last_modified, expires_at, accessed_at = row
+        if memory is not None and memory.expires_at >= expires_at:
+            return memory
+        if now - accessed_at > ACCESS_RESOLUTION:
+            connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, _key(key)))
+
+        entry = CacheEntry(zlib.decompress(body), etag=etag, last_modified=last_modified, expires_at=expires_at)
+        return self.memory.put(key, entry)
+
+    def store(self, key, headers, body):
+        """Store a 200 response; return the entry, or None if the response is not cacheable"""
+
+        max_age = self._max_age(key[0], headers)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if max_age is None or (not max_age and not etag and not last_modified):
+            self.memory.discard(key)
+            self._connection().execute('DELETE FROM responses WHERE key = ?', (_key(key),))
+            return None
+
+        now = time.time()
+        entry = CacheEntry(body, etag=etag, last_modified=last_modified, expires_at=now + max_age)
+        compressed = zlib.compress(body, self.compress_level)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO responses (key, body, size, etag, last_modified, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', (_key(key), compressed, len(compressed), etag, last_modified,
+                                             entry.expires_at, now))
+        self.memory.put(key, entry)
+
+        with self._lock:
+            self._stores += 1
+            evict = self._stores % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+        return entry
+
+    def revalidated(self, key, entry, headers):
+        """Refresh an entry after a 304 Not Modified response"""
+
+        max_age = self._max_age(key[0], headers)
+        if max_age is None:
+            self.memory.discard(key)
+            self._connection().execute('DELETE FROM responses WHERE key = ?', (_key(key),))
+            return entry
+
+        entry.expires_at = time.time() + max_age
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified', entry.last_modified)
+        self._connection().execute(
+            'UPDATE responses SET expires_at = ?, etag = ?, last_modified = ?, accessed_at = ? WHERE key = ?',
+            (entry.expires_at, entry.etag, entry.last_modified, time.time(), _key(key)))
+        return entry
+
+    def evict(self):
+        """Delete least recently used entries until the bodies fit in max_bytes; return the number deleted"""
+
+        connection = self._connection()
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        keys = []
+        for key, size in connection.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany('DELETE FROM responses WHERE key = ?', keys)
+        self.memory.clear()
+        return len(keys)
+
+    def clear(self):
+        """Remove every entry"""
+
+        self.memory.clear()
+        self._connection().execute('DELETE FROM responses')
@@ -0,0 +1,281 @@
+import re
+
+from .utils import arg_preprocessing
+
+_PATH_ARG_RE = re.compile(r'\{([a-z_]+)\}')
+
+# (connect, read) timeout of endpoints returning very large bodies
+LARGE_RESPONSE_TIMEOUT = (5.0, 60.0)
+
+
+class Endpoint:
+    """Declarative description of an API endpoint
+
+    name: client method name
+    path: path template relative to the api base url; {arg} placeholders are
+          filled from the required arguments of the same name
+    args: required arguments, in positional order; those not in the path are
+          sent as query params
+    rename: query param name of an argument when it differs (e.g. from_timestamp -> from)
+    strip: arguments whose spaces are removed (comma-separated id lists)
+    result_key: key of the decoded response returned instead of the whole body
+    timeout: (connect, read) seconds overriding the client's request_timeout
+    """
+
+    __slots__ = ('name', 'path', 'args', 'doc', 'rename', 'strip', 'result_key', 'template', 'path_args',
+                 'query_args', 'family', 'timeout', '_prepare')
+
+    def __init__(self, name, path, args=(), doc='', rename=None, strip=(), result_key=None, timeout=None):
+        self.name = name
+        self.path = path
+        self.args = tuple(args)
+        self.doc = doc
+        self.rename = rename or {}
+        self.strip = tuple(strip)
+        self.result_key = result_key
+        self.timeout = timeout
+        # path template used to group statistics, e.g. coins/{id}/market_chart
+        self.template = path.strip('/')
+        # first path segment, e.g. coins, exchanges, nfts
+        self.family = self.template.split('/', 1)[0]
+        self.path_args = tuple(_PATH_ARG_RE.findall(path))
+        self.query_args = tuple(arg for arg in self.args if arg not in self.path_args)
+        self._prepare = None
+
+        unknown = set(self.path_args) - set(self.args)
+        if unknown:
+            raise ValueError('Path arguments {0} of {1} are not listed in args'.format(sorted(unknown), name))
+
+    def __repr__(self):
+        return 'Endpoint({0!r}, {1!r})'.format(self.name, self.path)
+
+    def _source(self, name, returns):
+        # source of a function taking the endpoint's arguments; it preprocesses
+        # them once (lists joined, booleans lowered) into the path and a fresh
+        # params dict, then evaluates the returns expression
+        signature = ''.join(', {0}'.format(arg) for arg in self.args)
+        lines = ['def {0}(self{1}, **kwargs):'.format(name, signature),
+                 '    params = {k: _prep(v) for k, v in kwargs.items()} if kwargs else {}']
+        for arg in self.query_args:
+            value = '_prep({0})'.format(arg)
+            if arg in self.strip:
+                value += ".replace(' ', '')"
+            lines.append('    params[{0!r}] = {1}'.format(self.rename.get(arg, arg), value))
+        if self.path_args:
+            path = '_path.format({0})'.format(', '.join('{0}=_prep({0})'.format(arg) for arg in self.path_args))
+        else:
+            path = '_path'
+        lines.append('    return {0}'.format(returns.format(path=path)))
+
+        return '\n'.join(lines)
+
+    def _build(self, name, returns, namespace):
+        namespace = dict(namespace, _prep=arg_preprocessing, _path=self.path, _endpoint=self)
+        exec(compile(self._source(name, returns), '<endpoint {0}>'.format(self.name), 'exec'), namespace)
+        return namespace[name]
+
+    def compile(self, request, raw=False):
+        """Return the client method for this endpoint
+
+        The method calls request(client, path, params, endpoint) and returns its
+        result (or result[result_key], unless raw).
+        """
+
+        returns = '_request(self, {path}, params, _endpoint)'
+        if self.result_key is not None and not raw:
+            returns += '[{0!r}]'.format(self.result_key)
+        method = self._build(self.name, returns, {'_request': request})
+        method.__doc__ = self.doc
+        method.__module__ = request.__module__
+        method.__qualname__ = '{0}.{1}'.format(request.__qualname__.rpartition('.')[0], self.name)
+
+        return method
+
+    def prepare(self, *args, **kwargs):
+        """Return the (path, params) of a call, for clients not using the compiled methods"""
+
+        if self._prepare is None:
+            self._prepare = self._build('prepare', '({path}, params)', {})
+
+        return self._prepare(None, *args, **kwargs)
+
+
+ENDPOINTS = (
+    # ---------- PING ----------#
+    Endpoint('ping', 'ping', doc='Check API server status'),
+
+    # ---------- KEY ----------#
+    Endpoint('key', 'key',
+             doc="Monitor your account's API usage, including rate limits, monthly total credits, remaining credits, and more"),
+
+    # ---------- SIMPLE ----------#
+    Endpoint('get_price', 'simple/price', ('ids', 'vs_currencies'), strip=('ids', 'vs_currencies'),
+             doc='Get the current price of any cryptocurrencies in any other supported currencies that you need'),
+    Endpoint('get_token_price', 'simple/token_price/{id}', ('id', 'contract_addresses', 'vs_currencies'),
+             strip=('contract_addresses', 'vs_currencies'),
+             doc='Get the current price of any tokens on this coin (ETH only at this stage as per api docs) in any other supported currencies that you need'),
+    Endpoint('get_supported_vs_currencies', 'simple/supported_vs_currencies',
+             doc='Get list of supported_vs_currencies'),
+
+    # ---------- COINS ----------#
+    Endpoint('get_coins', 'coins/list', timeout=LARGE_RESPONSE_TIMEOUT,
+             doc='List all coins with data (name, price, market, developer, community, etc)'),
+    Endpoint('get_coin_top_gainers_losers', 'coins/top_gainers_losers', ('vs_currency',),
+             doc='Get top gainers and losers'),
+    Endpoint('get_coins_list_new', 'coins/list/new',
+             doc='This endpoint allows you to query the latest 200 coins that recently listed on CoinGecko'),
+    Endpoint('get_coins_list', 'coins/list', timeout=LARGE_RESPONSE_TIMEOUT,
+             doc='List all supported coins id, name and symbol (no pagination required)'),
+    Endpoint('get_coins_markets', 'coins/markets', ('vs_currency',),
+             doc='List all supported coins price, market cap, volume, and market related data'),
+    Endpoint('get_coin_by_id', 'coins/{id}/', ('id',),
+             doc='Get current data (name, price, market, ... including exchange tickers) for a coin'),
+    Endpoint('get_coin_ticker_by_id', 'coins/{id}/tickers', ('id',),
+             doc='Get coin tickers (paginated to 100 items)'),
+    Endpoint('get_coin_history_by_id', 'coins/{id}/history', ('id', 'date'),
+             doc='Get historical data (name, price, market, stats) at a given date for a coin'),
+    Endpoint('get_coin_market_chart_by_id', 'coins/{id}/market_chart', ('id', 'vs_currency', 'days'),
+             doc='Get historical market data include price, market cap, and 24h volume (granularity auto)'),
+    Endpoint('get_coin_market_chart_range_by_id', 'coins/{id}/market_chart/range',
+             ('id', 'vs_currency', 'from_timestamp', 'to_timestamp'),
+             rename={'from_timestamp': 'from', 'to_timestamp': 'to'}, timeout=LARGE_RESPONSE_TIMEOUT,
+             doc='Get historical market data include price, market cap, and 24h volume within a range of timestamp (granularity auto)'),
+    Endpoint('get_coin_ohlc_by_id', 'coins/{id}/ohlc', ('id', 'vs_currency', 'days'),
+             doc="Get coin's OHLC"),
+    Endpoint('get_coin_ohlc_by_id_range', 'coins/{id}/ohlc/range',
+             ('id', 'vs_currency', 'from_timestamp', 'to_timestamp', 'interval'),
+             rename={'from_timestamp': 'from', 'to_timestamp': 'to'},
+             doc="Get coin's OHLC within a range of timestamp"),
+    Endpoint('get_coin_circulating_supply_chart', 'coins/{id}/circulating_supply_chart', ('id', 'days'),
+             doc="Get coin's circulating supply chart"),
+    Endpoint('get_coin_circulating_supply_chart_range', 'coins/{id}/circulating_supply_chart/range',
+             ('id', 'from_timestamp', 'to_timestamp'), rename={'from_timestamp': 'from', 'to_timestamp': 'to'},
+             doc="Get coin's circulating supply chart within a range of timestamp"),
+    Endpoint('get_coin_total_supply_chart', 'coins/{id}/total_supply_chart', ('id', 'days'),
+             doc="Get coin's total supply chart"),
+    Endpoint('get_coin_total_supply_chart_range', 'coins/{id}/total_supply_chart/range',
+             ('id', 'from_timestamp', 'to_timestamp'), rename={'from_timestamp': 'from', 'to_timestamp': 'to'},
+             doc="Get coin's total supply chart within a range of timestamp"),
+
+    # ---------- Contract ----------#
+    Endpoint('get_coin_info_from_contract_address_by_id', 'coins/{id}/contract/{contract_address}',
+             ('id', 'contract_address'),
+             doc='Get coin info from contract address'),
+    Endpoint('get_coin_market_chart_from_contract_address_by_id',
+             'coins/{id}/contract/{contract_address}/market_chart', ('id', 'contract_address', 'vs_currency', 'days'),
+             doc='Get historical market data include price, market cap, and 24h volume (granularity auto) from a contract address'),
+    Endpoint('get_coin_market_chart_range_from_contract_address_by_id',
+             'coins/{id}/contract/{contract_address}/market_chart/range',
+             ('id', 'contract_address', 'vs_currency', 'from_timestamp', 'to_timestamp'),
+             rename={'from_timestamp': 'from', 'to_timestamp': 'to'},
+             doc='Get historical market data include price, market cap, and 24h volume within a range of timestamp (granularity auto) from a contract address'),
+
+    # ---------- ASSET PLATFORMS ----------#
+    Endpoint('get_asset_platforms', 'asset_platforms',
+             doc='List all asset platforms (Blockchain networks)'),
+    Endpoint('get_asset_platform_by_id', 'token_lists/{asset_platform_id}/all.json', ('asset_platform_id',),
+             timeout=LARGE_RESPONSE_TIMEOUT,
+             doc='List all asset platforms (Blockchain networks) by platform id'),
+
+    # ---------- CATEGORIES ----------#
+    Endpoint('get_coins_categories_list', 'coins/categories/list',
+             doc='List all categories'),
+    Endpoint('get_coins_categories', 'coins/categories',
+             doc='List all categories with market data'),
+
+    # ---------- EXCHANGES ----------#
+    Endpoint('get_exchanges_list', 'exchanges',
+             doc='List all exchanges'),
+    Endpoint('get_exchanges_id_name_list', 'exchanges/list',
+             doc='List all supported markets id and name (no pagination required)'),
+    Endpoint('get_exchanges_by_id', 'exchanges/{id}', ('id',),
+             doc='Get exchange volume in BTC and tickers'),
+    Endpoint('get_exchanges_tickers_by_id', 'exchanges/{id}/tickers', ('id',),
+             doc='Get exchange tickers (paginated, 100 tickers per page)'),
+    Endpoint('get_exchanges_volume_chart_by_id', 'exchanges/{id}/volume_chart', ('id', 'days'),
+             doc='Get volume chart data for a given exchange'),
+    Endpoint('get_exchanges_volume_chart_by_id_within_time_range', 'exchanges/{id}/volume_chart/range',
+             ('id', 'from_timestamp', 'to_timestamp'), rename={'from_timestamp': 'from', 'to_timestamp': 'to'},
+             doc='Get volume chart data for a given exchange within a time range'),
+
+    # ---------- INDEXES ----------#
+    Endpoint('get_indexes', 'indexes',
+             doc='List all market indexes'),
+    Endpoint('get_indexes_by_market_id_and_index_id', 'indexes/{market_id}/{id}', ('market_id', 'id'),
+             doc='Get market index by market id and index id'),
+    Endpoint('get_indexes_list', 'indexes/list',
+             doc='List market indexes id and name'),
+
+    # ---------- DERIVATIVES ----------#
+    Endpoint('get_derivatives', 'derivatives',
+             doc='List all derivative tickers'),
+    Endpoint('get_derivatives_exchanges', 'derivatives/exchanges',
+             doc='List all derivative tickers'),
+    Endpoint('get_derivatives_exchanges_by_id', 'derivatives/exchanges/{id}', ('id',),
+             doc='List all derivative tickers'),
+    Endpoint('get_derivatives_exchanges_list', 'derivatives/exchanges/list',
+             doc='List all derivative tickers'),
+
+    # ---------- NFTS (BETA) ----------#
+    Endpoint('get_nfts_list', 'nfts/list',
+             doc='List all supported NFT ids, paginated by 100 items per page, paginated to 100 items'),
+    Endpoint('get_nfts_by_id', 'nfts/{id}', ('id',),
+             doc='Get current data (name, price_floor, volume_24h ...) for an NFT collection. native_currency (string) is only a representative of the currency'),
+    Endpoint('get_nfts_by_asset_platform_id_and_contract_address', 'nfts/{asset_platform_id}/contract/{contract_address}',
+             ('asset_platform_id', 'contract_address'),
+             doc='Get current data (name, price_floor, volume_24h ...) for an NFT collection. native_currency (string) is only a representative of the currency'),
+    Endpoint('get_nfts_markets', 'nfts/markets',
+             doc='This endpoint allows you to query all the supported NFT collections with floor price, market cap, volume and market related data on CoinGecko'),
+    Endpoint('get_nfts_market_chart_by_id', 'nfts/{id}/market_chart', ('id', 'days'),
+             doc='This endpoint allows you query historical market data of a NFT collection, including floor price, market cap, and 24h volume, by number of days away from now'),
+    Endpoint('get_ntfs_market_chart_by_asset_platform_id_and_contract_address',
+             'nfts/{asset_platform_id}/contract/{contract_address}/market_chart',
+             ('asset_platform_id', 'contract_address', 'days'),
+             doc='This endpoint allows you query historical market data of a NFT collection, including floor price, market cap, and 24h volume, by number of days away from now based on the provided contract address'),
+    Endpoint('get_nfts_tickers_by_id', 'nfts/{id}/tickers', ('id',),
+             doc='This endpoint allows you to query the latest floor price and 24h volume of a NFT collection, on each NFT marketplace, e.g. OpenSea and LooksRare'),
+
+    # ---------- EXCHANGE-RATES ----------#
+    Endpoint('get_exchange_rates', 'exchange_rates',
+             doc='Get BTC-to-Currency exchange rates'),
+
+    # ---------- SEARCH ----------#
+    Endpoint('search', 'search', ('query',),
+             doc='Search for coins, categories and markets on CoinGecko'),
+
+    # ---------- TRENDING ----------#
+    Endpoint('get_search_trending', 'search/trending',
+             doc='Get top 7 trending coin searches'),
+
+    # ---------- GLOBAL ----------#
+    Endpoint('get_global', 'global', result_key='data',
+             doc='Get cryptocurrency global data'),
+    Endpoint('get_global_decentralized_finance_defi', 'global/decentralized_finance_defi', result_key='data',
+             doc='Get cryptocurrency global decentralized finance(defi) data'),
+    Endpoint('get_global_market_cap_chart', 'global/market_cap_chart', ('days',),
+             doc='Get cryptocurrency global market cap chart data'),
+
+    # ---------- COMPANIES ----------#
+    Endpoint('get_companies_public_treasury_by_coin_id', 'companies/public_treasury/{coin_id}', ('coin_id',),
+             doc='Get public companies data'),
+)
+
+ENDPOINTS_BY_NAME = {endpoint.name: endpoint for endpoint in ENDPOINTS}
+
+
+def compile_endpoints(request, raw=False):
+    """Return {method name: method} for every endpoint, calling request(client, path, params, endpoint)"""
+
+    return {endpoint.name: endpoint.compile(request, raw) for endpoint in ENDPOINTS}
+
+
+def endpoint_methods(raw=False):
+    """Class decorator adding the compiled method of every endpoint, calling the class's private __request method"""
+
+    def decorate(cls):
+        request = vars(cls)['_{0}__request'.format(cls.__name__)]
+        for name, method in compile_endpoints(request, raw).items():
+            setattr(cls, name, method)
+        return cls
+
+    return decorate
@@ -0,0 +1,333 @@
+"""Streaming export of API results to Parquet, Arrow IPC or CSV files
+
+    python export.py markets markets.parquet --vs-currency usd
+    python export.py market-chart bitcoin chart.arrow --from 2023-01-01 --to 2024-01-01
+    python export.py tickers bitcoin tickers.csv
+    python export.py history history.parquet --store history.sqlite
+
+Rows are written in batches as pages or range windows arrive, so memory holds
+one row group whatever the size of the export. Parquet and Arrow need
+pyarrow; without it the rows are written as CSV next to the requested file.
+The format follows the file extension (.parquet, .arrow / .feather / .ipc,
+.csv) unless --format is given.
+"""
+import argparse
+import calendar
+import csv
+import os
+import sys
+import time
+import warnings
+
+from .history import HISTORY_COLUMNS, parse_date
+from .jobs import MARKET_CHART_WINDOW, windows
+from .screen import MARKET_COLUMNS, MAX_PER_PAGE, iter_market_pages
+from .tickers import iter_ticker_pages
+
+FORMATS = ('parquet', 'arrow', 'csv')
+
+_EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.csv': 'csv',
+}
+
+# rows buffered per Parquet row group / Arrow record batch
+ROW_GROUP_SIZE = 50000
+
+# (name, type) columns of the exported datasets; types: string, int, float, bool
+MARKET_EXPORT_COLUMNS = (
+    (('id', 'string'), ('symbol', 'string'), ('name', 'string'))
+    + tuple((name, 'int' if name == 'market_cap_rank' else 'float') for name in MARKET_COLUMNS)
+    + (('last_updated', 'string'),)
+)
+
+CHART_EXPORT_COLUMNS = (
+    ('timestamp', 'int'),
+    ('price', 'float'),
+    ('market_cap', 'float'),
+    ('total_volume', 'float'),
+)
+
+TICKER_EXPORT_COLUMNS = (
+    ('exchange', 'string'),
+    ('exchange_name', 'string'),
+    ('base', 'string'),
+    ('target', 'string'),
+    ('last', 'float'),
+    ('volume', 'float'),
+    ('last_usd', 'float'),
+    ('volume_usd', 'float'),
+    ('spread_percentage', 'float'),
+    ('trust_score', 'string'),
+    ('is_stale', 'bool'),
+    ('is_anomaly', 'bool'),
+    ('timestamp', 'string'),
+)
+
+HISTORY_EXPORT_COLUMNS = tuple((name, 'float' if name in ('price', 'market_cap', 'total_volume') else 'string')
+                               for name in HISTORY_COLUMNS)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def format_for(path, format=None):
+    """Return the export format of a path: format when given, else from the file extension"""
+
+    if format is None:
+        format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise ValueError('Cannot tell the format of {0!r}; use one of {1} or pass format'.format(
+                path, ', '.join(sorted(_EXTENSIONS))))
+    if format not in FORMATS:
+        raise ValueError('Unknown format {0!r}; available: {1}'.format(format, ', '.join(FORMATS)))
+    return format
+
+
+class CsvWriter:
+    """Writes row batches to a CSV file with a header line (None as an empty field)"""
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+        self.rows = 0
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowWriter:
+    """Writes row batches to a Parquet file (one row group per row_group_size rows) or an Arrow IPC file"""
+
+    def __init__(self, path, columns, format='parquet', row_group_size=ROW_GROUP_SIZE):
+        pa = _pyarrow()
+        if pa is None:
+            raise RuntimeError('Writing {0} requires pyarrow; install it or write a .csv file'.format(format))
+        types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([pa.field(name, types[kind]) for name, kind in columns])
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._buffer = []
+        if format == 'parquet':
+            self._writer = pa.parquet.ParquetWriter(path, self.schema)
+            self._write = lambda batch: self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+            self._write = self._writer.write_batch
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.row_group_size:
+            self._flush(self._buffer[:self.row_group_size])
+            del self._buffer[:self.row_group_size]
+
+    def _flush(self, rows):
+        columns = list(zip(*rows))
+        arrays = [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)]
+        self._write(self.pa.record_batch(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self):
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = []
+        self._writer.close()
+
+
+def output_for(path, format=None):
+    """Return the (path, format) an export to path writes
+
+    Without pyarrow, a Parquet or Arrow export falls back to CSV, written
+    next to path with a .csv extension, and a RuntimeWarning says so.
+    """
+
+    format = format_for(path, format)
+    if format != 'csv' and _pyarrow() is None:
+        fallback = os.path.splitext(path)[0] + '.csv'
+        warnings.warn('pyarrow is not installed; writing {0} as CSV instead of {1}'.format(fallback, format),
+                      RuntimeWarning, stacklevel=2)
+        return fallback, 'csv'
+    return path, format
+
+
+def open_writer(path, columns, format=None, row_group_size=ROW_GROUP_SIZE):
+    """Return a writer of (name, type) columns to path (see output_for), with write(rows) and close()"""
+
+    path, format = output_for(path, format)
+    if format == 'csv':
+        return CsvWriter(path, columns)
+    return ArrowWriter(path, columns, format=format, row_group_size=row_group_size)
+
+
+def batched(rows, size=ROW_GROUP_SIZE):
+    """Group an iterable of rows into lists of at most size rows"""
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export(batches, path, columns, format=None, row_group_size=ROW_GROUP_SIZE):
+    """Write an iterable of row batches to path as they are produced; return the number of rows"""
+
+    writer = open_writer(path, columns, format=format, row_group_size=row_group_size)
+    try:
+        for rows in batches:
+            writer.write(rows)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def _float(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def market_batches(cg, vs_currency='usd', per_page=MAX_PER_PAGE, max_pages=None, max_workers=4, **kwargs):
+    """Yield MARKET_EXPORT_COLUMNS rows of /coins/markets, one batch per page"""
+
+    for page in iter_market_pages(cg, vs_currency, per_page=per_page, max_pages=max_pages, max_workers=max_workers,
+                                  **kwargs):
+        yield [(row.get('id'), row.get('symbol'), row.get('name'))
+               + tuple(row.get(name) if name == 'market_cap_rank' else _float(row.get(name))
+                       for name in MARKET_COLUMNS)
+               + (row.get('last_updated'),)
+               for row in page]
+
+
+def market_chart_batches(cg, coin_id, vs_currency, from_timestamp, to_timestamp, window=MARKET_CHART_WINDOW):
+    """Yield CHART_EXPORT_COLUMNS rows of /coins/{id}/market_chart/range, one batch per window"""
+
+    last = None
+    for start, end in windows(from_timestamp, to_timestamp, window):
+        chart = cg.get_coin_market_chart_range_by_id(coin_id, vs_currency, from_timestamp=start, to_timestamp=end)
+        caps = dict(map(tuple, chart.get('market_caps') or ()))
+        volumes = dict(map(tuple, chart.get('total_volumes') or ()))
+        rows = []
+        for t, price in chart.get('prices') or ():
+            # consecutive windows share their boundary sample
+            if last is not None and t <= last:
+                continue
+            rows.append((int(t), _float(price), _float(caps.get(t)), _float(volumes.get(t))))
+            last = t
+        if rows:
+            yield rows
+
+
+def ticker_batches(cg, coin_id, max_pages=None, max_workers=4, **kwargs):
+    """Yield TICKER_EXPORT_COLUMNS rows of /coins/{id}/tickers, one batch per page"""
+
+    for tickers in iter_ticker_pages(cg, coin_id, max_pages=max_pages, max_workers=max_workers, **kwargs):
+        rows = []
+        for ticker in tickers:
+            market = ticker.get('market') or {}
+            rows.append((market.get('identifier'), market.get('name'), ticker.get('base'), ticker.get('target'),
+                         _float(ticker.get('last')), _float(ticker.get('volume')),
+                         _float((ticker.get('converted_last') or {}).get('usd')),
+                         _float((ticker.get('converted_volume') or {}).get('usd')),
+                         _float(ticker.get('bid_ask_spread_percentage')), ticker.get('trust_score'),
+                         ticker.get('is_stale'), ticker.get('is_anomaly'), ticker.get('timestamp')))
+        yield rows
+
+
+def parse_timestamp(value):
+    """Return unix seconds from a unix timestamp or a date (yyyy-mm-dd / dd-mm-yyyy, UTC midnight)"""
+
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    return calendar.timegm(parse_date(value).timetuple())
+
+
+def _client():
+    from .cli import client_from_env
+    return client_from_env()
+
+
+def main(argv=None, prog='export.py'):
+    parser = argparse.ArgumentParser(prog=prog, description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--format', choices=FORMATS, help='output format (default: from the file extension)')
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    markets = commands.add_parser('markets', help='every /coins/markets row')
+    markets.add_argument('output')
+    markets.add_argument('--vs-currency', default='usd')
+    markets.add_argument('--max-pages', type=int)
+
+    chart = commands.add_parser('market-chart', help='price, market cap and volume series of a coin')
+    chart.add_argument('id')
+    chart.add_argument('output')
+    chart.add_argument('--vs-currency', default='usd')
+    chart.add_argument('--from', dest='from_timestamp', required=True, help='unix timestamp or yyyy-mm-dd')
+    chart.add_argument('--to', dest='to_timestamp', default=str(int(time.time())), help='unix timestamp or yyyy-mm-dd')
+
+    tickers = commands.add_parser('tickers', help='every exchange ticker of a coin')
+    tickers.add_argument('id')
+    tickers.add_argument('output')
+    tickers.add_argument('--max-pages', type=int)
+
+    history = commands.add_parser('history', help='the cells of a BulkHistory store')
+    history.add_argument('output')
+    history.add_argument('--store', required=True, help='HistoryStore SQLite file')
+    history.add_argument('--vs-currency', default='usd')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'history':
+        from .history import HistoryStore
+        store = HistoryStore(args.store)
+        batches = batched(store.rows(vs_currency=args.vs_currency), args.row_group_size)
+        columns = HISTORY_EXPORT_COLUMNS
+    elif args.command == 'markets':
+        batches = market_batches(_client(), args.vs_currency, max_pages=args.max_pages)
+        columns = MARKET_EXPORT_COLUMNS
+    elif args.command == 'market-chart':
+        batches = market_chart_batches(_client(), args.id, args.vs_currency,
+                                       parse_timestamp(args.from_timestamp), parse_timestamp(args.to_timestamp))
+        columns = CHART_EXPORT_COLUMNS
+    else:
+        batches = ticker_batches(_client(), args.id, max_pages=args.max_pages)
+        columns = TICKER_EXPORT_COLUMNS
+
+    started = time.monotonic()
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            output, format = output_for(args.output, args.format)
+        for warning in caught:
+            print('{0}: warning: {1}'.format(parser.prog, warning.message), file=sys.stderr)
+        rows = export(batches, output, columns, format=format, row_group_size=args.row_group_size)
+    except (RuntimeError, ValueError) as e:
+        parser.exit(1, '{0}: error: {1}\n'.format(parser.prog, e))
+    print('{0} rows written to {1} in {2:.1f}s'.format(rows, output, time.monotonic() - started),
+          file=sys.stderr)
+    return 0
@@ -0,0 +1,183 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .jobs import CHECKPOINT_EVERY, Unit, run_units
+
+# columns of HistoryStore.rows(), one row per coin and date
+HISTORY_COLUMNS = ('id', 'date', 'symbol', 'name', 'price', 'market_cap', 'total_volume')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS history (
+    id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (id, date)
+);
+'''
+
+
+def parse_date(value):
+    """Return a datetime.date from a date, a datetime, 'dd-mm-yyyy' or 'yyyy-mm-dd'"""
+
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    for fmt in ('%d-%m-%Y', '%Y-%m-%d'):
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError('Invalid date {0!r}; use dd-mm-yyyy or yyyy-mm-dd'.format(value))
+
+
+def date_range(start, end, step_days=1):
+    """Return the dates from start to end inclusive, every step_days"""
+
+    start = parse_date(start)
+    end = parse_date(end)
+    step = datetime.timedelta(days=step_days)
+    dates = []
+    while start <= end:
+        dates.append(start)
+        start += step
+    return dates
+
+
+def history_row(body, vs_currency='usd'):
+    """Flatten a /coins/{id}/history response into the values of HISTORY_COLUMNS after id and date"""
+
+    market_data = body.get('market_data') or {}
+    return (body.get('symbol'), body.get('name'),
+            (market_data.get('current_price') or {}).get(vs_currency),
+            (market_data.get('market_cap') or {}).get(vs_currency),
+            (market_data.get('total_volume') or {}).get(vs_currency))
+
+
+class HistoryStore:
+    """Local SQLite store of /coins/{id}/history responses by coin and date
+
+    Past snapshots do not change, so a stored cell is never fetched again:
+    the store is both the dedup index and the checkpoint of a bulk run.
+    Bodies are kept zlib-compressed as returned by the API.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        # one connection per thread; sqlite3 connections are not shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM history').fetchone()[0]
+
+    def missing(self, ids, dates):
+        """Return the (id, date) cells of ids x dates not stored yet, in id then date order"""
+
+        dates = [parse_date(d).isoformat() for d in dates]
+        connection = self._connection()
+        cells = []
+        for coin_id in ids:
+            stored = {row[0] for row in connection.execute('SELECT date FROM history WHERE id = ?', (coin_id,))}
+            cells.extend((coin_id, d) for d in dates if d not in stored)
+        return cells
+
+    def put_many(self, items):
+        """Store (id, date, body bytes) items in one transaction"""
+
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany('INSERT OR REPLACE INTO history (id, date, body, fetched_at) VALUES (?, ?, ?, ?)',
+                                   [(coin_id, parse_date(d).isoformat(), zlib.compress(body), now)
+                                    for coin_id, d, body in items])
+
+    def get(self, coin_id, date):
+        """Return the decoded response stored for a coin and date, or None"""
+
+        row = self._connection().execute('SELECT body FROM history WHERE id = ? AND date = ?',
+                                          (coin_id, parse_date(date).isoformat())).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row is not None else None
+
+    def rows(self, vs_currency='usd', ids=None, dates=None):
+        """Yield HISTORY_COLUMNS tuples of the stored cells (of ids / dates when given), by id and date"""
+
+        ids = set(ids) if ids is not None else None
+        dates = {parse_date(d).isoformat() for d in dates} if dates is not None else None
+        for coin_id, d, body in self._connection().execute('SELECT id, date, body FROM history ORDER BY id, date'):
+            if (ids is None or coin_id in ids) and (dates is None or d in dates):
+                yield (coin_id, d) + history_row(json.loads(zlib.decompress(body)), vs_currency)
+
+
+def write_history(store, path, vs_currency='usd', ids=None, dates=None, format=None):
+    """Stream the stored cells to a Parquet / Arrow (requires pyarrow) or CSV file; return the row count"""
+
+    from .export import HISTORY_EXPORT_COLUMNS, batched, export
+    return export(batched(store.rows(vs_currency=vs_currency, ids=ids, dates=dates)), path, HISTORY_EXPORT_COLUMNS,
+                  format=format)
+
+
+class BulkHistory:
+    """Fetches /coins/{id}/history for coin x date grids
+
+    Cells already in the store are skipped; the others run as units of the
+    job framework (jobs.run_units): max_workers threads at background
+    priority, so the client's RequestScheduler keeps them within its rate
+    budget and behind interactive calls, with retries and backoff on 429 /
+    5xx. Bodies are kept undecoded (cg.raw) and committed to the store every
+    checkpoint_every cells, so an interrupted run resumes with the cells
+    still missing; failed cells are retried by the next run.
+    """
+
+    def __init__(self, cg, store, max_workers=4, checkpoint_every=CHECKPOINT_EVERY, max_attempts=5, backoff=2.0):
+        self.cg = cg
+        self.store = store
+        self.max_workers = max_workers
+        self.checkpoint_every = checkpoint_every
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    @staticmethod
+    def unit(coin_id, date):
+        """Return the job unit fetching one cell"""
+
+        date = parse_date(date)
+        return Unit('get_coin_history_by_id', {'id': coin_id, 'date': date.strftime('%d-%m-%Y'),
+                                               'localization': 'false'},
+                    key='{0}/{1}'.format(coin_id, date.isoformat()))
+
+    def _commit(self, done, failed):
+        self.store.put_many([(unit.params['id'], unit.params['date'], body) for unit, body in done])
+
+    def run(self, ids, dates, progress=None, progress_every=10.0):
+        """Fetch the missing cells of ids x dates; return the run report
+
+        progress, when given, is called with the report every progress_every
+        seconds while the run goes on.
+        """
+
+        if isinstance(ids, str):
+            ids = [i.strip() for i in ids.split(',') if i.strip()]
+        dates = list(dates)
+        cells = self.store.missing(ids, dates)
+        report = run_units(self.cg, [self.unit(coin_id, d) for coin_id, d in cells], self._commit,
+                           max_workers=self.max_workers, max_attempts=self.max_attempts, backoff=self.backoff,
+                           checkpoint_every=self.checkpoint_every, progress=progress, progress_every=progress_every)
+        report['cells'] = len(ids) * len(dates)
+        report['stored'] = report['cells'] - len(cells)
+        return report
@@ -0,0 +1,330 @@
+import heapq
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlencode
+
+from .resilience import RETRY_STATUSES, CircuitOpenError, parse_retry_after
+from .scheduler import BACKGROUND, priority
+
+# units completed between two commits of the store
+CHECKPOINT_EVERY = 50
+
+# maximum span (seconds) of one request of the range endpoints
+MARKET_CHART_WINDOW = 90 * 86400
+OHLC_WINDOWS = {'daily': 180 * 86400, 'hourly': 31 * 86400}
+VOLUME_CHART_WINDOW = 31 * 86400
+
+# unit states
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS units (
+    job TEXT NOT NULL,
+    key TEXT NOT NULL,
+    method TEXT NOT NULL,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    body BLOB,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, key)
+);
+'''
+
+
+class Unit:
+    """One API call of a job: a CoinGeckoAPI endpoint method and its keyword arguments
+
+    key identifies the unit within its job (by default the method and its
+    sorted arguments as a query string).
+    """
+
+    __slots__ = ('method', 'params', 'key')
+
+    def __init__(self, method, params=None, key=None):
+        self.method = method
+        self.params = dict(params or {})
+        self.key = key if key is not None else '{0}?{1}'.format(method, urlencode(sorted(self.params.items())))
+
+    def __repr__(self):
+        return 'Unit({0!r})'.format(self.key)
+
+    def fetch(self, cg):
+        """Call the endpoint and return the undecoded JSON body"""
+
+        return getattr(cg.raw, self.method)(**self.params)
+
+
+def windows(from_timestamp, to_timestamp, size):
+    """Split [from_timestamp, to_timestamp] (unix seconds) into consecutive windows of at most size seconds"""
+
+    from_timestamp = int(from_timestamp)
+    to_timestamp = int(to_timestamp)
+    spans = []
+    while from_timestamp < to_timestamp:
+        end = min(from_timestamp + size, to_timestamp)
+        spans.append((from_timestamp, end))
+        from_timestamp = end
+    return spans
+
+
+def _split(values):
+    if isinstance(values, str):
+        values = values.split(',')
+    return [v.strip() for v in values if v.strip()]
+
+
+def market_chart_units(ids, vs_currency, from_timestamp, to_timestamp, window=MARKET_CHART_WINDOW):
+    """Units of /coins/{id}/market_chart/range for ids over a time range (90-day windows: hourly data)"""
+
+    return [Unit('get_coin_market_chart_range_by_id', {'id': coin_id, 'vs_currency': vs_currency,
+                                                       'from_timestamp': start, 'to_timestamp': end})
+            for coin_id in _split(ids) for start, end in windows(from_timestamp, to_timestamp, window)]
+
+
+def ohlc_range_units(ids, vs_currency, from_timestamp, to_timestamp, interval='daily'):
+    """Units of /coins/{id}/ohlc/range, split into the longest range allowed for the interval"""
+
+    return [Unit('get_coin_ohlc_by_id_range', {'id': coin_id, 'vs_currency': vs_currency, 'interval': interval,
+                                               'from_timestamp': start, 'to_timestamp': end})
+            for coin_id in _split(ids)
+            for start, end in windows(from_timestamp, to_timestamp, OHLC_WINDOWS[interval])]
+
+
+def exchange_volume_chart_units(ids, from_timestamp, to_timestamp, window=VOLUME_CHART_WINDOW):
+    """Units of /exchanges/{id}/volume_chart/range for exchange ids over a time range"""
+
+    return [Unit('get_exchanges_volume_chart_by_id_within_time_range',
+                 {'id': exchange_id, 'from_timestamp': start, 'to_timestamp': end})
+            for exchange_id in _split(ids) for start, end in windows(from_timestamp, to_timestamp, window)]
+
+
+def nft_market_chart_units(ids, days='max'):
+    """Units of /nfts/{id}/market_chart (no range variant: one unit per collection)"""
+
+    return [Unit('get_nfts_market_chart_by_id', {'id': nft_id, 'days': days}) for nft_id in _split(ids)]
+
+
+def _retryable(error):
+    # an open circuit fails without sending anything: the unit waits for it
+    if isinstance(error, CircuitOpenError):
+        return True
+    # the client already retried this call with its own backoff; retrying again here would
+    # multiply the upstream attempts (calls it did not retry, e.g. once its retry budget
+    # ran out, are retried)
+    if getattr(error, 'retries', 0):
+        return False
+    status = getattr(error, 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status is None or status in RETRY_STATUSES
+
+
+def _retry_delay(error, attempt, backoff, max_backoff):
+    # full jitter, at least what the API or the open circuit asked for
+    delay = random.uniform(0.0, min(max_backoff, backoff * 2 ** attempt))
+    if isinstance(error, CircuitOpenError):
+        delay = max(delay, error.retry_in)
+    response = getattr(error, 'response', None)
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, max_backoff))
+    return delay
+
+
+def run_units(cg, units, commit, max_workers=4, max_attempts=5, backoff=2.0, max_backoff=300.0,
+              checkpoint_every=CHECKPOINT_EVERY, progress=None, progress_every=10.0, priority_class=BACKGROUND):
+    """Run units concurrently and hand the outcomes to commit; return the run report
+
+    Units run as priority_class (background by default). commit(done, failed)
+    is called from the calling thread every checkpoint_every completed units
+    and at the end (also when interrupted), with done a list of (unit, body
+    bytes) and failed a list of (unit, error message). A unit failing with a
+    connection error, a 429 / 5xx status or an open circuit is retried up to
+    max_attempts times after a jittered exponential backoff (at least
+    Retry-After), unless the client already retried that call itself; other
+    errors fail it at once. progress, when given, is called with the report
+    every progress_every seconds.
+    """
+
+    units = list(units)
+    report = {
+        'units': len(units),
+        'done': 0,
+        'failed': 0,
+        'retries': 0,
+        'errors': [],
+        'elapsed': 0.0,
+        'units_per_second': 0.0,
+        'eta_seconds': None,
+    }
+    started = time.monotonic()
+    reported = started
+    done, failed = [], []
+    # (ready at, sequence, unit, attempts so far); the sequence keeps the plan order
+    queue = [(0.0, i, unit, 0) for i, unit in enumerate(units)]
+    sequence = len(units)
+
+    def fetch(unit):
+        with priority(priority_class):
+            return unit.fetch(cg)
+
+    def update():
+        report['elapsed'] = time.monotonic() - started
+        finished = report['done'] + report['failed']
+        report['units_per_second'] = finished / report['elapsed'] if report['elapsed'] else 0.0
+        left = report['units'] - finished
+        report['eta_seconds'] = left / report['units_per_second'] if report['units_per_second'] else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            while queue or futures:
+                now = time.monotonic()
+                # a bounded window of submitted units instead of one future per unit of the plan
+                while queue and queue[0][0] <= now and len(futures) < max_workers * 4:
+                    _, _, unit, attempts = heapq.heappop(queue)
+                    futures[executor.submit(fetch, unit)] = (unit, attempts + 1)
+                timeout = None
+                if queue and len(futures) < max_workers * 4:
+                    timeout = max(0.0, queue[0][0] - now)
+                if not futures:
+                    time.sleep(timeout)
+                    continue
+
+                finished, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    unit, attempts = futures.pop(future)
+                    try:
+                        done.append((unit, future.result()))
+                        report['done'] += 1
+                    except Exception as e:
+                        if attempts < max_attempts and _retryable(e):
+                            report['retries'] += 1
+                            delay = _retry_delay(e, attempts - 1, backoff, max_backoff)
+                            heapq.heappush(queue, (time.monotonic() + delay, sequence, unit, attempts))
+                            sequence += 1
+                            continue
+                        failed.append((unit, str(e)))
+                        report['failed'] += 1
+                        if len(report['errors']) < 10:
+                            report['errors'].append('{0}: {1}'.format(unit.key, e))
+                if len(done) + len(failed) >= checkpoint_every:
+                    commit(done, failed)
+                    done, failed = [], []
+                if progress is not None and time.monotonic() - reported >= progress_every:
+                    reported = time.monotonic()
+                    update()
+                    progress(dict(report))
+    finally:
+        # keep what was completed before an interruption
+        if done or failed:
+            commit(done, failed)
+
+    update()
+    return report
+
+
+class Job:
+    """A resumable backfill: a work plan of units and their results, persisted in a SQLite file
+
+    plan() records units (units already planned are kept as they are) and
+    run() executes those not done yet, committing bodies every
+    CHECKPOINT_EVERY units. A process that dies or a run that ends with
+    failed units loses at most one checkpoint; running the job again
+    resumes with the units still pending or failed.
+
+        job = Job('backfill.sqlite', 'btc-eth-2023')
+        job.plan(market_chart_units('bitcoin,ethereum', 'usd', 1672531200, 1704067200))
+        job.run(cg, max_workers=4)
+        for unit, chart in job.results():
+            ...
+    """
+
+    def __init__(self, path, name='default'):
+        self.path = os.path.expanduser(path)
+        self.name = name
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        # one connection per thread; sqlite3 connections are not shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def plan(self, units):
+        """Add units to the plan; return the number of new units"""
+
+        now = time.time()
+        with self._connection() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                'INSERT OR IGNORE INTO units (job, key, method, params, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(self.name, unit.key, unit.method, json.dumps(unit.params, sort_keys=True), PENDING, now)
+                 for unit in units])
+            return connection.total_changes - before
+
+    def remaining(self):
+        """Return the units not done yet, in plan order"""
+
+        rows = self._connection().execute('SELECT method, params, key FROM units WHERE job = ? AND state != ? '
+                                          'ORDER BY rowid', (self.name, DONE))
+        return [Unit(method, json.loads(params), key) for method, params, key in rows]
+
+    def _commit(self, done, failed):
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                'UPDATE units SET state = ?, body = ?, error = NULL, attempts = attempts + 1, updated_at = ? '
+                'WHERE job = ? AND key = ?',
+                [(DONE, zlib.compress(body), now, self.name, unit.key) for unit, body in done])
+            connection.executemany(
+                'UPDATE units SET state = ?, error = ?, attempts = attempts + 1, updated_at = ? '
+                'WHERE job = ? AND key = ?',
+                [(FAILED, error, now, self.name, unit.key) for unit, error in failed])
+
+    def run(self, cg, **kwargs):
+        """Run the remaining units (see run_units for the options); return the run report"""
+
+        report = run_units(cg, self.remaining(), self._commit, **kwargs)
+        report['status'] = self.status()
+        return report
+
+    def status(self):
+        """Return the number of units of the plan by state"""
+
+        counts = dict(self._connection().execute('SELECT state, COUNT(*) FROM units WHERE job = ? GROUP BY state',
+                                                 (self.name,)).fetchall())
+        status = {state: counts.get(state, 0) for state in (PENDING, DONE, FAILED)}
+        status['units'] = sum(status.values())
+        return status
+
+    def failures(self):
+        """Return {unit key: last error} of the failed units"""
+
+        return dict(self._connection().execute('SELECT key, error FROM units WHERE job = ? AND state = ? '
+                                               'ORDER BY rowid', (self.name, FAILED)).fetchall())
+
+    def results(self):
+        """Yield (unit, decoded response) of the done units, in plan order"""
+
+        rows = self._connection().execute('SELECT method, params, key, body FROM units WHERE job = ? AND state = ? '
+                                          'ORDER BY rowid', (self.name, DONE))
+        for method, params, key, body in rows:
+            yield Unit(method, json.loads(params), key), json.loads(zlib.decompress(body))
@@ -0,0 +1,192 @@
+import threading
+import time
+from contextlib import contextmanager
+
+PRO = 'pro'
+DEMO = 'demo'
+
+# base url and key query param of each key kind
+BASE_URLS = {PRO: 'https://pro-api.coingecko.com/api/v3/', DEMO: 'https://api.coingecko.com/api/v3/'}
+KEY_PARAMS = {PRO: 'x_cg_pro_api_key', DEMO: 'x_cg_demo_api_key'}
+
+# requests per minute assumed until key() reports the plan's limit
+DEFAULT_RATE_LIMITS = {PRO: 500, DEMO: 30}
+
+# seconds a key is skipped after a 429 without Retry-After
+RATE_LIMIT_COOLDOWN = 60.0
+
+
+class ApiKey:
+    """An API key with its rate-limit window and credit usage"""
+
+    __slots__ = ('key', 'kind', 'base_url', 'param', 'rate_limit', 'monthly_credits', 'remaining_credits',
+                 'window_start', 'window_requests', 'requests', 'rate_limited', 'cooldown_until', 'disabled',
+                 'polled_at')
+
+    def __init__(self, key, kind=PRO, rate_limit=None):
+        if kind not in BASE_URLS:
+            raise ValueError('Unknown API key kind {0!r}, expected {1!r} or {2!r}'.format(kind, PRO, DEMO))
+        self.key = key
+        self.kind = kind
+        self.base_url = BASE_URLS[kind]
+        self.param = KEY_PARAMS[kind]
+        self.rate_limit = rate_limit or DEFAULT_RATE_LIMITS[kind]
+        # monthly call credits reported by key(); remaining_credits is counted down locally between polls
+        self.monthly_credits = None
+        self.remaining_credits = None
+        self.window_start = 0.0
+        self.window_requests = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.cooldown_until = 0.0
+        # set on 401 / 403: the key is not used again
+        self.disabled = False
+        self.polled_at = None
+
+    @property
+    def label(self):
+        """Masked key, safe to log"""
+
+        return '{0}:...{1}'.format(self.kind, self.key[-4:])
+
+    def headroom(self, now):
+        """Requests left in the current one-minute window"""
+
+        if now - self.window_start >= 60.0:
+            return self.rate_limit
+        return self.rate_limit - self.window_requests
+
+    def __repr__(self):
+        return 'ApiKey({0})'.format(self.label)
+
+
+class KeyPool:
+    """Pool of pro and demo API keys shared by the calls of a client
+
+    Each request goes to the usable key with the most headroom left in its
+    per-minute rate limit (ties broken by remaining monthly credits). A key
+    answered with 429 is skipped until its Retry-After has passed, and one
+    answered with 401 / 403 is disabled. Rate limits and credits are refreshed
+    from the key() endpoint every poll_interval seconds (None: never).
+
+    keys: ApiKey instances, key strings (pro) or (key, kind) tuples
+    """
+
+    def __init__(self, keys, poll_interval=300.0):
+        self.keys = [self._api_key(key) for key in keys]
+        if not self.keys:
+            raise ValueError('KeyPool needs at least one key')
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pinned = threading.local()
+
+    @staticmethod
+    def _api_key(key):
+        if isinstance(key, ApiKey):
+            return key
+        if isinstance(key, str):
+            return ApiKey(key)
+        return ApiKey(*key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def usable(self, now=None):
+        """Return the keys that are neither disabled, cooling down nor out of credits"""
+
+        now = now if now is not None else time.time()
+        return [k for k in self.keys if not k.disabled and k.cooldown_until <= now and k.remaining_credits != 0]
+
+    def acquire(self):
+        """Pick the key for the next request and count the request against it"""
+
+        pinned = self.pinned_key()
+        now = time.time()
+        with self._lock:
+            if pinned is not None:
+                key = pinned
+            else:
+                candidates = self.usable(now)
+                if candidates:
+                    key = max(candidates, key=lambda k: (k.headroom(now), k.remaining_credits or 0))
+                else:
+                    # every key is limited: use the one that recovers first
+                    enabled = [k for k in self.keys if not k.disabled] or self.keys
+                    key = min(enabled, key=lambda k: k.cooldown_until)
+
+            if now - key.window_start >= 60.0:
+                key.window_start = now
+                key.window_requests = 0
+            key.window_requests += 1
+            key.requests += 1
+            if key.remaining_credits:
+                key.remaining_credits -= 1
+        return key
+
+    def release(self, key, status, retry_after=None):
+        """Record the response status of a request made with key"""
+
+        if status == 429:
+            with self._lock:
+                key.rate_limited += 1
+                key.cooldown_until = time.time() + (retry_after if retry_after is not None else RATE_LIMIT_COOLDOWN)
+        elif status in (401, 403):
+            key.disabled = True
+
+    def pinned_key(self):
+        """Return the key pinned to the current thread, or None"""
+
+        return getattr(self._pinned, 'key', None)
+
+    @contextmanager
+    def pinned(self, key):
+        """Make the requests of the current thread use key"""
+
+        previous = getattr(self._pinned, 'key', None)
+        self._pinned.key = key
+        try:
+            yield key
+        finally:
+            self._pinned.key = previous
+
+    def due(self, now=None):
+        """Return the pro keys whose usage should be polled, marking them as polled"""
+
+        if self.poll_interval is None:
+            return []
+        now = now if now is not None else time.time()
+        with self._lock:
+            keys = [k for k in self.keys if k.kind == PRO and not k.disabled
+                    and (k.polled_at is None or now - k.polled_at >= self.poll_interval)]
+            for key in keys:
+                key.polled_at = now
+        return keys
+
+    def update_usage(self, key, usage):
+        """Update a key from a key() response"""
+
+        with self._lock:
+            key.rate_limit = usage.get('rate_limit_request_per_minute') or key.rate_limit
+            key.monthly_credits = usage.get('monthly_call_credit', key.monthly_credits)
+            key.remaining_credits = usage.get('current_remaining_monthly_calls', key.remaining_credits)
+
+    def snapshot(self):
+        """Return the state and usage of every key, by masked label"""
+
+        now = time.time()
+        with self._lock:
+            return {
+                key.label: {
+                    'kind': key.kind,
+                    'requests': key.requests,
+                    'rate_limited': key.rate_limited,
+                    'rate_limit': key.rate_limit,
+                    'headroom': key.headroom(now),
+                    'monthly_credits': key.monthly_credits,
+                    'remaining_credits': key.remaining_credits,
+                    'cooldown': max(0.0, key.cooldown_until - now),
+                    'disabled': key.disabled,
+                }
+                for key in self.keys
+            }
+
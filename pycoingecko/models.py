@@ -0,0 +1,270 @@
+from array import array
+from collections.abc import Sequence
+
+
+class Record:
+    """Base class for compact __slots__ records built from decoded API dicts
+
+    Subclasses list their attributes in _fields; _paths maps an attribute to the
+    key path it is read from when it is not a top-level key of the same name
+    (e.g. ('market', 'identifier') for nested ticker fields). Top-level keys that
+    are not mapped to an attribute are kept in extra (None when there are none),
+    so converting back with to_dict() does not lose data.
+    """
+
+    __slots__ = ('extra',)
+    _fields = ()
+    _paths = {}
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self._fields):
+            raise TypeError('{0} takes at most {1} positional arguments'.format(type(self).__name__, len(self._fields)))
+        values = dict(zip(self._fields, args))
+        values.update(kwargs)
+        for name in self._fields:
+            setattr(self, name, values.pop(name, None))
+        self.extra = values.pop('extra', None)
+        if values:
+            raise TypeError('Unexpected fields for {0}: {1}'.format(type(self).__name__, ', '.join(values)))
+
+    @classmethod
+    def _consumed_keys(cls):
+        """Return the top-level dict keys read by from_dict"""
+
+        keys = cls.__dict__.get('_consumed')
+        if keys is None:
+            keys = frozenset(cls._paths.get(name, (name,))[0] for name in cls._fields)
+            cls._consumed = keys
+        return keys
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a decoded JSON object"""
+
+        record = cls.__new__(cls)
+        for name in cls._fields:
+            path = cls._paths.get(name)
+            if path is None:
+                value = data.get(name)
+            else:
+                value = data
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+            setattr(record, name, value)
+
+        consumed = cls._consumed_keys()
+        extra = {k: v for k, v in data.items() if k not in consumed}
+        record.extra = extra or None
+
+        return record
+
+    def to_dict(self):
+        """Return the record as a dict shaped like the original API object"""
+
+        data = {}
+        for name in self._fields:
+            value = getattr(self, name)
+            path = self._paths.get(name, (name,))
+            target = data
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        if self.extra:
+            data.update(self.extra)
+
+        return data
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields + ('extra',))
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__, ', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name)) for name in self._fields))
+
+
+class MarketRow(Record):
+    """Row of /coins/markets"""
+
+    _fields = ('id', 'symbol', 'name', 'image', 'current_price', 'market_cap', 'market_cap_rank',
+               'fully_diluted_valuation', 'total_volume', 'high_24h', 'low_24h', 'price_change_24h',
+               'price_change_percentage_24h', 'market_cap_change_24h', 'market_cap_change_percentage_24h',
+               'circulating_supply', 'total_supply', 'max_supply', 'ath', 'ath_change_percentage', 'ath_date',
+               'atl', 'atl_change_percentage', 'atl_date', 'roi', 'last_updated')
+    __slots__ = _fields
+
+
+class Ticker(Record):
+    """Ticker of /coins/{id}/tickers and /exchanges/{id}/tickers (nested objects flattened)"""
+
+    _fields = ('base', 'target', 'market_name', 'market_identifier', 'has_trading_incentive', 'last', 'volume',
+               'converted_last_btc', 'converted_last_eth', 'converted_last_usd',
+               'converted_volume_btc', 'converted_volume_eth', 'converted_volume_usd',
+               'trust_score', 'bid_ask_spread_percentage', 'timestamp', 'last_traded_at', 'last_fetch_at',
+               'is_anomaly', 'is_stale', 'trade_url', 'token_info_url', 'coin_id', 'target_coin_id')
+    __slots__ = _fields
+    _paths = {
+        'market_name': ('market', 'name'),
+        'market_identifier': ('market', 'identifier'),
+        'has_trading_incentive': ('market', 'has_trading_incentive'),
+        'converted_last_btc': ('converted_last', 'btc'),
+        'converted_last_eth': ('converted_last', 'eth'),
+        'converted_last_usd': ('converted_last', 'usd'),
+        'converted_volume_btc': ('converted_volume', 'btc'),
+        'converted_volume_eth': ('converted_volume', 'eth'),
+        'converted_volume_usd': ('converted_volume', 'usd'),
+    }
+
+
+class Exchange(Record):
+    """Exchange of /exchanges"""
+
+    _fields = ('id', 'name', 'year_established', 'country', 'description', 'url', 'image',
+               'has_trading_incentive', 'trust_score', 'trust_score_rank',
+               'trade_volume_24h_btc', 'trade_volume_24h_btc_normalized')
+    __slots__ = _fields
+
+
+class Candle(Record):
+    """OHLC candle of /coins/{id}/ohlc ([timestamp, open, high, low, close])"""
+
+    _fields = ('timestamp', 'open', 'high', 'low', 'close')
+    __slots__ = _fields
+
+    @classmethod
+    def from_list(cls, values):
+        """Build a candle from a [timestamp, open, high, low, close] list"""
+
+        return cls(*values)
+
+    def to_list(self):
+        """Return the candle as a [timestamp, open, high, low, close] list"""
+
+        return [self.timestamp, self.open, self.high, self.low, self.close]
+
+
+class RecordList(Sequence):
+    """List of records converted lazily from decoded JSON objects
+
+    Items are converted on first access and the source dict is replaced by the
+    record, so memory shrinks as the list is consumed; materialize() converts
+    everything up front.
+    """
+
+    __slots__ = ('_items', '_cls', '_pending')
+
+    def __init__(self, items, cls):
+        self._items = list(items)
+        self._cls = cls
+        self._pending = len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _convert(self, index):
+        item = self._items[index]
+        if not isinstance(item, self._cls):
+            item = self._cls.from_dict(item)
+            self._items[index] = item
+            self._pending -= 1
+        return item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._convert(i) for i in range(*index.indices(len(self._items)))]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError('RecordList index out of range')
+        return self._convert(index)
+
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self._convert(i)
+
+    def materialize(self):
+        """Convert every remaining item and return self"""
+
+        if self._pending:
+            for i in range(len(self._items)):
+                self._convert(i)
+        return self
+
+    def to_dicts(self):
+        """Return the items as plain dicts"""
+
+        return [item.to_dict() if isinstance(item, self._cls) else item for item in self._items]
+
+    def __repr__(self):
+        return 'RecordList({0}, {1} items)'.format(self._cls.__name__, len(self._items))
+
+
+class CandleTable(Sequence):
+    """Array-backed OHLC candles (one typed array per column)"""
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close')
+
+    def __init__(self, timestamp=(), open=(), high=(), low=(), close=()):
+        self.timestamp = array('q', timestamp)
+        self.open = array('d', open)
+        self.high = array('d', high)
+        self.low = array('d', low)
+        self.close = array('d', close)
+
+    @classmethod
+    def from_ohlc(cls, candles):
+        """Build a table from a /coins/{id}/ohlc response"""
+
+        table = cls()
+        for t, o, h, l, c in candles:
+            table.append(t, o, h, l, c)
+        return table
+
+    def append(self, timestamp, open, high, low, close):
+        """Append one candle"""
+
+        self.timestamp.append(int(timestamp))
+        self.open.append(open)
+        self.high.append(high)
+        self.low.append(low)
+        self.close.append(close)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Candle(self.timestamp[index], self.open[index], self.high[index], self.low[index], self.close[index])
+
+    def to_ohlc(self):
+        """Return the candles as [timestamp, open, high, low, close] lists"""
+
+        return [list(row) for row in zip(self.timestamp, self.open, self.high, self.low, self.close)]
+
+
+def markets(rows):
+    """Wrap a /coins/markets response as a lazily converted list of MarketRow"""
+
+    return RecordList(rows, MarketRow)
+
+
+def tickers(response):
+    """Wrap the tickers of a /coins/{id}/tickers or /exchanges/{id}/tickers response as a list of Ticker"""
+
+    if isinstance(response, dict):
+        response = response.get('tickers', [])
+    return RecordList(response, Ticker)
+
+
+def exchanges(rows):
+    """Wrap a /exchanges response as a lazily converted list of Exchange"""
+
+    return RecordList(rows, Exchange)
+
+
+def candles(ohlc):
+    """Convert a /coins/{id}/ohlc response into an array-backed CandleTable"""
+
+    return CandleTable.from_ohlc(ohlc)
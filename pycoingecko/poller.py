@@ -0,0 +1,200 @@
+import itertools
+import threading
+import time
+
+from .scheduler import BACKGROUND, priority
+
+# coin ids per merged /simple/price request
+MAX_IDS_PER_REQUEST = 200
+
+
+def _split(values):
+    if isinstance(values, str):
+        values = values.split(',')
+    return frozenset(v.strip().lower() for v in values if v and v.strip())
+
+
+class Subscription:
+    """Coins and vs_currencies a client watches"""
+
+    __slots__ = ('id', 'ids', 'vs_currencies', 'touched')
+
+    def __init__(self, subscription_id, ids, vs_currencies):
+        self.id = subscription_id
+        self.ids = ids
+        self.vs_currencies = vs_currencies
+        self.touched = time.time()
+
+    def select(self, values):
+        """Keep the values of the subscribed vs_currencies (e.g. usd, usd_24h_change) and last_updated_at"""
+
+        return {key: value for key, value in values.items()
+                if key == 'last_updated_at' or key.split('_', 1)[0] in self.vs_currencies}
+
+
+class PricePoller:
+    """Shared /simple/price poller for any number of subscriptions
+
+    Every interval seconds one merged request (per MAX_IDS_PER_REQUEST ids)
+    fetches the union of the subscribed coins and vs_currencies as background
+    priority, so the upstream cost grows with the distinct coins watched, not
+    with the subscribers. changes() blocks until a subscribed coin changes;
+    listeners (see add_listener) are called instead for waiters that must not
+    hold a thread, such as coroutines.
+    The polling thread starts with the first subscription and stops once none
+    is left; subscriptions not read for ttl seconds expire.
+    """
+
+    def __init__(self, cg, interval=30.0, ttl=300.0, chunk_size=MAX_IDS_PER_REQUEST):
+        self.cg = cg
+        self.interval = interval
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self.version = 0
+        self.polls = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_poll = None
+        self._subscriptions = {}
+        self._prices = {}
+        # coin id -> version of its last change
+        self._versions = {}
+        self._counter = itertools.count(1)
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._listeners = set()
+
+    def subscribe(self, ids, vs_currencies='usd'):
+        """Register interest in ids x vs_currencies (lists or comma-separated strings); return the subscription id"""
+
+        ids = _split(ids)
+        vs_currencies = _split(vs_currencies)
+        if not ids or not vs_currencies:
+            raise ValueError('A subscription needs at least one coin id and one vs_currency')
+
+        with self._condition:
+            subscription = Subscription('sub-{0}'.format(next(self._counter)), ids, vs_currencies)
+            self._subscriptions[subscription.id] = subscription
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='coingecko-price-poller', daemon=True)
+                self._thread.start()
+        # fetch the new coins now instead of at the next interval
+        self._wake.set()
+        return subscription.id
+
+    def unsubscribe(self, subscription_id):
+        """Drop a subscription; return whether it existed"""
+
+        with self._condition:
+            return self._subscriptions.pop(subscription_id, None) is not None
+
+    def add_listener(self, callback):
+        """Call callback() from the polling thread whenever a poll changes a price"""
+
+        with self._condition:
+            self._listeners.add(callback)
+
+    def remove_listener(self, callback):
+        with self._condition:
+            self._listeners.discard(callback)
+
+    def _union(self):
+        ids = set()
+        vs_currencies = set()
+        for subscription in self._subscriptions.values():
+            ids |= subscription.ids
+            vs_currencies |= subscription.vs_currencies
+        return sorted(ids), sorted(vs_currencies)
+
+    def poll(self):
+        """Fetch the subscribed prices once and wake the waiting subscribers; return the number of changed coins"""
+
+        with self._condition:
+            ids, vs_currencies = self._union()
+        if not ids:
+            return 0
+
+        prices = {}
+        with priority(BACKGROUND):
+            for start in range(0, len(ids), self.chunk_size):
+                prices.update(self.cg.get_price(ids=ids[start:start + self.chunk_size], vs_currencies=vs_currencies,
+                                                include_24hr_change=True, include_last_updated_at=True))
+                self.requests += 1
+
+        with self._condition:
+            self.polls += 1
+            self.last_poll = time.time()
+            changed = [coin for coin, values in prices.items() if self._prices.get(coin) != values]
+            if changed:
+                self.version += 1
+                for coin in changed:
+                    self._prices[coin] = prices[coin]
+                    self._versions[coin] = self.version
+                self._condition.notify_all()
+            listeners = list(self._listeners) if changed else []
+        for listener in listeners:
+            listener()
+        return len(changed)
+
+    def changes(self, subscription_id, since=0, timeout=0.0):
+        """Return the subscribed prices changed after version since, waiting up to timeout seconds for one
+
+        Pass the returned 'version' as since next time; since=0 returns every
+        known price of the subscription.
+        """
+
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                subscription = self._subscriptions.get(subscription_id)
+                if subscription is None:
+                    raise KeyError('Unknown or expired subscription {0!r}'.format(subscription_id))
+                subscription.touched = time.time()
+
+                changed = [coin for coin in subscription.ids if self._versions.get(coin, 0) > since]
+                remaining = deadline - time.monotonic()
+                if changed or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            return {
+                'subscription': subscription_id,
+                'version': self.version,
+                'prices': {coin: subscription.select(self._prices[coin]) for coin in sorted(changed)},
+            }
+
+    def _expire(self, now):
+        for subscription_id, subscription in list(self._subscriptions.items()):
+            if now - subscription.touched > self.ttl:
+                del self._subscriptions[subscription_id]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._expire(time.time())
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                self.errors += 1
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def snapshot(self):
+        """Return the subscription and polling counters"""
+
+        with self._condition:
+            ids, vs_currencies = self._union()
+            return {
+                'subscriptions': len(self._subscriptions),
+                'ids': len(ids),
+                'vs_currencies': vs_currencies,
+                'version': self.version,
+                'polls': self.polls,
+                'requests': self.requests,
+                'errors': self.errors,
+                'last_poll': self.last_poll,
+            }
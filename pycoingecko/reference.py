@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+
+from .scheduler import BACKGROUND, priority
+
+# dataset name -> CoinGeckoAPI method returning it
+DATASETS = {
+    'vs_currencies': 'get_supported_vs_currencies',
+    'asset_platforms': 'get_asset_platforms',
+    'categories': 'get_coins_categories_list',
+    'exchanges': 'get_exchanges_id_name_list',
+    'derivatives_exchanges': 'get_derivatives_exchanges_list',
+    'indexes': 'get_indexes_list',
+}
+
+DEFAULT_PAGE_SIZE = 500
+
+
+class ReferenceData:
+    """Slowly changing reference lists held in memory
+
+    Each dataset is fetched on its first read (or by preload()) and kept for
+    ttl seconds. Past that, reads keep returning the held list while a
+    background-priority refresh runs in a thread, so only the first read of a
+    dataset waits for the network (at the reader's priority).
+    """
+
+    def __init__(self, cg, ttl=6 * 3600.0, page_size=DEFAULT_PAGE_SIZE, datasets=None):
+        self.cg = cg
+        self.ttl = ttl
+        self.page_size = page_size
+        self.datasets = datasets if datasets is not None else DATASETS
+        # name -> (items tuple, fetched_at)
+        self._data = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _method(self, name):
+        try:
+            return getattr(self.cg, self.datasets[name])
+        except KeyError:
+            raise ValueError('Unknown reference dataset {0!r}; available: {1}'.format(
+                name, ', '.join(sorted(self.datasets))))
+
+    def refresh(self, name):
+        """Fetch a dataset now (at the caller's priority) and return its items"""
+
+        method = self._method(name)
+        try:
+            items = tuple(method())
+            with self._lock:
+                self._data[name] = (items, time.time())
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+        return items
+
+    def preload(self):
+        """Fetch every dataset not loaded yet; return the names that failed"""
+
+        failed = []
+        for name in self.datasets:
+            if name not in self._data:
+                try:
+                    self.refresh(name)
+                except Exception:
+                    failed.append(name)
+        return failed
+
+    def get(self, name):
+        """Return the items of a dataset, loading it on first use"""
+
+        self._method(name)
+        with self._lock:
+            entry = self._data.get(name)
+            stale = entry is not None and time.time() - entry[1] > self.ttl and name not in self._refreshing
+            if stale:
+                self._refreshing.add(name)
+        if entry is None:
+            return self.refresh(name)
+        if stale:
+            threading.Thread(target=self._refresh_quietly, args=(name,), name='coingecko-reference-refresh',
+                             daemon=True).start()
+        return entry[0]
+
+    def _refresh_quietly(self, name):
+        try:
+            with priority(BACKGROUND):
+                self.refresh(name)
+        except Exception:
+            # the held list keeps being served; the next stale read retries
+            pass
+
+    def page(self, name, page=1, page_size=None):
+        """Return one page (from 1) of a dataset with its paging information"""
+
+        items = self.get(name)
+        page_size = page_size or self.page_size
+        pages = max(1, math.ceil(len(items) / page_size))
+        if page < 1 or page > pages:
+            raise ValueError('Page {0} out of range 1..{1} for {2!r}'.format(page, pages, name))
+        with self._lock:
+            fetched_at = self._data[name][1]
+
+        return {
+            'dataset': name,
+            'page': page,
+            'pages': pages,
+            'page_size': page_size,
+            'total': len(items),
+            'fetched_at': fetched_at,
+            'items': list(items[(page - 1) * page_size:page * page_size]),
+        }
+
+    def index(self):
+        """Return the datasets with their size and load time (None when not loaded yet)"""
+
+        with self._lock:
+            return {
+                name: {
+                    'total': len(self._data[name][0]) if name in self._data else None,
+                    'pages': max(1, math.ceil(len(self._data[name][0]) / self.page_size)) if name in self._data
+                    else None,
+                    'fetched_at': self._data[name][1] if name in self._data else None,
+                }
+                for name in sorted(self.datasets)
+            }
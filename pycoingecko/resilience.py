@@ -0,0 +1,254 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# HTTP statuses worth retrying on an idempotent GET
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value, now=None):
+    """Return the delay (seconds) requested by a Retry-After header value, or None"""
+
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - (now if now is not None else time.time()))
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of the requests made
+
+    Every request deposits ratio tokens and every retry spends one, so while
+    the API is failing the client makes about ratio retries per request
+    instead of multiplying its load; capacity tokens are available up front
+    for clients that make few requests.
+    """
+
+    def __init__(self, ratio=0.2, capacity=10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def deposit(self):
+        """Record a request"""
+
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Spend a token for a retry; return False when the budget is exhausted"""
+
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a request
+
+    retries: maximum retries per call
+    backoff: base of the exponential backoff; the n-th retry waits a uniformly
+             random time up to min(max_backoff, backoff * 2 ** n) ("full jitter")
+    deadline: no retry is started once the call has run this many seconds
+    statuses: response statuses that are retried; a Retry-After header (429 /
+              503) sets the minimum wait, capped at max_backoff
+    budget: RetryBudget shared by every call of the client (None: unlimited)
+    """
+
+    def __init__(self, retries=5, backoff=0.5, max_backoff=30.0, deadline=60.0, statuses=RETRY_STATUSES,
+                 budget=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def delay(self, retry, retry_after=None):
+        """Return the seconds to wait before the given retry (0-based)"""
+
+        delay = random.uniform(0.0, min(self.max_backoff, self.backoff * 2 ** retry))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def can_retry(self, retry, started, delay):
+        """Return True if the retry count and the deadline of a call started at started allow another retry
+
+        The budget is checked separately, so that retries denied by it can be counted.
+        """
+
+        if retry >= self.retries:
+            return False
+        return self.deadline is None or time.perf_counter() - started + delay <= self.deadline
+
+
+class HedgePolicy:
+    """When to send a duplicate of a slow request
+
+    A hedge is fired once a request has been outstanding longer than the
+    quantile (e.g. p95) of the endpoint's recent upstream latencies, bounded
+    by min_delay and max_delay; the first response wins. Endpoints with fewer
+    than min_samples measured requests are not hedged.
+    """
+
+    def __init__(self, quantile=95, min_delay=0.05, max_delay=10.0, min_samples=20, max_workers=16):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+    def delay(self, stats, endpoint):
+        """Return the seconds after which to hedge a request to endpoint, or None to not hedge"""
+
+        latency = stats.latency_percentile(endpoint, self.quantile, min_samples=self.min_samples)
+        if latency is None:
+            return None
+        return min(self.max_delay, max(self.min_delay, latency))
+
+
+# circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint family whose circuit breaker is open"""
+
+    def __init__(self, family, retry_in):
+        super().__init__('Circuit open for {0} endpoints, retry in {1:.1f}s'.format(family, retry_in))
+        self.family = family
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Circuit breaker of one endpoint family
+
+    Closed: calls go through; failure_threshold consecutive failures (errors,
+    5xx responses, or upstream requests slower than slow_call_duration) open
+    the circuit. The client records each upstream attempt of a call, so
+    retry waits do not count as slow requests.
+    Open: calls are rejected for reset_timeout seconds, then the circuit is
+    half-open. Half-open: up to half_open_probes calls are let through; a
+    success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, slow_call_duration=10.0, reset_timeout=30.0, half_open_probes=1):
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_in(self):
+        """Return the seconds until an open circuit lets a probe through"""
+
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self):
+        """Return True if a call may be made now; every allowed call must be followed by at least one record()"""
+
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, duration):
+        """Record the outcome of an upstream request of an allowed call"""
+
+        failed = not ok or (self.slow_call_duration is not None and duration > self.slow_call_duration)
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            if not failed:
+                self._failures = 0
+                # a call that started before the circuit opened does not close it
+                if state != OPEN:
+                    self._state = CLOSED
+                return
+            self._failures += 1
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by endpoint family (simple, coins, exchanges, nfts, ...), created on first use
+
+    Keyword arguments are passed to every CircuitBreaker.
+    """
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, family):
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(family)
+                if breaker is None:
+                    breaker = self._breakers[family] = CircuitBreaker(**self.settings)
+        return breaker
+
+    def snapshot(self):
+        """Return the state and counters of every breaker"""
+
+        with self._lock:
+            breakers = sorted(self._breakers.items())
+        return {family: breaker.snapshot() for family, breaker in breakers}
@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# priority class of the calls made in the current thread / asyncio task
+_priority = ContextVar('coingecko_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def priority(name):
+    """Run the CoinGeckoAPI calls made inside the block with the given priority class
+
+    The class is kept in a context variable: threads started inside the block
+    (e.g. a ThreadPoolExecutor) do not inherit it and must enter it themselves.
+    """
+
+    token = _priority.set(name)
+    try:
+        yield name
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """Return the priority class of the calls made in the current context"""
+
+    return _priority.get()
+
+
+class PriorityClass:
+    """A priority class of the RequestScheduler
+
+    rank: lower ranks are admitted first
+    max_concurrency: upstream requests of the class in flight at once
+    share: fraction of the scheduler's rate the class may use (1: all of it)
+    """
+
+    def __init__(self, name, rank, max_concurrency, share=1.0):
+        self.name = name
+        self.rank = rank
+        self.max_concurrency = max_concurrency
+        self.share = share
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.tokens = 0.0
+
+    def snapshot(self):
+        return {
+            'rank': self.rank,
+            'max_concurrency': self.max_concurrency,
+            'share': self.share,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'wait_seconds': self.wait_seconds,
+            'max_wait_seconds': self.max_wait_seconds,
+        }
+
+
+def default_classes():
+    """Interactive calls first; background calls capped at 4 in flight and 30% of the rate"""
+
+    return [PriorityClass(INTERACTIVE, 0, 16), PriorityClass(BACKGROUND, 1, 4, share=0.3)]
+
+
+class RequestScheduler:
+    """Admits upstream requests by priority class under a shared rate budget
+
+    rate: requests per second shared by every class (None: no rate limit,
+          only concurrency caps and priority order); burst: bucket size
+    classes: PriorityClass list (default: interactive and background)
+
+    A request waits until its class is below max_concurrency, no waiting
+    request of a higher priority class can be admitted, and a token of the
+    shared bucket (and of the class's own bucket when share < 1) is
+    available. Since background requests use at most share of the rate and
+    never hold interactive slots, an interactive request waits at most about
+    1 / (rate * (1 - share)) seconds for a token, however large the backlog.
+    """
+
+    def __init__(self, rate=None, burst=None, classes=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 0.0)
+        self.classes = {c.name: c for c in (classes if classes is not None else default_classes())}
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        for cls in self.classes.values():
+            cls.tokens = self._class_burst(cls)
+        self._condition = threading.Condition()
+
+    def _class_burst(self, cls):
+        return max(1.0, self.burst * cls.share)
+
+    def _refill(self, now):
+        if self.rate is None:
+            return
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        for cls in self.classes.values():
+            if cls.share < 1.0:
+                cls.tokens = min(self._class_burst(cls), cls.tokens + elapsed * self.rate * cls.share)
+
+    def _admit_delay(self, cls):
+        # 0 to admit now, seconds until the next token, or None to wait for a release
+        if cls.in_flight >= cls.max_concurrency:
+            return None
+        for other in self.classes.values():
+            if other.rank < cls.rank and other.waiting and other.in_flight < other.max_concurrency:
+                return None
+        if self.rate is None:
+            return 0.0
+        delay = max(0.0, (1.0 - self._tokens) / self.rate)
+        if cls.share < 1.0:
+            delay = max(delay, (1.0 - cls.tokens) / (self.rate * cls.share))
+        return delay
+
+    def acquire(self, name=None):
+        """Block until a request of the class (default: current_priority()) may be sent; return the seconds waited"""
+
+        cls = self.classes.get(name or current_priority())
+        if cls is None:
+            raise ValueError('Unknown priority class {0!r}, expected one of {1}'.format(
+                name or current_priority(), ', '.join(sorted(self.classes))))
+
+        start = time.monotonic()
+        with self._condition:
+            cls.waiting += 1
+            try:
+                while True:
+                    self._refill(time.monotonic())
+                    delay = self._admit_delay(cls)
+                    if delay == 0.0:
+                        break
+                    self._condition.wait(delay)
+            finally:
+                cls.waiting -= 1
+
+            if self.rate is not None:
+                self._tokens -= 1.0
+                if cls.share < 1.0:
+                    cls.tokens -= 1.0
+            cls.in_flight += 1
+            cls.admitted += 1
+            waited = time.monotonic() - start
+            cls.wait_seconds += waited
+            cls.max_wait_seconds = max(cls.max_wait_seconds, waited)
+            # lower priority waiters re-check once this one is admitted
+            self._condition.notify_all()
+
+        return waited
+
+    def release(self, name=None):
+        """Mark a request admitted by acquire() as finished"""
+
+        cls = self.classes[name or current_priority()]
+        with self._condition:
+            cls.in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, name=None):
+        """Hold an admission for the duration of the block; yields the seconds waited"""
+
+        name = name or current_priority()
+        waited = self.acquire(name)
+        try:
+            yield waited
+        finally:
+            self.release(name)
+
+    def snapshot(self):
+        """Return the state and counters of every priority class"""
+
+        with self._condition:
+            return {name: cls.snapshot() for name, cls in sorted(self.classes.items())}
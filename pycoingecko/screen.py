@@ -0,0 +1,227 @@
+import operator
+import re
+import threading
+import time
+from array import array
+
+from .convert import MARKET_MONEY_FIELDS
+from .utils import NAN, iter_pages, to_float
+
+# numeric /coins/markets fields kept as columns of the table
+MARKET_COLUMNS = (
+    'current_price',
+    'market_cap',
+    'market_cap_rank',
+    'fully_diluted_valuation',
+    'total_volume',
+    'high_24h',
+    'low_24h',
+    'price_change_24h',
+    'price_change_percentage_24h',
+    'market_cap_change_24h',
+    'market_cap_change_percentage_24h',
+    'circulating_supply',
+    'total_supply',
+    'max_supply',
+    'ath',
+    'ath_change_percentage',
+    'atl',
+    'atl_change_percentage',
+)
+
+# columns computed from other columns once the table is built
+DERIVED_COLUMNS = ('volume_to_market_cap',)
+
+MAX_PER_PAGE = 250
+
+_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_FILTER_RE = re.compile(r'^\s*([a-z0-9_]+)\s*(<=|>=|==|!=|<|>)\s*([-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)\s*$')
+
+
+class MarketTable:
+    """Columnar table of /coins/markets rows (one array of doubles per numeric field)"""
+
+    def __init__(self, ids, symbols, names, columns, fetched_at=None):
+        self.ids = ids
+        self.symbols = symbols
+        self.names = names
+        self.columns = columns
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a table from decoded /coins/markets rows"""
+
+        ids = [row.get('id') for row in rows]
+        symbols = [row.get('symbol') for row in rows]
+        names = [row.get('name') for row in rows]
+        columns = {}
+        for name in MARKET_COLUMNS:
+            columns[name] = array('d', [to_float(row.get(name)) for row in rows])
+
+        # volume / market cap ratio (NaN when market cap is unknown or zero)
+        columns['volume_to_market_cap'] = array('d', [
+            v / m if m else NAN for v, m in zip(columns['total_volume'], columns['market_cap'])])
+
+        return cls(ids, symbols, names, columns)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, name):
+        """Return the array of a numeric column"""
+
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise ValueError('Unknown column {0!r}; available: {1}'.format(name, ', '.join(sorted(self.columns))))
+
+    def converted(self, factor):
+        """Return a table with the money columns multiplied by factor (other columns are shared)"""
+
+        columns = dict(self.columns)
+        for name in MARKET_MONEY_FIELDS:
+            columns[name] = array('d', [v * factor for v in self.columns[name]])
+        return MarketTable(self.ids, self.symbols, self.names, columns, self.fetched_at)
+
+    def row(self, index, fields=None):
+        """Return the row at index as a dict (NaN values are returned as None)"""
+
+        row = {'id': self.ids[index], 'symbol': self.symbols[index], 'name': self.names[index]}
+        for name in (fields or self.columns):
+            value = self.column(name)[index]
+            row[name] = None if value != value else value
+        return row
+
+
+def parse_filter(expression):
+    """Parse a filter expression such as 'market_cap >= 1e9' into (column, operator, value)"""
+
+    match = _FILTER_RE.match(expression)
+    if match is None:
+        raise ValueError('Invalid filter expression {0!r}; expected "<column> <op> <number>"'.format(expression))
+    name, op, value = match.groups()
+
+    return name, _OPERATORS[op], float(value)
+
+
+def parse_filters(filters):
+    """Parse a comma-separated string (or list) of filter expressions"""
+
+    if not filters:
+        return []
+    if isinstance(filters, str):
+        filters = filters.split(',')
+
+    return [parse_filter(f) for f in filters if f.strip()]
+
+
+def screen(table, filters=None, sort=None, limit=None, fields=None):
+    """Return the rows of table matching every filter, sorted and capped to limit
+
+    Each filter is a pass over the row indices left by the previous one,
+    reading one column array. sort is a column name, prefixed with '-' for
+    descending order. Rows with a missing (NaN) value never match a filter on
+    that column and sort last.
+    """
+
+    indices = range(len(table))
+    for name, op, value in parse_filters(filters):
+        col = table.column(name)
+        # NaN compares False against everything, so missing values drop out here
+        indices = [i for i in indices if op(col[i], value)]
+
+    if sort:
+        descending = sort.startswith('-')
+        col = table.column(sort.lstrip('-+'))
+        present = [i for i in indices if col[i] == col[i]]
+        missing = [i for i in indices if col[i] != col[i]]
+        present.sort(key=col.__getitem__, reverse=descending)
+        indices = present + missing
+
+    indices = list(indices)
+    total = len(indices)
+    if limit is not None:
+        indices = indices[:limit]
+
+    return {'total': total, 'rows': [table.row(i, fields) for i in indices]}
+
+
+def iter_market_pages(cg, vs_currency='usd', per_page=MAX_PER_PAGE, max_pages=None, max_workers=8, **kwargs):
+    """Yield the row lists of /coins/markets pages in order, fetched in waves (see utils.iter_pages)"""
+
+    return iter_pages(lambda page: cg.get_coins_markets(vs_currency, per_page=per_page, page=page, **kwargs), per_page,
+                      max_pages=max_pages, max_workers=max_workers)
+
+
+def fetch_markets(cg, vs_currency='usd', per_page=MAX_PER_PAGE, max_pages=None, max_workers=8, **kwargs):
+    """Download all /coins/markets pages concurrently and return them as a MarketTable"""
+
+    rows = []
+    for page in iter_market_pages(cg, vs_currency, per_page=per_page, max_pages=max_pages, max_workers=max_workers,
+                                  **kwargs):
+        rows.extend(page)
+    return MarketTable.from_rows(rows)
+
+
+class MarketScreener:
+    """Keeps a full-market table per vs_currency and screens it, refetching once older than ttl seconds
+
+    With a convert.CurrencyConverter, only the base_currency table is fetched
+    and the tables of other currencies are converted from it.
+    """
+
+    def __init__(self, cg, ttl=60, max_workers=8, converter=None, base_currency='usd'):
+        self.cg = cg
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.converter = converter
+        self.base_currency = base_currency
+        self._tables = {}
+        # vs_currency -> lock held while its table is rebuilt
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _table_lock(self, vs_currency):
+        with self._lock:
+            return self._locks.setdefault(vs_currency, threading.Lock())
+
+    def table(self, vs_currency='usd'):
+        """Return the (possibly cached) market table for vs_currency
+
+        Concurrent callers needing a refresh wait for the one rebuilding it and share its table.
+        """
+
+        vs_currency = vs_currency.lower()
+        if self.converter is not None and vs_currency != self.base_currency:
+            base = self.table(self.base_currency)
+            table = self._tables.get(vs_currency)
+            if table is None or table.fetched_at != base.fetched_at:
+                with self._table_lock(vs_currency):
+                    table = self._tables.get(vs_currency)
+                    if table is None or table.fetched_at != base.fetched_at:
+                        table = base.converted(self.converter.factor(self.base_currency, vs_currency))
+                        self._tables[vs_currency] = table
+            return table
+
+        table = self._tables.get(vs_currency)
+        if table is None or time.time() - table.fetched_at > self.ttl:
+            with self._table_lock(vs_currency):
+                table = self._tables.get(vs_currency)
+                if table is None or time.time() - table.fetched_at > self.ttl:
+                    table = fetch_markets(self.cg, vs_currency, max_workers=self.max_workers)
+                    self._tables[vs_currency] = table
+        return table
+
+    def screen(self, filters=None, sort=None, limit=None, fields=None, vs_currency='usd'):
+        """Screen the full market for vs_currency"""
+
+        return screen(self.table(vs_currency), filters=filters, sort=sort, limit=limit, fields=fields)
@@ -0,0 +1,150 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+# relative change of a field reported as a change event (0.01: 1%)
+DEFAULT_THRESHOLDS = {
+    'current_price': 0.01,
+    'market_cap': 0.01,
+    'total_volume': 0.10,
+}
+
+# event types
+ADDED = 'added'
+REMOVED = 'removed'
+RANK = 'rank'
+FIELD = 'field'
+
+
+def _rank(value):
+    return None if value != value else int(value)
+
+
+def diff_tables(previous, current, thresholds=None, rank_threshold=1):
+    """Return the change events between two screen.MarketTable snapshots
+
+    added / removed: coins entering or leaving the listing
+    rank: market_cap_rank moved by at least rank_threshold places
+    field: a thresholds field changed by at least its relative threshold
+    Every event carries the time of the current snapshot.
+    """
+
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    at = current.fetched_at
+    events = []
+
+    previous_index = {coin_id: i for i, coin_id in enumerate(previous.ids)}
+    previous_rank = previous.column('market_cap_rank')
+    current_rank = current.column('market_cap_rank')
+    fields = [(name, threshold, previous.column(name), current.column(name)) for name, threshold in thresholds.items()]
+
+    seen = set()
+    for i, coin_id in enumerate(current.ids):
+        j = previous_index.get(coin_id)
+        if j is None:
+            events.append({'type': ADDED, 'id': coin_id, 'time': at, 'symbol': current.symbols[i],
+                           'name': current.names[i], 'rank': _rank(current_rank[i])})
+            continue
+        seen.add(coin_id)
+
+        old, new = previous_rank[j], current_rank[i]
+        if old != new and old == old and new == new and abs(new - old) >= rank_threshold:
+            events.append({'type': RANK, 'id': coin_id, 'time': at, 'from': int(old), 'to': int(new)})
+
+        for name, threshold, before, after in fields:
+            old, new = before[j], after[i]
+            # NaN never compares true, so missing values produce no event
+            if old != new and old == old and new == new and (not old or abs(new - old) >= threshold * abs(old)):
+                events.append({'type': FIELD, 'id': coin_id, 'time': at, 'field': name, 'from': old, 'to': new,
+                               'change': (new - old) / old if old else None})
+
+    if len(seen) == len(previous_index):
+        return events
+    for j, coin_id in enumerate(previous.ids):
+        if coin_id not in seen:
+            events.append({'type': REMOVED, 'id': coin_id, 'time': at, 'symbol': previous.symbols[j],
+                           'name': previous.names[j], 'rank': _rank(previous_rank[j])})
+
+    return events
+
+
+class MarketChangeTracker:
+    """Keeps the latest full-market snapshot and a bounded log of the changes between snapshots
+
+    source: callable returning a screen.MarketTable (e.g. MarketScreener.table
+            or lambda: fetch_markets(cg)); a table already seen is not diffed again
+    The first snapshot is the baseline and produces no events. At most
+    max_events events are kept; older ones are dropped.
+    """
+
+    def __init__(self, source, thresholds=None, rank_threshold=1, max_events=10000):
+        self.source = source
+        self.thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+        self.rank_threshold = rank_threshold
+        self._table = None
+        self._events = deque(maxlen=max_events)
+        self._times = deque(maxlen=max_events)
+        # time of the newest dropped event: changes before it are incomplete
+        self._dropped_until = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot_time(self):
+        """Time of the latest snapshot, or None before the first update()"""
+
+        return self._table.fetched_at if self._table is not None else None
+
+    def update(self):
+        """Take a snapshot from source and return the new change events"""
+
+        table = self.source()
+        with self._lock:
+            previous = self._table
+            if table is previous:
+                return []
+            self._table = table
+            if previous is None:
+                return []
+
+            events = diff_tables(previous, table, self.thresholds, self.rank_threshold)
+            for event in events:
+                if len(self._events) == self._events.maxlen:
+                    self._dropped_until = self._times[0]
+                self._events.append(event)
+                self._times.append(event['time'])
+        return events
+
+    def changes_since(self, since=0.0, types=None, ids=None, limit=None):
+        """Return the events newer than since (a time.time() timestamp)
+
+        'until' is the time of the latest snapshot, to pass as since next time;
+        'complete' is False when events newer than since have been dropped.
+        """
+
+        with self._lock:
+            start = bisect.bisect_right(self._times, since) if self._times else 0
+            events = [self._events[i] for i in range(start, len(self._events))]
+            complete = self._dropped_until is None or since >= self._dropped_until
+            until = self.snapshot_time
+
+        if types:
+            events = [e for e in events if e['type'] in types]
+        if ids:
+            events = [e for e in events if e['id'] in ids]
+        total = len(events)
+        if limit is not None:
+            events = events[:limit]
+
+        return {'since': since, 'until': until, 'complete': complete, 'total': total, 'events': events}
+
+    def stream(self, interval=60.0, stop=None):
+        """Yield change events as they appear, updating every interval seconds until stop (an Event) is set"""
+
+        while stop is None or not stop.is_set():
+            for event in self.update():
+                yield event
+            if stop is not None:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
@@ -0,0 +1,376 @@
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from .endpoints import ENDPOINTS
+
+# path templates of the endpoints wrapped by CoinGeckoAPI (relative to the api base url)
+ENDPOINT_TEMPLATES = tuple(sorted({endpoint.template for endpoint in ENDPOINTS}))
+
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# phases of an upstream request; queue is the wait for the request scheduler (summed over retries),
+# connect includes DNS resolution
+PHASES = ('queue', 'connect', 'tls', 'ttfb', 'download', 'decode')
+
+# number of recent latencies kept per endpoint for percentiles
+RECENT_SAMPLES = 512
+
+
+def _compile_templates(templates):
+    # templates with fewer placeholders first, so literal paths such as
+    # coins/list win over coins/{id}
+    compiled = []
+    for template in sorted(templates, key=lambda t: t.count('{')):
+        pattern = '[^/]+'.join(re.escape(part) for part in re.split(r'\{[a-z_]+\}', template))
+        compiled.append((re.compile('^{0}$'.format(pattern)), template))
+    return compiled
+
+
+_COMPILED_TEMPLATES = _compile_templates(ENDPOINT_TEMPLATES)
+
+
+def endpoint_template(url, base_url=''):
+    """Return the endpoint template of a request url (e.g. coins/{id}/market_chart)"""
+
+    path = url[len(base_url):] if base_url and url.startswith(base_url) else url
+    path = path.strip('/')
+    for pattern, template in _COMPILED_TEMPLATES:
+        if pattern.match(path):
+            return template
+
+    return path
+
+
+# connection setup times of the request running in the current thread, filled
+# in by the instrumented connections of pycoingecko.transport
+_connection_timings = threading.local()
+
+
+def reset_connection_timings():
+    """Clear the connection setup times recorded for the current thread"""
+
+    _connection_timings.connect = 0.0
+    _connection_timings.tls = 0.0
+
+
+def add_connection_timing(phase, seconds):
+    """Add time spent in a connection setup phase (connect or tls) for the current thread"""
+
+    setattr(_connection_timings, phase, getattr(_connection_timings, phase, 0.0) + seconds)
+
+
+def connection_timings():
+    """Return (connect, tls) seconds recorded for the current thread since the last reset"""
+
+    return getattr(_connection_timings, 'connect', 0.0), getattr(_connection_timings, 'tls', 0.0)
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of values (nearest rank), or None if empty"""
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered), int(math.ceil(q / 100.0 * len(ordered)))) - 1)
+    return ordered[index]
+
+
+class RequestSample:
+    """Measurements of a single CoinGeckoAPI call, aggregated by ClientStats.finish()"""
+
+    __slots__ = ('endpoint', 'start', 'status', 'cache', 'retries', 'retries_denied', 'hedged', 'hedge_won', 'rejected',
+                 'error', 'compressed_bytes', 'decompressed_bytes', 'encoding') + PHASES
+
+    # fields describing one upstream attempt, see copy_attempt()
+    _ATTEMPT_FIELDS = ('status', 'compressed_bytes', 'decompressed_bytes', 'encoding', 'connect', 'tls', 'ttfb',
+                       'download')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.status = None
+        # 'hit' (fresh, no request), 'revalidated' (304), 'miss', or 'stale' (served
+        # while the circuit breaker is open); None without a cache
+        self.cache = None
+        self.retries = 0
+        # retries not made because the retry budget was exhausted
+        self.retries_denied = 0
+        # a duplicate request was sent after the hedge delay, and its response was used
+        self.hedged = False
+        self.hedge_won = False
+        # the circuit breaker did not let the call through
+        self.rejected = False
+        self.error = None
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.encoding = None
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    def copy_attempt(self, other):
+        """Take the status, bytes and phase times of the attempt measured by other"""
+
+        for name in self._ATTEMPT_FIELDS:
+            setattr(self, name, getattr(other, name))
+
+
+class EndpointStats:
+    """Aggregated counters of one endpoint template"""
+
+    __slots__ = ('calls', 'upstream_requests', 'statuses', 'errors', 'retries', 'retries_denied', 'hedges',
+                 'hedge_wins', 'cache_hits', 'cache_revalidated', 'cache_misses', 'cache_stale', 'compressed_bytes',
+                 'decompressed_bytes', 'encodings', 'phases', 'latency_buckets', 'latency_sum', 'recent')
+
+    def __init__(self):
+        self.calls = 0
+        self.upstream_requests = 0
+        self.statuses = {}
+        self.errors = {}
+        self.retries = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+        self.cache_misses = 0
+        self.cache_stale = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.encodings = {}
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, sample, elapsed):
+        self.calls += 1
+        upstream = sample.cache != 'hit' and not sample.rejected
+        if upstream:
+            self.upstream_requests += 1
+        if sample.status is not None:
+            self.statuses[sample.status] = self.statuses.get(sample.status, 0) + 1
+        if sample.error is not None:
+            self.errors[sample.error] = self.errors.get(sample.error, 0) + 1
+        self.retries += sample.retries
+        self.retries_denied += sample.retries_denied
+        self.hedges += sample.hedged
+        self.hedge_wins += sample.hedge_won
+        if sample.cache == 'hit':
+            self.cache_hits += 1
+        elif sample.cache == 'revalidated':
+            self.cache_revalidated += 1
+        elif sample.cache == 'miss':
+            self.cache_misses += 1
+        elif sample.cache == 'stale':
+            self.cache_stale += 1
+        if sample.compressed_bytes or sample.decompressed_bytes:
+            self.compressed_bytes += sample.compressed_bytes
+            self.decompressed_bytes += sample.decompressed_bytes
+            encoding = sample.encoding or 'identity'
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+        for phase in PHASES:
+            self.phases[phase] += getattr(sample, phase)
+
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and elapsed > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        self.latency_buckets[bucket] += 1
+        self.latency_sum += elapsed
+        # cache hits and rejected calls do not say anything about upstream latency
+        if upstream:
+            self.recent.append(elapsed)
+
+    def snapshot(self):
+        cache_lookups = self.cache_hits + self.cache_revalidated + self.cache_misses + self.cache_stale
+        recent = list(self.recent)
+        return {
+            'calls': self.calls,
+            'upstream_requests': self.upstream_requests,
+            'statuses': dict(self.statuses),
+            'errors': dict(self.errors),
+            'retries': self.retries,
+            'retries_denied': self.retries_denied,
+            'hedges': {'fired': self.hedges, 'won': self.hedge_wins},
+            'cache': {
+                'hits': self.cache_hits,
+                'revalidated': self.cache_revalidated,
+                'misses': self.cache_misses,
+                'stale': self.cache_stale,
+                'hit_rate': (self.cache_hits + self.cache_revalidated) / cache_lookups if cache_lookups else None,
+            },
+            'bytes': {
+                'compressed': self.compressed_bytes,
+                'decompressed': self.decompressed_bytes,
+                'compression_ratio': (self.decompressed_bytes / self.compressed_bytes
+                                      if self.compressed_bytes else None),
+                'encodings': dict(self.encodings),
+            },
+            'latency': {
+                'sum': self.latency_sum,
+                'p50': percentile(recent, 50),
+                'p95': percentile(recent, 95),
+                'p99': percentile(recent, 99),
+                'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], self.latency_buckets)),
+            },
+            'phases': dict(self.phases),
+        }
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ClientStats:
+    """In-process per-endpoint request statistics of a CoinGeckoAPI client"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        # pycoingecko.resilience.CircuitBreakers, pycoingecko.keys.KeyPool and
+        # pycoingecko.scheduler.RequestScheduler reported with the statistics, set by CoinGeckoAPI
+        self.circuits = None
+        self.key_pool = None
+        self.scheduler = None
+
+    def sample(self, endpoint):
+        """Start measuring a call to endpoint"""
+
+        return RequestSample(endpoint)
+
+    def finish(self, sample):
+        """Aggregate a finished sample"""
+
+        elapsed = time.perf_counter() - sample.start
+        with self._lock:
+            stats = self._endpoints.get(sample.endpoint)
+            if stats is None:
+                stats = self._endpoints[sample.endpoint] = EndpointStats()
+            stats.add(sample, elapsed)
+
+    def latency_percentile(self, endpoint, q, min_samples=1):
+        """Return the q-th percentile of recent upstream latencies of endpoint (seconds)
+
+        None when fewer than min_samples latencies were recorded.
+        """
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            recent = list(stats.recent) if stats is not None else []
+        if len(recent) < max(1, min_samples):
+            return None
+        return percentile(recent, q)
+
+    def snapshot(self):
+        """Return the statistics of every endpoint as plain dicts"""
+
+        with self._lock:
+            return {endpoint: stats.snapshot() for endpoint, stats in self._endpoints.items()}
+
+    def circuit_snapshot(self):
+        """Return the state and counters of the circuit breaker of every endpoint family"""
+
+        return self.circuits.snapshot() if self.circuits is not None else {}
+
+    def key_snapshot(self):
+        """Return the state and usage of every pooled API key, by masked label"""
+
+        return self.key_pool.snapshot() if self.key_pool is not None else {}
+
+    def scheduler_snapshot(self):
+        """Return the state and counters of every request scheduler priority class"""
+
+        return self.scheduler.snapshot() if self.scheduler is not None else {}
+
+    def reset(self):
+        """Clear all statistics"""
+
+        with self._lock:
+            self._endpoints.clear()
+
+    def prometheus(self, prefix='coingecko'):
+        """Return the statistics in the Prometheus text exposition format"""
+
+        circuits = sorted(self.circuit_snapshot().items())
+        keys = sorted(self.key_snapshot().items())
+        priorities = sorted(self.scheduler_snapshot().items())
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def metric(name, kind, help_text, samples):
+                lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help_text))
+                lines.append('# TYPE {0}_{1} {2}'.format(prefix, name, kind))
+                for suffix, labels, value in samples:
+                    label_text = ','.join('{0}="{1}"'.format(k, _label(v)) for k, v in labels)
+                    lines.append('{0}_{1}{2}{{{3}}} {4}'.format(prefix, name, suffix, label_text, value))
+
+            metric('calls_total', 'counter', 'Client calls, including cache hits',
+                   [('', [('endpoint', e)], s.calls) for e, s in endpoints])
+            metric('requests_total', 'counter', 'Upstream requests by HTTP status',
+                   [('', [('endpoint', e), ('status', code)], n)
+                    for e, s in endpoints for code, n in sorted(s.statuses.items())])
+            metric('errors_total', 'counter', 'Failed calls by exception type',
+                   [('', [('endpoint', e), ('type', t)], n) for e, s in endpoints for t, n in sorted(s.errors.items())])
+            metric('retries_total', 'counter', 'Retried upstream requests',
+                   [('', [('endpoint', e)], s.retries) for e, s in endpoints])
+            metric('retries_denied_total', 'counter', 'Retries not made because the retry budget was exhausted',
+                   [('', [('endpoint', e)], s.retries_denied) for e, s in endpoints])
+            metric('hedges_total', 'counter', 'Hedged (duplicate) requests fired and won',
+                   [('', [('endpoint', e), ('result', r)], n) for e, s in endpoints
+                    for r, n in (('fired', s.hedges), ('won', s.hedge_wins))])
+            metric('cache_lookups_total', 'counter', 'Response cache lookups by result',
+                   [('', [('endpoint', e), ('result', r)], n) for e, s in endpoints
+                    for r, n in (('hit', s.cache_hits), ('revalidated', s.cache_revalidated), ('miss', s.cache_misses),
+                                 ('stale', s.cache_stale))])
+            metric('response_bytes_total', 'counter', 'Response body bytes on the wire and decoded',
+                   [('', [('endpoint', e), ('kind', k)], n) for e, s in endpoints
+                    for k, n in (('compressed', s.compressed_bytes), ('decompressed', s.decompressed_bytes))])
+            metric('request_phase_seconds_total', 'counter', 'Time spent per request phase',
+                   [('', [('endpoint', e), ('phase', p)], repr(s.phases[p])) for e, s in endpoints for p in PHASES])
+
+            samples = []
+            for e, s in endpoints:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, s.latency_buckets):
+                    cumulative += count
+                    samples.append(('_bucket', [('endpoint', e), ('le', bound)], cumulative))
+                samples.append(('_bucket', [('endpoint', e), ('le', '+Inf')], s.calls))
+                samples.append(('_sum', [('endpoint', e)], repr(s.latency_sum)))
+                samples.append(('_count', [('endpoint', e)], s.calls))
+            metric('call_duration_seconds', 'histogram', 'Client call latency', samples)
+
+            if circuits:
+                metric('circuit_state', 'gauge', 'Circuit breaker state per endpoint family (1 for the current state)',
+                       [('', [('family', f), ('state', state)], int(c['state'] == state)) for f, c in circuits
+                        for state in ('closed', 'open', 'half_open')])
+                metric('circuit_opened_total', 'counter', 'Times the circuit breaker opened',
+                       [('', [('family', f)], c['opened']) for f, c in circuits])
+                metric('circuit_rejected_total', 'counter', 'Calls rejected while the circuit breaker was open',
+                       [('', [('family', f)], c['rejected']) for f, c in circuits])
+
+            if keys:
+                metric('api_key_requests_total', 'counter', 'Upstream requests per pooled API key',
+                       [('', [('key', k)], u['requests']) for k, u in keys])
+                metric('api_key_rate_limited_total', 'counter', '429 responses per pooled API key',
+                       [('', [('key', k)], u['rate_limited']) for k, u in keys])
+                metric('api_key_headroom', 'gauge', 'Requests left in the current minute per pooled API key',
+                       [('', [('key', k)], u['headroom']) for k, u in keys])
+                metric('api_key_remaining_credits', 'gauge', 'Remaining monthly credits per pooled API key',
+                       [('', [('key', k)], u['remaining_credits']) for k, u in keys
+                        if u['remaining_credits'] is not None])
+
+            if priorities:
+                metric('scheduler_in_flight', 'gauge', 'Upstream requests in flight per priority class',
+                       [('', [('priority', p)], c['in_flight']) for p, c in priorities])
+                metric('scheduler_waiting', 'gauge', 'Requests waiting for admission per priority class',
+                       [('', [('priority', p)], c['waiting']) for p, c in priorities])
+                metric('scheduler_admitted_total', 'counter', 'Requests admitted per priority class',
+                       [('', [('priority', p)], c['admitted']) for p, c in priorities])
+                metric('scheduler_wait_seconds_total', 'counter', 'Time spent waiting for admission per priority class',
+                       [('', [('priority', p)], repr(c['wait_seconds'])) for p, c in priorities])
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,158 @@
+import math
+import statistics
+from array import array
+
+from .utils import iter_pages, to_float
+
+# tickers per page of /coins/{id}/tickers
+TICKERS_PER_PAGE = 100
+
+# flag bits of TickerTable.flags
+STALE = 1
+ANOMALY = 2
+
+
+def iter_ticker_pages(cg, coin_id, max_pages=None, max_workers=4, **kwargs):
+    """Yield the ticker lists of /coins/{id}/tickers pages in order, fetched in waves (see utils.iter_pages)"""
+
+    return iter_pages(lambda page: cg.get_coin_ticker_by_id(coin_id, page=page, **kwargs).get('tickers', []),
+                      TICKERS_PER_PAGE, max_pages=max_pages, max_workers=max_workers)
+
+
+class TickerTable:
+    """Columnar table of tickers: USD last price, USD volume and spread as arrays of doubles"""
+
+    def __init__(self):
+        self.exchanges = []
+        self.exchange_names = []
+        self.bases = []
+        self.targets = []
+        self.trust_scores = []
+        self.last_usd = array('d')
+        self.volume_usd = array('d')
+        self.spread = array('d')
+        # STALE / ANOMALY bits
+        self.flags = array('B')
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Build a table from an iterable of ticker lists"""
+
+        table = cls()
+        for tickers in pages:
+            table.extend(tickers)
+        return table
+
+    def extend(self, tickers):
+        """Append decoded ticker dicts"""
+
+        for ticker in tickers:
+            market = ticker.get('market') or {}
+            self.exchanges.append(market.get('identifier'))
+            self.exchange_names.append(market.get('name'))
+            self.bases.append(ticker.get('base'))
+            self.targets.append(ticker.get('target'))
+            self.trust_scores.append(ticker.get('trust_score'))
+            self.last_usd.append(to_float((ticker.get('converted_last') or {}).get('usd')))
+            self.volume_usd.append(to_float((ticker.get('converted_volume') or {}).get('usd')))
+            self.spread.append(to_float(ticker.get('bid_ask_spread_percentage')))
+            self.flags.append((STALE if ticker.get('is_stale') else 0) | (ANOMALY if ticker.get('is_anomaly') else 0))
+
+    def __len__(self):
+        return len(self.exchanges)
+
+    def venue(self, index):
+        """Return the exchange, pair and figures of the ticker at index"""
+
+        spread = self.spread[index]
+        return {
+            'exchange': self.exchanges[index],
+            'name': self.exchange_names[index],
+            'pair': '{0}/{1}'.format(self.bases[index], self.targets[index]),
+            'last_usd': self.last_usd[index],
+            'volume_usd': self.volume_usd[index],
+            'spread_percentage': None if math.isnan(spread) else spread,
+            'trust_score': self.trust_scores[index],
+        }
+
+
+def summarize(table, targets=None, min_volume_usd=10000.0, top=10):
+    """Return cross-exchange statistics of a TickerTable
+
+    Stale and anomalous tickers and those without a USD price or volume are
+    left out (targets, e.g. ['USD', 'USDT'], restricts the quote currencies).
+    Best venues are chosen among tickers with at least min_volume_usd of
+    volume, preferring green trust scores when there are any.
+    """
+
+    targets = {t.upper() for t in targets} if targets else None
+    eligible = [i for i in range(len(table))
+                if not table.flags[i] and table.volume_usd[i] > 0 and table.last_usd[i] > 0
+                and (targets is None or (table.targets[i] or '').upper() in targets)]
+
+    summary = {
+        'tickers': len(table),
+        'eligible_tickers': len(eligible),
+        'excluded': {
+            'stale': sum(1 for f in table.flags if f & STALE),
+            'anomaly': sum(1 for f in table.flags if f & ANOMALY),
+        },
+    }
+    if not eligible:
+        summary.update({'vwap_usd': None, 'total_volume_usd': 0.0, 'exchanges': 0})
+        return summary
+
+    volume = table.volume_usd
+    last = table.last_usd
+    total_volume = math.fsum(volume[i] for i in eligible)
+    vwap = math.fsum(last[i] * volume[i] for i in eligible) / total_volume
+
+    by_exchange = {}
+    for i in eligible:
+        entry = by_exchange.get(table.exchanges[i])
+        if entry is None:
+            entry = by_exchange[table.exchanges[i]] = {'exchange': table.exchanges[i], 'name': table.exchange_names[i],
+                                                       'volume_usd': 0.0, 'tickers': 0}
+        entry['volume_usd'] += volume[i]
+        entry['tickers'] += 1
+    shares = sorted(by_exchange.values(), key=lambda e: e['volume_usd'], reverse=True)
+    for entry in shares:
+        entry['share'] = entry['volume_usd'] / total_volume
+
+    spreads = [table.spread[i] for i in eligible if not math.isnan(table.spread[i])]
+    spread_volume = math.fsum(volume[i] for i in eligible if not math.isnan(table.spread[i]))
+
+    liquid = [i for i in eligible if volume[i] >= min_volume_usd]
+    trusted = [i for i in liquid if table.trust_scores[i] == 'green']
+    venues = trusted or liquid
+    prices = [last[i] for i in liquid]
+
+    summary.update({
+        'exchanges': len(by_exchange),
+        'vwap_usd': vwap,
+        'total_volume_usd': total_volume,
+        'best_venue': table.venue(max(venues, key=volume.__getitem__)) if venues else None,
+        'best_buy': table.venue(min(venues, key=last.__getitem__)) if venues else None,
+        'best_sell': table.venue(max(venues, key=last.__getitem__)) if venues else None,
+        'price_dispersion_percentage': (max(prices) - min(prices)) / vwap * 100 if prices else None,
+        'spread_percentage': {
+            'min': min(spreads),
+            'median': statistics.median(spreads),
+            'max': max(spreads),
+            'volume_weighted': math.fsum(table.spread[i] * volume[i] for i in eligible
+                                         if not math.isnan(table.spread[i])) / spread_volume,
+        } if spreads and spread_volume else None,
+        'volume_share': shares[:top],
+    })
+    return summary
+
+
+def aggregate_tickers(cg, coin_id, targets=None, min_volume_usd=10000.0, top=10, max_pages=None, max_workers=4,
+                      **kwargs):
+    """Fetch every ticker page of a coin and return the summary() of all of them"""
+
+    table = TickerTable.from_pages(iter_ticker_pages(cg, coin_id, max_pages=max_pages, max_workers=max_workers,
+                                                     **kwargs))
+    summary = summarize(table, targets=targets, min_volume_usd=min_volume_usd, top=top)
+    summary['id'] = coin_id
+    return summary
@@ -0,0 +1,382 @@
+import inspect
+from typing import Optional
+
+from .endpoints import ENDPOINTS_BY_NAME
+from .resilience import CircuitOpenError
+
+REQUIRED = inspect.Parameter.empty
+
+# items kept of each list in a tool result (see budget())
+DEFAULT_MAX_ITEMS = 500
+
+
+class Param:
+    """A tool parameter: name, annotation, description and default (REQUIRED when none)
+
+    Parameters left to None are not sent, so the API applies its own default.
+    """
+
+    __slots__ = ('name', 'annotation', 'description', 'default')
+
+    def __init__(self, name, annotation, description, default=REQUIRED):
+        self.name = name
+        self.annotation = annotation
+        self.description = description
+        self.default = default
+
+
+class Tool:
+    """Declarative description of an MCP tool calling one CoinGeckoAPI method
+
+    name: tool name (kept stable for clients, may differ from the method)
+    method: CoinGeckoAPI method name, i.e. an endpoints.ENDPOINTS entry
+    max_items: items kept of each list of the result (None: no limit)
+    series: lists are time series, evenly downsampled rather than cut
+    passthrough: the upstream body is returned as is, never decoded; for
+                 tools whose results the API already keeps small (no budget)
+    """
+
+    __slots__ = ('name', 'method', 'description', 'params', 'max_items', 'series', 'passthrough')
+
+    def __init__(self, name, method, description, params=(), max_items=DEFAULT_MAX_ITEMS, series=False,
+                 passthrough=False):
+        self.name = name
+        self.method = method
+        self.description = description
+        self.params = tuple(params)
+        self.max_items = max_items
+        self.series = series
+        self.passthrough = passthrough
+
+    def __repr__(self):
+        return 'Tool({0!r}, {1!r})'.format(self.name, self.method)
+
+    @property
+    def endpoint(self):
+        return ENDPOINTS_BY_NAME[self.method]
+
+    @property
+    def doc(self):
+        """Tool description with an Args section, as written for the hand-written tools"""
+
+        if not self.params:
+            return self.description
+        args = '\n'.join('    {0}: {1}'.format(p.name, p.description) for p in self.params)
+        return '{0}\n\nArgs:\n{1}'.format(self.description, args)
+
+    def signature(self):
+        """Keyword-only signature from which the tool's input schema is built"""
+
+        parameters = [inspect.Parameter(p.name, inspect.Parameter.KEYWORD_ONLY, default=p.default,
+                                        annotation=p.annotation) for p in self.params]
+        return inspect.Signature(parameters, return_annotation=dict)
+
+    def call(self, cg, arguments):
+        """Call the tool's method with the arguments that are not None"""
+
+        return getattr(cg, self.method)(**{k: v for k, v in arguments.items() if v is not None})
+
+
+def _downsample(values, size):
+    # size evenly spaced items, first and last included
+    step = (len(values) - 1) / (size - 1) if size > 1 else 0
+    return [values[round(i * step)] for i in range(size)]
+
+
+def budget(result, max_items, series=False):
+    """Limit the lists of a result (top level and one level down) to max_items
+
+    Return (result, {key: original length}) where key is '' for a top-level
+    list; the result is copied only when something is cut.
+    """
+
+    if max_items is None:
+        return result, {}
+    limit = _downsample if series else (lambda values, size: values[:size])
+
+    if isinstance(result, list):
+        if len(result) <= max_items:
+            return result, {}
+        return limit(result, max_items), {'': len(result)}
+
+    truncated = {}
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if isinstance(value, list) and len(value) > max_items:
+                truncated[key] = len(value)
+        if truncated:
+            result = {key: limit(value, max_items) if key in truncated else value for key, value in result.items()}
+    return result, truncated
+
+
+def error_result(e):
+    """Tool error payload: the message, plus the HTTP status or the circuit's retry delay when known"""
+
+    error = {'success': False, 'error': str(e)}
+    if isinstance(e, CircuitOpenError):
+        error['retry_in'] = e.retry_in
+    status = getattr(getattr(e, 'response', None), 'status_code', None)
+    if status is not None:
+        error['status'] = status
+    return error
+
+
+def run_tool(cg, tool, arguments):
+    """Call a tool and shape its result: {'success': True, 'data': ...} or error_result()
+
+    'truncated' lists the original length of the lists cut by budget(). A
+    passthrough tool returns the envelope already serialized, as a str built
+    around the upstream (or cached) body.
+    """
+
+    try:
+        if tool.passthrough:
+            return '{"success": true, "data": ' + tool.call(cg.raw, arguments).decode('utf-8') + '}'
+        result = tool.call(cg, arguments)
+    except Exception as e:
+        return error_result(e)
+
+    result, truncated = budget(result, tool.max_items, tool.series)
+    response = {'success': True, 'data': result}
+    if truncated:
+        response['truncated'] = truncated
+    return response
+
+
+# ---------- PARAMETERS ----------#
+ID = Param('id', str, 'The coin id (e.g. bitcoin)')
+VS_CURRENCY = Param('vs_currency', str, 'The target currency of market data (usd, eur, jpy, etc.)')
+DAYS = Param('days', str, 'Data up to number of days ago (1/7/14/30/90/180/365/max)')
+FROM_TIMESTAMP = Param('from_timestamp', int, 'From date in UNIX Timestamp (eg. 1392577232)')
+TO_TIMESTAMP = Param('to_timestamp', int, 'To date in UNIX Timestamp (eg. 1422577232)')
+CONTRACT_ADDRESS = Param('contract_address', str, 'The token contract address')
+ASSET_PLATFORM_ID = Param('asset_platform_id', str, 'The asset platform id (e.g. ethereum)')
+EXCHANGE_ID = Param('id', str, 'The exchange id (e.g. binance)')
+NFT_ID = Param('id', str, 'The NFT collection id (e.g. pudgy-penguins)')
+PER_PAGE = Param('per_page', Optional[int], 'Number of results per page', None)
+PAGE = Param('page', Optional[int], 'Page number', None)
+ORDER = Param('order', Optional[str], 'Sort order of the results', None)
+INCLUDE_TICKERS = Param('include_tickers', Optional[str], 'Include tickers: all, unexpired or none', None)
+
+
+TOOLS = (
+    # ---------- PING ----------#
+    Tool('ping', 'ping', 'Check API server status', passthrough=True),
+
+    # ---------- SIMPLE ----------#
+    Tool('get_price', 'get_price',
+         'Get the current price of any cryptocurrencies in any other supported currencies that you need.', (
+             Param('ids', str, 'The ids of the cryptocurrencies to get prices for (comma-separated)'),
+             Param('vs_currencies', str, 'The target currencies to get prices in (comma-separated)'),
+             Param('include_market_cap', Optional[bool], 'Include market cap', None),
+             Param('include_24hr_vol', Optional[bool], 'Include 24h volume', None),
+             Param('include_24hr_change', Optional[bool], 'Include 24h change', None),
+             Param('include_last_updated_at', Optional[bool], 'Include last updated time', None),
+         ), passthrough=True),
+    Tool('get_token_price', 'get_token_price',
+         'Get the current price of any tokens on this coin (ETH only at this stage) in any other supported '
+         'currencies.', (
+             Param('id', str, 'The platform id (e.g., ethereum)'),
+             Param('contract_addresses', str, 'The token contract addresses (comma-separated)'),
+             Param('vs_currencies', str, 'The target currencies to get prices in (comma-separated)'),
+         ), passthrough=True),
+    Tool('get_supported_vs_currencies', 'get_supported_vs_currencies', 'Get list of supported_vs_currencies',
+         passthrough=True),
+
+    # ---------- COINS ----------#
+    Tool('get_coins', 'get_coins_markets', 'List all supported coins with detailed information.', (
+        Param('vs_currency', str, 'The target currency of market data (usd, eur, jpy, etc.)', 'usd'),
+        Param('order', str, 'Sort results by: market_cap_desc, market_cap_asc, volume_desc, volume_asc, id_desc, '
+                            'id_asc', 'market_cap_desc'),
+        Param('per_page', int, 'Number of results per page (1-250)', 10),
+        Param('page', int, 'Page number', 1),
+        Param('sparkline', bool, 'Include sparkline 7 days data', False),
+        Param('ids', Optional[str], 'Only these coin ids (comma-separated)', None),
+        Param('category', Optional[str], 'Only coins of this category id', None),
+        Param('price_change_percentage', Optional[str], 'Include price change percentages for these timeframes '
+                                                        '(comma-separated: 1h, 24h, 7d, 14d, 30d, 200d, 1y)', None),
+    ), passthrough=True),
+    Tool('get_coins_list', 'get_coins_list',
+         'List all supported coins id, name and symbol (the first 500; prefer search for lookups).', (
+             Param('include_platform', Optional[bool], 'Include platform contract addresses', None),
+         )),
+    Tool('get_coins_list_new', 'get_coins_list_new', 'List the latest 200 coins listed on CoinGecko', passthrough=True),
+    Tool('get_coin_top_gainers_losers', 'get_coin_top_gainers_losers', 'Get the top 30 coins with the largest '
+         'price gain and loss by a specific time duration', (
+             VS_CURRENCY,
+             Param('duration', Optional[str], 'Time range: 1h, 24h, 7d, 14d, 30d, 60d or 1y', None),
+             Param('top_coins', Optional[str], 'Filter by market cap ranking: 300, 500, 1000 or all', None),
+         ), passthrough=True),
+    Tool('get_coin_by_id', 'get_coin_by_id', 'Get current data (name, price, market, etc.) for a coin.', (
+        ID,
+        Param('localization', bool, 'Include all localized languages in response', True),
+        Param('tickers', bool, 'Include ticker data', True),
+        Param('market_data', bool, 'Include market data', True),
+        Param('community_data', bool, 'Include community data', True),
+        Param('developer_data', bool, 'Include developer data', True),
+        Param('sparkline', bool, 'Include sparkline 7 days data', False),
+    ), passthrough=True),
+    Tool('get_coin_ticker_by_id', 'get_coin_ticker_by_id', 'Get coin tickers (paginated to 100 items)', (
+        ID,
+        Param('exchange_ids', Optional[str], 'Only tickers of these exchange ids (comma-separated)', None),
+        PAGE,
+        Param('order', Optional[str], 'Sort by: trust_score_desc, trust_score_asc, volume_desc or volume_asc',
+              None),
+        Param('depth', Optional[bool], 'Include 2% orderbook depth', None),
+    ), passthrough=True),
+    Tool('get_coin_history_by_id', 'get_coin_history_by_id',
+         'Get historical data (name, price, market, stats) at a given date for a coin', (
+             ID,
+             Param('date', str, 'The date of data snapshot in dd-mm-yyyy'),
+             Param('localization', Optional[bool], 'Include all localized languages in response', None),
+         ), passthrough=True),
+    Tool('get_coin_market_chart_by_id', 'get_coin_market_chart_by_id',
+         'Get historical market data include price, market cap, and 24h volume.', (
+             ID, VS_CURRENCY, DAYS,
+             Param('interval', Optional[str], 'Data interval (daily); automatic when empty', None),
+         ), series=True),
+    Tool('get_coin_market_chart_range_by_id', 'get_coin_market_chart_range_by_id',
+         'Get historical market data include price, market cap, and 24h volume within a range of timestamp.',
+         (ID, VS_CURRENCY, FROM_TIMESTAMP, TO_TIMESTAMP), series=True),
+    Tool('get_coin_ohlc_by_id', 'get_coin_ohlc_by_id', "Get coin's OHLC ([time, open, high, low, close] candles)",
+         (ID, VS_CURRENCY, DAYS), series=True),
+    Tool('get_coin_ohlc_by_id_range', 'get_coin_ohlc_by_id_range',
+         "Get coin's OHLC within a range of timestamp", (
+             ID, VS_CURRENCY, FROM_TIMESTAMP, TO_TIMESTAMP,
+             Param('interval', str, 'Candle interval: daily or hourly'),
+         ), series=True),
+    Tool('get_coin_circulating_supply_chart', 'get_coin_circulating_supply_chart',
+         "Get coin's circulating supply chart", (ID, DAYS), series=True),
+    Tool('get_coin_circulating_supply_chart_range', 'get_coin_circulating_supply_chart_range',
+         "Get coin's circulating supply chart within a range of timestamp", (ID, FROM_TIMESTAMP, TO_TIMESTAMP),
+         series=True),
+    Tool('get_coin_total_supply_chart', 'get_coin_total_supply_chart', "Get coin's total supply chart",
+         (ID, DAYS), series=True),
+    Tool('get_coin_total_supply_chart_range', 'get_coin_total_supply_chart_range',
+         "Get coin's total supply chart within a range of timestamp", (ID, FROM_TIMESTAMP, TO_TIMESTAMP),
+         series=True),
+
+    # ---------- CONTRACT ----------#
+    Tool('get_coin_info_from_contract_address_by_id', 'get_coin_info_from_contract_address_by_id',
+         'Get coin info from contract address', (
+             Param('id', str, 'The asset platform id (e.g. ethereum)'), CONTRACT_ADDRESS,
+         ), passthrough=True),
+    Tool('get_coin_market_chart_from_contract_address_by_id', 'get_coin_market_chart_from_contract_address_by_id',
+         'Get historical market data include price, market cap, and 24h volume from a contract address', (
+             Param('id', str, 'The asset platform id (e.g. ethereum)'), CONTRACT_ADDRESS, VS_CURRENCY, DAYS,
+         ), series=True),
+    Tool('get_coin_market_chart_range_from_contract_address_by_id',
+         'get_coin_market_chart_range_from_contract_address_by_id',
+         'Get historical market data include price, market cap, and 24h volume within a range of timestamp from '
+         'a contract address', (
+             Param('id', str, 'The asset platform id (e.g. ethereum)'), CONTRACT_ADDRESS, VS_CURRENCY,
+             FROM_TIMESTAMP, TO_TIMESTAMP,
+         ), series=True),
+
+    # ---------- ASSET PLATFORMS ----------#
+    Tool('get_asset_platforms', 'get_asset_platforms', 'List all asset platforms (Blockchain networks)', (
+        Param('filter', Optional[str], 'Apply relevant filters to results (nft)', None),
+    )),
+    Tool('get_asset_platform_by_id', 'get_asset_platform_by_id',
+         'Get the token list of an asset platform (the first 500 tokens)', (ASSET_PLATFORM_ID,)),
+
+    # ---------- CATEGORIES ----------#
+    Tool('get_coins_categories_list', 'get_coins_categories_list', 'List all categories'),
+    Tool('get_coins_categories', 'get_coins_categories', 'List all categories with market data', (
+        Param('order', Optional[str], 'Sort by: market_cap_desc, market_cap_asc, name_desc, name_asc, '
+                                      'market_cap_change_24h_desc or market_cap_change_24h_asc', None),
+    )),
+
+    # ---------- EXCHANGES ----------#
+    Tool('get_exchanges', 'get_exchanges_list', 'List all exchanges.', (
+        Param('per_page', int, 'Number of results per page', 100),
+        Param('page', int, 'Page number', 1),
+    ), passthrough=True),
+    Tool('get_exchanges_id_name_list', 'get_exchanges_id_name_list', 'List all supported markets id and name'),
+    Tool('get_exchange_by_id', 'get_exchanges_by_id', 'Get exchange volume in BTC and tickers.', (EXCHANGE_ID,),
+         passthrough=True),
+    Tool('get_exchange_tickers_by_id', 'get_exchanges_tickers_by_id',
+         'Get exchange tickers (paginated, 100 tickers per page)', (
+             EXCHANGE_ID,
+             Param('coin_ids', Optional[str], 'Only tickers of these coin ids (comma-separated)', None),
+             PAGE,
+             Param('order', Optional[str], 'Sort by: trust_score_desc, trust_score_asc, volume_desc or volume_asc',
+                   None),
+             Param('depth', Optional[bool], 'Include 2% orderbook depth', None),
+         ), passthrough=True),
+    Tool('get_exchange_volume_chart_by_id', 'get_exchanges_volume_chart_by_id',
+         'Get volume chart data (in BTC) for a given exchange', (EXCHANGE_ID, DAYS), series=True),
+    Tool('get_exchange_volume_chart_range_by_id', 'get_exchanges_volume_chart_by_id_within_time_range',
+         'Get volume chart data (in BTC) for a given exchange within a time range',
+         (EXCHANGE_ID, FROM_TIMESTAMP, TO_TIMESTAMP), series=True),
+
+    # ---------- INDEXES ----------#
+    Tool('get_indexes', 'get_indexes', 'List all market indexes', (PER_PAGE, PAGE)),
+    Tool('get_index_by_id', 'get_indexes_by_market_id_and_index_id', 'Get market index by market id and index id', (
+        Param('market_id', str, 'The market id (e.g. binance_futures)'),
+        Param('id', str, 'The index id (e.g. BTC)'),
+    ), passthrough=True),
+    Tool('get_indexes_list', 'get_indexes_list', 'List market indexes id and name'),
+
+    # ---------- DERIVATIVES ----------#
+    Tool('get_derivatives', 'get_derivatives', 'List all derivative tickers', (INCLUDE_TICKERS,)),
+    Tool('get_derivatives_exchanges', 'get_derivatives_exchanges', 'List all derivative exchanges with data',
+         (ORDER, PER_PAGE, PAGE)),
+    Tool('get_derivatives_exchange_by_id', 'get_derivatives_exchanges_by_id',
+         'Get a derivative exchange with its data', (EXCHANGE_ID, INCLUDE_TICKERS), passthrough=True),
+    Tool('get_derivatives_exchanges_list', 'get_derivatives_exchanges_list',
+         'List all derivative exchanges id and name'),
+
+    # ---------- NFTS ----------#
+    Tool('get_nfts_list', 'get_nfts_list', 'List all supported NFT ids (paginated, 100 items per page)',
+         (ORDER, PER_PAGE, PAGE)),
+    Tool('get_nft_by_id', 'get_nfts_by_id',
+         'Get current data (name, price_floor, volume_24h ...) for an NFT collection', (NFT_ID,), passthrough=True),
+    Tool('get_nft_by_contract_address', 'get_nfts_by_asset_platform_id_and_contract_address',
+         'Get current data (name, price_floor, volume_24h ...) for an NFT collection from its contract address',
+         (ASSET_PLATFORM_ID, CONTRACT_ADDRESS), passthrough=True),
+    Tool('get_nfts_markets', 'get_nfts_markets',
+         'List NFT collections with floor price, market cap, volume and market related data (Pro API)', (
+             Param('asset_platform_id', Optional[str], 'Only collections of this asset platform id', None),
+             ORDER, PER_PAGE, PAGE,
+         )),
+    Tool('get_nft_market_chart_by_id', 'get_nfts_market_chart_by_id',
+         'Get historical floor price, market cap and 24h volume of an NFT collection (Pro API)', (NFT_ID, DAYS),
+         series=True),
+    Tool('get_nft_market_chart_by_contract_address', 'get_ntfs_market_chart_by_asset_platform_id_and_contract_address',
+         'Get historical floor price, market cap and 24h volume of an NFT collection from its contract address '
+         '(Pro API)', (ASSET_PLATFORM_ID, CONTRACT_ADDRESS, DAYS), series=True),
+    Tool('get_nft_tickers_by_id', 'get_nfts_tickers_by_id',
+         'Get the floor price and 24h volume of an NFT collection on each marketplace (Pro API)', (NFT_ID,),
+         passthrough=True),
+
+    # ---------- EXCHANGE-RATES ----------#
+    Tool('get_exchange_rates', 'get_exchange_rates', 'Get BTC-to-Currency exchange rates', passthrough=True),
+
+    # ---------- GLOBAL ----------#
+    Tool('get_global', 'get_global', 'Get cryptocurrency global data'),
+    Tool('get_global_defi', 'get_global_decentralized_finance_defi',
+         'Get cryptocurrency global decentralized finance(defi) data'),
+    Tool('get_global_market_cap_chart', 'get_global_market_cap_chart',
+         'Get cryptocurrency global market cap chart data (Pro API)', (
+             DAYS,
+             Param('vs_currency', Optional[str], 'The target currency of market data (usd, eur, jpy, etc.)', None),
+         ), series=True),
+
+    # ---------- TRENDING ----------#
+    Tool('get_trending', 'get_search_trending', 'Get trending search coins (Top-7) on CoinGecko in the last 24 hours',
+         passthrough=True),
+
+    # ---------- SEARCH ----------#
+    Tool('search', 'search', 'Search for coins, categories and markets on CoinGecko.', (
+        Param('query', str, 'Search string'),
+    ), passthrough=True),
+
+    # ---------- COMPANIES ----------#
+    Tool('get_companies_public_treasury', 'get_companies_public_treasury_by_coin_id',
+         'Get public companies holdings of bitcoin or ethereum', (
+             Param('coin_id', str, 'The coin id: bitcoin or ethereum'),
+         ), passthrough=True),
+)
+
+TOOLS_BY_NAME = {tool.name: tool for tool in TOOLS}
@@ -0,0 +1,60 @@
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .stats import add_connection_timing
+
+# failures of an idempotent GET worth retrying: refused or reset connections,
+# connect / read timeouts and bodies cut short
+RETRYABLE_EXCEPTIONS = (ConnectionError, Timeout, ChunkedEncodingError)
+
+
+class _TimedConnectionMixin:
+    """Records the time spent opening the socket (DNS + TCP) and in the TLS handshake"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._socket_seconds = time.perf_counter() - start
+            add_connection_timing('connect', self._socket_seconds)
+
+    def connect(self):
+        self._socket_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            # whatever connect() spent beyond opening the socket is the TLS handshake
+            add_connection_timing('tls', max(0.0, time.perf_counter() - start - self._socket_seconds))
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report connect / TLS setup times to pycoingecko.stats"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
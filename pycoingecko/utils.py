@@ -1,5 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
+from .scheduler import current_priority, priority
+
+NAN = float('nan')
+
 
 def func_args_preprocessing(func):
     """Return function that converts list input arguments to comma-separated strings"""
@@ -40,3 +45,44 @@ def get_comma_separated_values(values):
 
     return ','.join(values)
 
+
+def to_float(value):
+    """Return value as float, NaN for missing or non-numeric values"""
+
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def iter_pages(fetch_page, per_page, max_pages=None, max_workers=4):
+    """Yield the item lists returned by fetch_page(page) for pages 1, 2, ... in order
+
+    Pages are requested in waves of max_workers until a short (last) page is
+    seen or max_pages is reached; each page is yielded as soon as it and the
+    pages before it have arrived. The pages are fetched with the priority
+    class of the caller (see scheduler.priority).
+    """
+
+    # pool threads do not inherit the caller's priority class, so each fetch enters it
+    name = current_priority()
+
+    def fetch(page):
+        with priority(name):
+            return fetch_page(page)
+
+    page = 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while max_pages is None or page <= max_pages:
+            last = page + max_workers - 1
+            if max_pages is not None:
+                last = min(last, max_pages)
+
+            for items in executor.map(fetch, range(page, last + 1)):
+                if items:
+                    yield items
+                if len(items) < per_page:
+                    return
+            page = last + 1
@@ -1,24 +1,168 @@
 import asyncio
 import os
+import sys
+import threading
+import time
 from mcp.server.fastmcp import FastMCP
 from pycoingecko.api import CoinGeckoAPI
+from pycoingecko.scheduler import RequestScheduler
+from pycoingecko.tools import TOOLS, run_tool
 
-# Initialize the CoinGecko API client
-cg = CoinGeckoAPI(api_key=os.getenv("COINGECKO_API_KEY"))
+def _env_keys(name, kind):
+    return [(key.strip(), kind) for key in os.getenv(name, "").split(",") if key.strip()]
+
+# Initialize the CoinGecko API client (its HTTP session is created on first call);
+# COINGECKO_API_KEYS / COINGECKO_DEMO_API_KEYS (comma-separated) spread requests over several keys
+# Tool calls run as interactive requests, ahead of background jobs (pycoingecko.scheduler.priority);
+# COINGECKO_RATE_LIMIT (requests per minute) sets the rate budget shared by both
+RATE_LIMIT = float(os.getenv("COINGECKO_RATE_LIMIT", "0"))
+
+def _response_cache():
+    # COINGECKO_CACHE_DIR keeps responses on disk across server processes (COINGECKO_CACHE_MAX_MB, 256 by default)
+    cache_dir = os.getenv("COINGECKO_CACHE_DIR")
+    if not cache_dir:
+        return True
+    from pycoingecko.diskcache import DiskCache
+    return DiskCache(os.path.join(cache_dir, "responses.sqlite"),
+                     max_bytes=int(float(os.getenv("COINGECKO_CACHE_MAX_MB", "256")) * 1024 * 1024))
+
+cg = CoinGeckoAPI(api_key=os.getenv("COINGECKO_API_KEY"), hedge=os.getenv("COINGECKO_HEDGE") == "1",
+                  api_keys=_env_keys("COINGECKO_API_KEYS", "pro") + _env_keys("COINGECKO_DEMO_API_KEYS", "demo"),
+                  scheduler=RequestScheduler(rate=RATE_LIMIT / 60 if RATE_LIMIT else None), cache=_response_cache())
+
+# Full-market table kept warm between screen_coins calls, created on first use
+_screener = None
+
+# Exchange rates shared by currency conversions, created on first use
+_converter = None
+
+# Changes between successive full-market tables, created on first use
+_tracker = None
+
+# Maximum number of events returned by get_market_changes
+MAX_CHANGE_EVENTS = 1000
+
+# Seconds between background full-market refreshes feeding get_market_changes (0: only on tool calls)
+MARKET_POLL_INTERVAL = float(os.getenv("COINGECKO_MARKET_POLL_INTERVAL", "0"))
+
+# Maximum number of rows returned by screen_coins
+MAX_SCREEN_RESULTS = 250
+
+# Maximum number of 100-ticker pages read by get_coin_ticker_summary
+MAX_TICKER_PAGES = 20
+
+# Shared /simple/price poller behind the price subscriptions, created on first use;
+# COINGECKO_PRICE_POLL_INTERVAL sets the seconds between merged requests
+_poller = None
+PRICE_POLL_INTERVAL = float(os.getenv("COINGECKO_PRICE_POLL_INTERVAL", "30"))
+
+# Reference lists served as MCP resources, created on first use and refreshed every 6 hours
+_reference = None
+
+# Endpoint tool calls run in worker threads, at most COINGECKO_MAX_CONCURRENT_TOOLS at once
+MAX_CONCURRENT_TOOLS = int(os.getenv("COINGECKO_MAX_CONCURRENT_TOOLS", "8"))
+_tool_slots = asyncio.Semaphore(MAX_CONCURRENT_TOOLS)
+
+# Maximum number of candles returned by get_coin_candles
+MAX_CANDLES = 2000
+
+# Longest wait_price_changes long poll, in seconds
+MAX_PRICE_WAIT = 55
 
 # Create our MCP server
 app = FastMCP("coingecko-mcp-server")
 
-# ---------- PING ----------#
+def get_converter():
+    """Return the shared CurrencyConverter, importing pycoingecko.convert on first use"""
+    global _converter
+    if _converter is None:
+        from pycoingecko.convert import CurrencyConverter
+        _converter = CurrencyConverter(cg, ttl=300)
+    return _converter
+
+def get_screener():
+    """Return the shared MarketScreener, importing pycoingecko.screen on first use"""
+    global _screener
+    if _screener is None:
+        from pycoingecko.screen import MarketScreener
+        # only the usd table is fetched; other vs_currencies are converted from it
+        _screener = MarketScreener(cg, ttl=60, converter=get_converter())
+    return _screener
+
+def get_poller():
+    """Return the shared PricePoller, importing pycoingecko.poller on first use"""
+    global _poller
+    if _poller is None:
+        from pycoingecko.poller import PricePoller
+        _poller = PricePoller(cg, interval=PRICE_POLL_INTERVAL)
+    return _poller
+
+def get_reference():
+    """Return the shared ReferenceData, importing pycoingecko.reference on first use"""
+    global _reference
+    if _reference is None:
+        from pycoingecko.reference import ReferenceData
+        _reference = ReferenceData(cg)
+    return _reference
+
+def get_tracker():
+    """Return the shared MarketChangeTracker, fed by the screener's usd table"""
+    global _tracker
+    if _tracker is None:
+        from pycoingecko.snapshots import MarketChangeTracker
+        _tracker = MarketChangeTracker(lambda: get_screener().table("usd"))
+    return _tracker
+
+# ---------- STATS ----------#
 @app.tool()
-async def ping() -> dict:
-    """Check API server status"""
+async def stats() -> dict:
+    """Get per-endpoint statistics of this server's CoinGecko API client: call and upstream request counts,
+    status codes, retries, hedges, bytes, latency percentiles, request phase times and cache hit rate,
+    plus the circuit breaker state of each endpoint family, the usage of each pooled API key, the
+    request scheduler queues and the shared price poller"""
     try:
-        result = cg.ping()
+        result = {"endpoints": cg.stats.snapshot(), "circuits": cg.stats.circuit_snapshot(),
+                  "keys": cg.stats.key_snapshot(), "priorities": cg.stats.scheduler_snapshot(),
+                  "subscriptions": _poller.snapshot() if _poller is not None else None}
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    """Client statistics in the Prometheus text format (served when running over HTTP)"""
+    from starlette.responses import PlainTextResponse
+    return PlainTextResponse(cg.stats.prometheus(), media_type="text/plain; version=0.0.4")
+
+# ---------- ENDPOINT TOOLS ----------#
+def _endpoint_tool(tool):
+    """Return the tool function of a pycoingecko.tools.Tool: result caching comes from the client,
+    concurrency from _tool_slots, size budgeting and error shaping from run_tool"""
+    async def call(**arguments):
+        async with _tool_slots:
+            return await asyncio.to_thread(run_tool, cg, tool, arguments)
+    call.__name__ = tool.name
+    call.__doc__ = tool.doc
+    call.__signature__ = tool.signature()
+    return call
+
+for _tool in TOOLS:
+    app.add_tool(_endpoint_tool(_tool), name=_tool.name)
+
+# ---------- REFERENCE DATA ----------#
+@app.resource("coingecko://reference", mime_type="application/json")
+async def reference_index() -> dict:
+    """Reference datasets (vs_currencies, asset_platforms, categories, exchanges, derivatives_exchanges,
+    indexes) with their size and pages; read them from coingecko://reference/{dataset}/{page}"""
+    return get_reference().index()
+
+@app.resource("coingecko://reference/{dataset}/{page}", mime_type="application/json")
+async def reference_page(dataset: str, page: int) -> dict:
+    """One page (from 1, 500 items each) of a reference dataset, served from memory once loaded"""
+    # the first read of a dataset fetches it: off the event loop, like the tools
+    async with _tool_slots:
+        return await asyncio.to_thread(get_reference().page, dataset, int(page))
+
 # ---------- KEY ----------#
 # @app.tool()
 # async def key() -> dict:
@@ -29,214 +173,264 @@ async def ping() -> dict:
 #     except Exception as e:
 #         return {"success": False, "error": str(e)}
 
-# ---------- SIMPLE ----------#
+# ---------- SUBSCRIPTIONS ----------#
 @app.tool()
-async def get_price(ids: str, vs_currencies: str) -> dict:
-    """Get the current price of any cryptocurrencies in any other supported currencies that you need.
+async def subscribe_prices(ids: str, vs_currencies: str = "usd") -> dict:
+    """Subscribe to price changes instead of calling get_price in a loop. Every subscription is served
+    by one shared poller (one merged /simple/price request per interval for all subscribers); read the
+    changes with wait_price_changes. Subscriptions not read for 5 minutes expire.
     
     Args:
-        ids: The ids of the cryptocurrencies to get prices for (comma-separated)
-        vs_currencies: The target currencies to get prices in (comma-separated)
+        ids: Comma-separated coin ids (e.g. bitcoin,ethereum)
+        vs_currencies: Comma-separated target currencies (e.g. usd,eur)
     """
     try:
-        result = cg.get_price(ids=ids, vs_currencies=vs_currencies)
+        poller = get_poller()
+        result = {"subscription": poller.subscribe(ids, vs_currencies), "interval": poller.interval}
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+async def _wait_changes(poller, subscription, since, timeout):
+    """poller.changes() without holding a thread for the wait: long polls would otherwise fill the
+    default executor that every other tool runs in"""
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def listener():
+        loop.call_soon_threadsafe(changed.set)
+
+    poller.add_listener(listener)
+    try:
+        deadline = loop.time() + timeout
+        while True:
+            # cleared before checking: a poll after the check sets it again
+            changed.clear()
+            result = poller.changes(subscription, since)
+            remaining = deadline - loop.time()
+            if result["prices"] or remaining <= 0:
+                return result
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        poller.remove_listener(listener)
+
 @app.tool()
-async def get_token_price(id: str, contract_addresses: str, vs_currencies: str) -> dict:
-    """Get the current price of any tokens on this coin (ETH only at this stage) in any other supported currencies.
+async def wait_price_changes(subscription: str, since_version: int = 0, timeout: float = 25) -> dict:
+    """Long-poll a price subscription: return as soon as a subscribed price changed after since_version,
+    or with no prices once timeout seconds have passed.
     
     Args:
-        id: The platform id (e.g., ethereum)
-        contract_addresses: The token contract addresses (comma-separated)
-        vs_currencies: The target currencies to get prices in (comma-separated)
+        subscription: The id returned by subscribe_prices
+        since_version: The "version" of the previous response (0 returns every known price)
+        timeout: Seconds to wait for a change (at most 55)
     """
     try:
-        result = cg.get_token_price(id=id, contract_addresses=contract_addresses, vs_currencies=vs_currencies)
-        return {"success": True, "data": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
-
-@app.tool()
-async def get_supported_vs_currencies() -> dict:
-    """Get list of supported_vs_currencies"""
-    try:
-        result = cg.get_supported_vs_currencies()
+        result = await _wait_changes(get_poller(), subscription, since_version, max(0.0, min(timeout, MAX_PRICE_WAIT)))
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-# ---------- COINS ----------#
 @app.tool()
-async def get_coins(
-    vs_currency: str = "usd",
-    order: str = "market_cap_desc",
-    per_page: int = 10,
-    page: int = 1,
-    sparkline: bool = False
-) -> dict:
-    """List all supported coins with detailed information.
+async def unsubscribe_prices(subscription: str) -> dict:
+    """Cancel a price subscription
     
     Args:
-        vs_currency: The target currency of market data (usd, eur, jpy, etc.)
-        order: Sort results by: market_cap_desc, market_cap_asc, volume_desc, volume_asc, id_desc, id_asc
-        per_page: Number of results per page (1-250)
-        page: Page number
-        sparkline: Include sparkline 7 days data
+        subscription: The id returned by subscribe_prices
     """
     try:
-        result = cg.get_coins_markets(
-            vs_currency=vs_currency,
-            order=order,
-            per_page=per_page,
-            page=page,
-            sparkline=sparkline
-        )
+        result = get_poller().unsubscribe(subscription)
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# ---------- COINS ----------#
 @app.tool()
-async def get_coin_by_id(id: str, localization: bool = True, tickers: bool = True, 
-                        market_data: bool = True, community_data: bool = True, 
-                        developer_data: bool = True, sparkline: bool = False) -> dict:
-    """Get current data (name, price, market, etc.) for a coin.
+async def screen_coins(
+    filters: str = "",
+    sort: str = "-market_cap",
+    limit: int = 50,
+    vs_currency: str = "usd"
+) -> dict:
+    """Screen the whole coin market with filters over /coins/markets data.
     
     Args:
-        id: The coin id (e.g. bitcoin)
-        localization: Include all localized languages in response
-        tickers: Include ticker data
-        market_data: Include market data
-        community_data: Include community data
-        developer_data: Include developer data
-        sparkline: Include sparkline 7 days data
+        filters: Comma-separated conditions "<column> <op> <number>", op one of < <= > >= == !=
+            (e.g. "market_cap >= 1e9, price_change_percentage_24h > 5, volume_to_market_cap > 0.1").
+            Columns: current_price, market_cap, market_cap_rank, fully_diluted_valuation, total_volume,
+            high_24h, low_24h, price_change_24h, price_change_percentage_24h, market_cap_change_24h,
+            market_cap_change_percentage_24h, circulating_supply, total_supply, max_supply, ath,
+            ath_change_percentage, atl, atl_change_percentage, volume_to_market_cap
+        sort: Column to sort by, prefixed with '-' for descending order
+        limit: Maximum number of rows to return (at most 250)
+        vs_currency: The target currency of market data (usd, eur, jpy, etc.), converted from usd at the
+            current exchange rate
     """
     try:
-        result = cg.get_coin_by_id(
-            id=id,
-            localization=localization,
-            tickers=tickers,
-            market_data=market_data,
-            community_data=community_data,
-            developer_data=developer_data,
-            sparkline=sparkline
-        )
+        # a cold screen downloads the whole market: keep it off the event loop
+        async with _tool_slots:
+            result = await asyncio.to_thread(
+                get_screener().screen,
+                filters=filters,
+                sort=sort,
+                limit=max(0, min(limit, MAX_SCREEN_RESULTS)),
+                vs_currency=vs_currency
+            )
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.tool()
-async def get_coin_market_chart_by_id(id: str, vs_currency: str, days: str) -> dict:
-    """Get historical market data include price, market cap, and 24h volume.
+async def get_coin_ticker_summary(id: str, targets: str = "", min_volume_usd: float = 10000, top: int = 10) -> dict:
+    """Summarize all exchange tickers of a coin: cross-exchange VWAP, total volume, best venue, best
+    venues to buy and sell, price dispersion, bid-ask spread statistics and volume share per exchange.
+    Stale and anomalous tickers are excluded.
     
     Args:
         id: The coin id (e.g. bitcoin)
-        vs_currency: The target currency of market data (usd, eur, jpy, etc.)
-        days: Data up to number of days ago (1/7/14/30/90/180/365/max)
+        targets: Comma-separated quote currencies to include (e.g. "USD,USDT,USDC"); all when empty
+        min_volume_usd: Minimum 24h USD volume of a ticker to be considered as best venue
+        top: Number of exchanges listed in the volume share
     """
     try:
-        result = cg.get_coin_market_chart_by_id(id=id, vs_currency=vs_currency, days=days)
+        from pycoingecko.tickers import aggregate_tickers
+        # up to MAX_TICKER_PAGES requests: keep them off the event loop
+        async with _tool_slots:
+            result = await asyncio.to_thread(
+                aggregate_tickers,
+                cg, id,
+                targets=[t.strip() for t in targets.split(",") if t.strip()],
+                min_volume_usd=min_volume_usd,
+                top=max(0, top),
+                max_pages=MAX_TICKER_PAGES
+            )
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.tool()
-async def get_coin_market_chart_range_by_id(
-    id: str, vs_currency: str, from_timestamp: int, to_timestamp: int
+async def get_coin_candles(
+    id: str,
+    vs_currency: str = "usd",
+    interval: str = "1h",
+    days: float = 1,
+    from_timestamp: int = 0,
+    to_timestamp: int = 0,
+    gaps: str = "skip"
 ) -> dict:
-    """Get historical market data include price, market cap, and 24h volume within a range of timestamp.
+    """Get OHLCV candles of a coin at any interval, resampled from its market chart. Candles are only as
+    fine as the upstream data: 5-minutely within the last day, hourly up to 90 days back, daily beyond.
     
     Args:
         id: The coin id (e.g. bitcoin)
         vs_currency: The target currency of market data (usd, eur, jpy, etc.)
-        from_timestamp: From date in UNIX Timestamp (eg. 1392577232)
-        to_timestamp: To date in UNIX Timestamp (eg. 1422577232)
+        interval: Candle length, e.g. 5m, 15m, 1h, 4h, 1d, 1w
+        days: Number of days up to now, used when from_timestamp is not given
+        from_timestamp: Start as UNIX timestamp (optional)
+        to_timestamp: End as UNIX timestamp (optional, defaults to now)
+        gaps: Periods without data: skip (leave out), fill (flat candle at the previous close) or nan (empty values)
     """
     try:
-        result = cg.get_coin_market_chart_range_by_id(
-            id=id,
-            vs_currency=vs_currency,
-            from_timestamp=from_timestamp,
-            to_timestamp=to_timestamp
-        )
+        from pycoingecko.candles import parse_interval
+        to_timestamp = to_timestamp or int(time.time())
+        from_timestamp = from_timestamp or int(to_timestamp - days * 86400)
+        candles = (to_timestamp - from_timestamp) // parse_interval(interval)
+        if candles > MAX_CANDLES:
+            raise ValueError("{0} candles requested; at most {1}, use a longer interval or a shorter range".format(
+                candles, MAX_CANDLES))
+        async with _tool_slots:
+            table = await asyncio.to_thread(cg.get_coin_candles, id, vs_currency, interval, from_timestamp,
+                                            to_timestamp, gaps=gaps)
+        result = {"interval": interval, "columns": list(table.COLUMNS), "candles": table.rows()}
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-# ---------- EXCHANGES ----------#
 @app.tool()
-async def get_exchanges(per_page: int = 100, page: int = 1) -> dict:
-    """List all exchanges.
+async def get_market_changes(since: float = 0, types: str = "", ids: str = "", limit: int = 200) -> dict:
+    """List what changed in the whole coin market since a time: coins added to or removed from the
+    listing, market cap rank changes, and price / market cap (1%) or volume (10%) moves between
+    successive full-market snapshots (refreshed at most once a minute, in usd). The first call only
+    takes the baseline snapshot.
     
     Args:
-        per_page: Number of results per page
-        page: Page number
+        since: Unix timestamp; pass the "until" of the previous response to get only newer changes
+        types: Comma-separated event types to include (added, removed, rank, field); all when empty
+        ids: Comma-separated coin ids to include; all when empty
+        limit: Maximum number of events to return (at most 1000)
     """
     try:
-        result = cg.get_exchanges_list(per_page=per_page, page=page)
+        tracker = get_tracker()
+        # refreshing the snapshot reads the whole market (about 60 pages): keep it off the event loop
+        async with _tool_slots:
+            await asyncio.to_thread(tracker.update)
+        result = tracker.changes_since(
+            since,
+            types={t.strip() for t in types.split(",") if t.strip()},
+            ids={i.strip() for i in ids.split(",") if i.strip()},
+            limit=max(0, min(limit, MAX_CHANGE_EVENTS))
+        )
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# ---------- CONVERSION ----------#
 @app.tool()
-async def get_exchange_by_id(id: str) -> dict:
-    """Get exchange volume in BTC and tickers.
+async def convert_currency(amount: float, from_currency: str, to_currency: str) -> dict:
+    """Convert an amount between any two currencies supported by CoinGecko (fiat, crypto and commodities),
+    using exchange rates cached for 5 minutes.
     
     Args:
-        id: The exchange id (e.g. binance)
+        amount: Amount in from_currency
+        from_currency: Currency code of the amount (usd, eur, btc, eth, xau, etc.)
+        to_currency: Currency code to convert to
     """
     try:
-        result = cg.get_exchanges_by_id(id=id)
+        # the exchange rates are fetched when the cached ones are older than 5 minutes
+        async with _tool_slots:
+            rate = await asyncio.to_thread(get_converter().factor, from_currency, to_currency)
+        result = {"amount": amount, "from": from_currency.lower(), "to": to_currency.lower(), "rate": rate,
+                  "result": amount * rate}
         return {"success": True, "data": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-# ---------- GLOBAL ----------#
-@app.tool()
-async def get_global() -> dict:
-    """Get cryptocurrency global data"""
-    try:
-        result = cg.get_global()
-        return {"success": True, "data": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+def _log(*args):
+    # stdout carries the protocol on the stdio transport
+    print(*args, file=sys.stderr, flush=True)
 
-@app.tool()
-async def get_global_defi() -> dict:
-    """Get cryptocurrency global decentralized finance(defi) data"""
+def _ping_in_background():
     try:
-        result = cg.get_global_decentralized_finance_defi()
-        return {"success": True, "data": result}
+        _log("Ping:", cg.ping())
     except Exception as e:
-        return {"success": False, "error": str(e)}
-
-# ---------- TRENDING ----------#
-@app.tool()
-async def get_trending() -> dict:
-    """Get trending search coins (Top-7) on CoinGecko in the last 24 hours"""
-    try:
-        result = cg.get_search_trending()
-        return {"success": True, "data": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+        _log("Ping failed:", e)
+    # reference lists are otherwise loaded on their first resource read: a server spawned per
+    # question would spend rate budget on lists it never serves, unless they come from the disk cache
+    if os.getenv("COINGECKO_CACHE_DIR"):
+        from pycoingecko.scheduler import BACKGROUND, priority
+        with priority(BACKGROUND):
+            failed = get_reference().preload()
+        if failed:
+            _log("Reference data not loaded:", ", ".join(failed))
 
-# ---------- SEARCH ----------#
-@app.tool()
-async def search(query: str) -> dict:
-    """Search for coins, categories and markets on CoinGecko.
-    
-    Args:
-        query: Search string
-    """
-    try:
-        result = cg.search(query=query)
-        return {"success": True, "data": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+def _poll_markets():
+    from pycoingecko.scheduler import BACKGROUND, priority
+    with priority(BACKGROUND):
+        while True:
+            try:
+                for _ in get_tracker().stream(MARKET_POLL_INTERVAL):
+                    pass
+            except Exception as e:
+                _log("Market poll failed:", e)
+                threading.Event().wait(MARKET_POLL_INTERVAL)
 
 if __name__ == "__main__":
-    print("Server Started!")
-    print("Ping:", cg.ping())
-    app.run()
+    _log("Server Started!")
+    # do not delay the MCP handshake on a network round trip
+    threading.Thread(target=_ping_in_background, name="coingecko-ping", daemon=True).start()
+    if MARKET_POLL_INTERVAL:
+        threading.Thread(target=_poll_markets, name="coingecko-market-poll", daemon=True).start()
+    # stdio by default; sse or streamable-http also serve /metrics
+    app.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
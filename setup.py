@@ -16,6 +16,9 @@ setuptools.setup(
     author='Christoforou Manolis',
     author_email='emchristoforou@gmail.com',
     install_requires=['requests'],
+    # optional content-codings negotiated when their decoders are installed
+    extras_require={'brotli': ['brotli'], 'zstd': ['zstandard']},
+    entry_points={'console_scripts': ['pycoingecko=pycoingecko.cli:main']},
     url='https://github.com/man-c/pycoingecko',
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -5,6 +5,7 @@ import unittest
 import unittest.mock as mock
 
 from pycoingecko import CoinGeckoAPI
+from pycoingecko.resilience import RetryPolicy
 from requests.exceptions import HTTPError
 
 
@@ -12,8 +13,9 @@ class TestWrapper(unittest.TestCase):
 
     @responses.activate
     def test_connection_error(self):
+        # retried without waiting
         with pytest.raises(requests.exceptions.ConnectionError):
-            CoinGeckoAPI().ping()
+            CoinGeckoAPI(retry_policy=RetryPolicy(backoff=0)).ping()
 
     @responses.activate
     def test_failed_ping(self):
@@ -160,7 +162,7 @@ class TestWrapper(unittest.TestCase):
 
         # Act Assert
         with pytest.raises(HTTPError) as HE:
-            CoinGeckoAPI().get_coins()
+            CoinGeckoAPI(retry_policy=RetryPolicy(backoff=0)).get_coins()
 
     @responses.activate
     def test_get_coins(self):
@@ -171,7 +173,7 @@ class TestWrapper(unittest.TestCase):
                           json = coins_json_sample, status = 200)
 
         # Act
-        response = CoinGeckoAPI().get_coins()
+        response = CoinGeckoAPI(retry_policy=RetryPolicy(backoff=0)).get_coins()
 
         ## Assert
         assert response == coins_json_sample
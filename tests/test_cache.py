@@ -0,0 +1,84 @@
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.cache import parse_max_age
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_parse_max_age(self):
+        # Assert
+        assert parse_max_age({'Cache-Control': 'public, max-age=30'}) == 30
+        assert parse_max_age({'Cache-Control': 'max-age=30', 'Age': '10'}) == 20
+        assert parse_max_age({'Cache-Control': 'no-cache'}) == 0
+        assert parse_max_age({'Cache-Control': 'no-store, max-age=30'}) is None
+        assert parse_max_age({}) == 0
+
+    @responses.activate
+    def test_fresh_response_skips_request(self):
+        # Arrange
+        ping_json = {'gecko_says': '(V3) To the Moon!'}
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping',
+                      json = ping_json, status = 200, headers = {'Cache-Control': 'max-age=30'})
+        cg = CoinGeckoAPI()
+
+        # Act
+        first = cg.ping()
+        second = cg.ping()
+
+        # Assert
+        assert first == second == ping_json
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_not_modified_reuses_cached_body(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/exchanges'
+        exchanges_json = [{'id': 'binance', 'name': 'Binance'}]
+        responses.add(responses.GET, url, json = exchanges_json, status = 200,
+                      headers = {'ETag': 'W/"abc"', 'Last-Modified': 'Mon, 13 Nov 2024 10:00:00 GMT'})
+        responses.add(responses.GET, url, status = 304, headers = {'ETag': 'W/"abc"'})
+        cg = CoinGeckoAPI()
+
+        # Act
+        first = cg.get_exchanges_list()
+        second = cg.get_exchanges_list()
+
+        # Assert
+        assert first == second == exchanges_json
+        assert len(responses.calls) == 2
+        assert responses.calls[1].request.headers['If-None-Match'] == 'W/"abc"'
+        assert responses.calls[1].request.headers['If-Modified-Since'] == 'Mon, 13 Nov 2024 10:00:00 GMT'
+
+    @responses.activate
+    def test_cache_disabled(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping',
+                      json = {}, status = 200, headers = {'Cache-Control': 'max-age=30'})
+        cg = CoinGeckoAPI(cache=False)
+
+        # Act
+        cg.ping()
+        cg.ping()
+
+        # Assert
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_cached_results_are_not_shared(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd',
+                      json = [{'id': 'bitcoin', 'current_price': 1.0}], status = 200,
+                      headers = {'Cache-Control': 'max-age=30'})
+        cg = CoinGeckoAPI()
+
+        # Act
+        first = cg.get_coins_markets('usd')
+        first[0]['current_price'] = 2.0
+        first.append({'id': 'ethereum'})
+        second = cg.get_coins_markets('usd')
+
+        # Assert
+        assert second == [{'id': 'bitcoin', 'current_price': 1.0}]
+        assert len(responses.calls) == 1
@@ -0,0 +1,76 @@
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.candles import CandleBuilder, build_candles, parse_interval, split_range
+
+HOUR = 3600 * 1000
+DAY = 86400
+
+
+class TestCandles(unittest.TestCase):
+
+    def test_build_candles_with_gaps(self):
+        # Arrange
+        prices = [[0, 1], [HOUR // 2, 3], [HOUR, 2], [HOUR + 10, 1], [3 * HOUR + 5, 5], [3 * HOUR + 6, 4]]
+        volumes = [[0, 24], [HOUR // 2, 48], [HOUR, 24], [3 * HOUR + 5, 48]]
+
+        # Act
+        skipped = build_candles(prices, '1h', volumes).rows()
+        filled = build_candles(prices, '1h', volumes, gaps='fill').rows()
+        empty = build_candles(prices, '1h', volumes, gaps='nan').rows()
+
+        # Assert
+        assert skipped == [[0, 1, 3, 1, 3, 1.5], [HOUR, 2, 2, 1, 1, 1], [3 * HOUR, 5, 5, 4, 4, 2]]
+        assert filled[2] == [2 * HOUR, 1, 1, 1, 1, 0]
+        assert empty[2] == [2 * HOUR, None, None, None, None, None]
+        assert len(filled) == len(empty) == 4
+
+    def test_builder_streams_overlapping_chunks(self):
+        # Arrange
+        prices = [[i * HOUR // 4, float(i)] for i in range(12)]
+        builder = CandleBuilder('1h')
+
+        # Act
+        first = builder.feed(prices[:6])
+        second = builder.feed(prices[5:])
+        last = builder.finish()
+
+        # Assert
+        assert [row[0] for row in first.rows()] == [0]
+        assert [row[0] for row in second.rows()] == [HOUR]
+        assert last.rows() == [[2 * HOUR, 8, 11, 8, 11, None]]
+        assert list(first.count) == [4]
+
+    def test_split_range(self):
+        # Arrange
+        now = 200 * DAY
+
+        # Act
+        hourly = split_range(0, 100 * DAY, '4h')
+        recent = split_range(now - 100 * DAY, now, '5m', now=now)
+
+        # Assert
+        assert parse_interval('1w') == 7 * DAY and parse_interval(900) == 900
+        with pytest.raises(ValueError):
+            parse_interval('1x')
+        assert split_range(0, 1000 * DAY, '1d') == [(0, 1000 * DAY)]
+        assert hourly == [(0, 90 * DAY), (90 * DAY, 100 * DAY)]
+        assert recent == [(now - 100 * DAY, now - 10 * DAY), (now - 10 * DAY, now - DAY), (now - DAY, now)]
+
+    @responses.activate
+    def test_get_coin_candles(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range'
+        chart = {"prices": [[DAY * 1000 + i * HOUR, 100.0 + i] for i in range(48)],
+                 "total_volumes": [[DAY * 1000 + i * HOUR, 2400.0] for i in range(48)]}
+        responses.add(responses.GET, url, json=chart, status=200)
+        cg = CoinGeckoAPI()
+
+        # Act
+        table = cg.get_coin_candles('bitcoin', 'usd', '1d', DAY, 3 * DAY)
+
+        # Assert
+        assert table.rows() == [[DAY * 1000, 100, 123, 100, 123, 2400], [2 * DAY * 1000, 124, 147, 124, 147, 2400]]
+        assert len(responses.calls) == 1
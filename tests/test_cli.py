@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+import responses
+
+from pycoingecko.cli import expand_request, main, read_requests
+
+DAY = 86400
+URL = 'https://api.coingecko.com/api/v3/'
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_expand_request(self):
+        # Act
+        coins = expand_request({"method": "get_coin_by_id", "ids": "bitcoin, ethereum", "tickers": False})
+        prices = expand_request({"method": "get_price", "ids": "bitcoin,ethereum", "vs_currencies": "usd"})
+        charts = expand_request({"method": "get_coin_market_chart_range_by_id", "id": "bitcoin", "vs_currency": "usd",
+                                 "from": 0, "to": 100 * DAY, "window": "90d"})
+        history = expand_request({"method": "get_coin_history_by_id", "id": "bitcoin", "date": "2024-01-31"})
+        units, errors = read_requests(['# comment', '', '{"method": "ping"}', '{"method": "nope"}',
+                                       '{"method": "get_coin_by_id"}', 'not json',
+                                       '{"method": "get_coin_history_by_id", "id": "bitcoin", "date": 20240131}',
+                                       '{"method": "get_coin_by_id", "ids": [1, 2]}'])
+
+        # Assert
+        assert [(u.method, u.params) for u in coins] == [('get_coin_by_id', {'id': 'bitcoin', 'tickers': False}),
+                                                         ('get_coin_by_id', {'id': 'ethereum', 'tickers': False})]
+        assert [u.params for u in prices] == [{'ids': 'bitcoin,ethereum', 'vs_currencies': 'usd'}]
+        assert [(u.params['from_timestamp'], u.params['to_timestamp']) for u in charts] == [(0, 90 * DAY),
+                                                                                           (90 * DAY, 100 * DAY)]
+        assert history[0].params['date'] == '31-01-2024'
+        assert [u.method for u in units] == ['ping']
+        assert [number for number, _ in errors] == [4, 5, 6, 7, 8]
+        assert 'requires id' in errors[1][1]
+        with pytest.raises(ValueError):
+            expand_request({"method": "ping", "from": 0})
+
+    @responses.activate
+    def test_fetch_streams_json_lines(self):
+        # Arrange
+        responses.add(responses.GET, URL + 'ping', body=b'{"gecko_says": "(V3) To the Moon!"}', status=200)
+        responses.add(responses.GET, URL + 'coins/bitcoin/', json={"id": "bitcoin"}, status=200)
+        responses.add(responses.GET, URL + 'coins/unknown/', status=404)
+        responses.add(responses.GET, URL + 'global', json={"data": {"active_cryptocurrencies": 1}}, status=200)
+        responses.add(responses.GET, URL + 'global/decentralized_finance_defi', json=[], status=200)
+        source = os.path.join(self.directory, 'requests.jsonl')
+        output = os.path.join(self.directory, 'results.jsonl')
+        with open(source, 'w') as f:
+            f.write('{"method": "ping"}\n{"method": "get_coin_by_id", "ids": ["bitcoin", "unknown"]}\n'
+                    '{"method": "get_global"}\n{"method": "get_global_decentralized_finance_defi"}\n')
+
+        # Act
+        status = main(['fetch', source, '-o', output, '--workers', '2', '--attempts', '1'])
+
+        # Assert
+        with open(output) as f:
+            lines = [json.loads(line) for line in f]
+        results = {line['request'].get('id', line['request']['method']): line for line in lines}
+        assert status == 1
+        assert results['ping'] == {"request": {"method": "ping"}, "success": True,
+                                   "data": {"gecko_says": "(V3) To the Moon!"}}
+        assert results['bitcoin']['data'] == {"id": "bitcoin"}
+        assert results['unknown']['success'] is False and '404' in results['unknown']['error']
+        assert results['get_global']['data'] == {"active_cryptocurrencies": 1}
+        assert results['get_global_decentralized_finance_defi']['success'] is False
+
+    def test_fetch_missing_input(self):
+        # Act
+        status = main(['fetch', os.path.join(self.directory, 'missing.jsonl')])
+
+        # Assert
+        assert status == 1
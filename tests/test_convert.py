@@ -0,0 +1,79 @@
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.convert import CurrencyConverter
+from pycoingecko.screen import MarketScreener
+
+
+EXCHANGE_RATES_JSON = {"rates": {
+    "btc": {"name": "Bitcoin", "unit": "BTC", "value": 1.0, "type": "crypto"},
+    "eth": {"name": "Ether", "unit": "ETH", "value": 20.0, "type": "crypto"},
+    "usd": {"name": "US Dollar", "unit": "$", "value": 60000.0, "type": "fiat"},
+    "eur": {"name": "Euro", "unit": "€", "value": 54000.0, "type": "fiat"},
+}}
+
+
+class TestConvert(unittest.TestCase):
+
+    def setUp(self):
+        responses.start()
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/exchange_rates', json = EXCHANGE_RATES_JSON,
+                      status = 200)
+        self.converter = CurrencyConverter(CoinGeckoAPI(cache=False), ttl=300)
+
+    def tearDown(self):
+        responses.stop()
+        responses.reset()
+
+    def test_factor(self):
+        # Act / Assert
+        assert self.converter.factor('usd', 'eur') == pytest.approx(0.9)
+        assert self.converter.factor('ETH', 'usd') == pytest.approx(3000)
+        assert self.converter.convert(None, 'usd', 'eur') is None
+        assert list(self.converter.convert_array([10, None], 'usd', 'btc'))[0] == pytest.approx(10 / 60000)
+        with pytest.raises(ValueError):
+            self.converter.factor('usd', 'xyz')
+        assert len(responses.calls) == 1
+
+    def test_convert_market_chart_and_prices(self):
+        # Arrange
+        chart = {"prices": [[1, 100.0], [2, 110.0]], "market_caps": [[1, 1000.0]], "total_volumes": [[1, None]]}
+        prices = {"bitcoin": {"usd": 60000.0, "usd_market_cap": 1.2e12, "usd_24h_vol": 3e10, "usd_24h_change": 1.5,
+                              "last_updated_at": 1700000000}}
+
+        # Act
+        converted_chart = self.converter.convert_market_chart(chart, 'usd', 'eur')
+        converted_prices = self.converter.convert_prices(prices, 'usd', 'eur,btc')
+
+        # Assert
+        assert converted_chart == {"prices": [[1, pytest.approx(90.0)], [2, pytest.approx(99.0)]],
+                                   "market_caps": [[1, pytest.approx(900.0)]], "total_volumes": [[1, None]]}
+        bitcoin = converted_prices['bitcoin']
+        assert bitcoin['eur'] == pytest.approx(54000.0)
+        assert bitcoin['eur_market_cap'] == pytest.approx(1.08e12)
+        assert bitcoin['btc'] == pytest.approx(1.0)
+        assert 'eur_24h_change' not in bitcoin
+        assert bitcoin['usd_24h_change'] == 1.5
+
+    def test_screener_converts_tables_from_base_currency(self):
+        # Arrange
+        rows = [{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 60000, "market_cap": 1.2e12,
+                 "total_volume": 3e10, "price_change_percentage_24h": 1.5}]
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/coins/markets', json = rows, status = 200)
+        screener = MarketScreener(self.converter.cg, converter=self.converter)
+
+        # Act
+        usd = screener.screen(vs_currency='usd')['rows'][0]
+        eur = screener.screen(vs_currency='EUR')['rows'][0]
+        screener.screen(vs_currency='eth')
+
+        # Assert
+        assert eur['current_price'] == pytest.approx(usd['current_price'] * 0.9)
+        assert eur['market_cap'] == pytest.approx(1.08e12)
+        assert eur['price_change_percentage_24h'] == 1.5
+        assert eur['volume_to_market_cap'] == usd['volume_to_market_cap']
+        markets = [call.request for call in responses.calls if '/coins/markets' in call.request.url]
+        assert {request.params['vs_currency'] for request in markets} == {'usd'}
+        assert len(responses.calls) - len(markets) == 1
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.diskcache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'responses.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def test_new_client_answers_from_disk(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/exchanges/list', status=200,
+                      json=[{'id': 'binance', 'name': 'Binance'}], headers={'Cache-Control': 'public, max-age=30'})
+        CoinGeckoAPI(cache=DiskCache(self.path)).get_exchanges_id_name_list()
+
+        # Act
+        cache = DiskCache(self.path)
+        response = CoinGeckoAPI(cache=cache).get_exchanges_id_name_list()
+
+        # Assert
+        assert response == [{'id': 'binance', 'name': 'Binance'}]
+        assert len(responses.calls) == 1
+        # reference lists stay fresh for 6 hours although max-age is 30 seconds
+        entry = cache.get(('https://api.coingecko.com/api/v3/exchanges/list', ()))
+        assert entry.expires_at > time.time() + 3600
+        assert cache.size() < len(entry.body) + 64
+
+    def test_lru_eviction(self):
+        # Arrange
+        cache = DiskCache(self.path, max_bytes=3500, memory_entries=1)
+        headers = {'Cache-Control': 'max-age=3600'}
+        now = time.time()
+        clock = mock.patch('pycoingecko.diskcache.time.time', side_effect=[now + 100 * i for i in range(5)])
+
+        # Act
+        with clock:
+            for i in range(3):
+                cache.store(('https://api.coingecko.com/api/v3/coins/c{0}'.format(i), ()), headers, os.urandom(1000))
+            cache.get(('https://api.coingecko.com/api/v3/coins/c0', ()))
+            cache.store(('https://api.coingecko.com/api/v3/coins/c3', ()), headers, os.urandom(1000))
+        evicted = cache.evict()
+
+        # Assert
+        assert evicted == 1
+        assert len(cache) == 3
+        assert cache.get(('https://api.coingecko.com/api/v3/coins/c1', ())) is None
+        assert cache.get(('https://api.coingecko.com/api/v3/coins/c0', ())) is not None
+
+    def test_no_store_is_not_kept(self):
+        # Arrange
+        cache = DiskCache(self.path)
+        key = ('https://api.coingecko.com/api/v3/simple/price', (('ids', 'bitcoin'),))
+
+        # Act
+        entry = cache.store(key, {'Cache-Control': 'no-store'}, b'{}')
+
+        # Assert
+        assert entry is None
+        assert len(cache) == 0
@@ -0,0 +1,52 @@
+import inspect
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.endpoints import ENDPOINTS, ENDPOINTS_BY_NAME, Endpoint
+
+
+class TestEndpoints(unittest.TestCase):
+
+    def test_every_endpoint_is_a_client_method(self):
+        # Assert
+        for endpoint in ENDPOINTS:
+            method = getattr(CoinGeckoAPI, endpoint.name)
+            assert method.__doc__ == endpoint.doc
+            assert method.__qualname__ == 'CoinGeckoAPI.' + endpoint.name
+            assert list(inspect.signature(method).parameters) == ['self'] + list(endpoint.args) + ['kwargs']
+
+    def test_prepare(self):
+        # Act
+        path, params = ENDPOINTS_BY_NAME['get_coin_market_chart_range_by_id'].prepare(
+            'bitcoin', ['usd'], 1392577232, 1422577232, precision=True)
+
+        # Assert
+        assert path == 'coins/bitcoin/market_chart/range'
+        assert params == {'precision': 'true', 'vs_currency': 'usd', 'from': 1392577232, 'to': 1422577232}
+
+    def test_strip_spaces(self):
+        # Act
+        path, params = ENDPOINTS_BY_NAME['get_price'].prepare('bitcoin, ethereum', 'usd, eur')
+
+        # Assert
+        assert params == {'ids': 'bitcoin,ethereum', 'vs_currencies': 'usd,eur'}
+
+    def test_path_args_must_be_listed(self):
+        # Act Assert
+        with pytest.raises(ValueError):
+            Endpoint('get_nothing', 'nothing/{id}')
+
+    @responses.activate
+    def test_caller_kwargs_not_mutated(self):
+        # Arrange
+        responses.add(responses.GET, 'https://pro-api.coingecko.com/api/v3/coins/markets?vs_currency=usd&per_page=2'
+                                     '&x_cg_pro_api_key=KEY', json = [], status = 200)
+        options = {'per_page': 2}
+
+        # Act
+        CoinGeckoAPI(api_key='KEY').get_coins_markets('usd', **options)
+
+        # Assert
+        assert options == {'per_page': 2}
@@ -0,0 +1,83 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.export import (CHART_EXPORT_COLUMNS, MARKET_EXPORT_COLUMNS, _pyarrow, export, format_for,
+                                market_batches, market_chart_batches, parse_timestamp)
+
+DAY = 86400
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_csv(self, path):
+        with open(path) as f:
+            return list(csv.reader(f))
+
+    @responses.activate
+    def test_market_chart_windows_to_csv(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range'
+        first = {"prices": [[0, 1.0], [90 * DAY * 1000, 2.0]], "market_caps": [[0, 10.0], [90 * DAY * 1000, 20.0]],
+                 "total_volumes": [[0, 5.0]]}
+        second = {"prices": [[90 * DAY * 1000, 2.0], [91 * DAY * 1000, 3.0]], "market_caps": [], "total_volumes": []}
+        responses.add(responses.GET, url + '?vs_currency=usd&from=0&to={0}'.format(90 * DAY), json=first, status=200)
+        responses.add(responses.GET, url + '?vs_currency=usd&from={0}&to={1}'.format(90 * DAY, 100 * DAY),
+                      json=second, status=200)
+        path = os.path.join(self.directory, 'chart.csv')
+
+        # Act
+        rows = export(market_chart_batches(CoinGeckoAPI(), 'bitcoin', 'usd', 0, 100 * DAY), path,
+                      CHART_EXPORT_COLUMNS)
+
+        # Assert
+        assert rows == 3
+        assert self.read_csv(path) == [['timestamp', 'price', 'market_cap', 'total_volume'],
+                                       ['0', '1.0', '10.0', '5.0'], [str(90 * DAY * 1000), '2.0', '20.0', ''],
+                                       [str(91 * DAY * 1000), '3.0', '', '']]
+
+    @responses.activate
+    def test_market_pages_to_csv(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/coins/markets'
+        page = [{"id": "coin{0}".format(i), "symbol": "c{0}".format(i), "name": "Coin", "current_price": i,
+                 "market_cap_rank": i + 1, "last_updated": "2024-01-01T00:00:00.000Z"} for i in range(2)]
+        responses.add(responses.GET, url + '?vs_currency=usd&per_page=2&page=1', json=page, status=200)
+        responses.add(responses.GET, url + '?vs_currency=usd&per_page=2&page=2', json=page[:1], status=200)
+        path = os.path.join(self.directory, 'markets.csv')
+
+        # Act
+        rows = export(market_batches(CoinGeckoAPI(), 'usd', per_page=2, max_workers=1), path, MARKET_EXPORT_COLUMNS)
+
+        # Assert
+        table = self.read_csv(path)
+        assert rows == 3
+        assert table[0] == [name for name, _ in MARKET_EXPORT_COLUMNS]
+        assert table[2][:5] == ['coin1', 'c1', 'Coin', '1.0', '']
+        assert table[2][table[0].index('market_cap_rank')] == '2'
+
+    def test_formats(self):
+        # Assert
+        assert format_for('out.parquet') == 'parquet' and format_for('out.feather') == 'arrow'
+        assert format_for('out.data', 'csv') == 'csv'
+        assert parse_timestamp('2024-01-01') == parse_timestamp('01-01-2024') == 1704067200
+        with pytest.raises(ValueError):
+            format_for('out.json')
+        if _pyarrow() is None:
+            with pytest.warns(RuntimeWarning):
+                rows = export([[(0, 1.0, None, None)]], os.path.join(self.directory, 'out.parquet'),
+                              CHART_EXPORT_COLUMNS)
+            assert rows == 1
+            assert self.read_csv(os.path.join(self.directory, 'out.csv'))[1] == ['0', '1.0', '', '']
@@ -0,0 +1,71 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.history import BulkHistory, HistoryStore, date_range, write_history
+
+URL = 'https://api.coingecko.com/api/v3/coins/{0}/history'
+
+
+def history(coin_id, price):
+    return {"id": coin_id, "symbol": coin_id[:3], "name": coin_id.title(),
+            "market_data": {"current_price": {"usd": price}, "market_cap": {"usd": price * 10},
+                            "total_volume": {"usd": price * 2}}}
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.directory, 'history.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def test_run_skips_stored_cells_and_retries_failures(self):
+        # Arrange
+        dates = date_range('01-01-2024', '03-01-2024')
+        for coin_id, price in (('bitcoin', 40000), ('ethereum', 2000)):
+            for d in dates:
+                url = URL.format(coin_id) + '?date={0}&localization=false'.format(d.strftime('%d-%m-%Y'))
+                if coin_id == 'ethereum' and d.day == 3:
+                    responses.add(responses.GET, url, status=404)
+                else:
+                    responses.add(responses.GET, url, json=history(coin_id, price + d.day), status=200)
+        bulk = BulkHistory(CoinGeckoAPI(), self.store, max_workers=2, checkpoint_every=2)
+
+        # Act
+        first = bulk.run(['bitcoin', 'ethereum'], dates)
+        calls = len(responses.calls)
+        second = bulk.run('bitcoin,ethereum', dates)
+
+        # Assert
+        assert (first['cells'], first['stored'], first['done'], first['failed']) == (6, 0, 5, 1)
+        assert first['errors'][0].startswith('ethereum/2024-01-03')
+        assert (second['stored'], second['done'], second['failed']) == (5, 0, 1)
+        assert len(responses.calls) == calls + 1
+        assert self.store.get('bitcoin', '2024-01-02')['market_data']['current_price']['usd'] == 40002
+
+    def test_write_history_csv(self):
+        # Arrange
+        self.store.put_many([('bitcoin', '02-01-2024', b'{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}'),
+                             ('bitcoin', '01-01-2024', b'{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", '
+                                                       b'"market_data": {"current_price": {"usd": 42000.5}}}')])
+        path = os.path.join(self.directory, 'history.csv')
+
+        # Act
+        count = write_history(self.store, path)
+
+        # Assert
+        with open(path) as f:
+            rows = list(csv.reader(f))
+        assert count == 2
+        assert rows[0] == ['id', 'date', 'symbol', 'name', 'price', 'market_cap', 'total_volume']
+        assert rows[1] == ['bitcoin', '2024-01-01', 'btc', 'Bitcoin', '42000.5', '', '']
+        assert rows[2][:2] == ['bitcoin', '2024-01-02']
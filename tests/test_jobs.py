@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.resilience import RetryBudget, RetryPolicy
+from pycoingecko.jobs import Job, Unit, market_chart_units, ohlc_range_units, run_units, windows
+
+DAY = 86400
+URL = 'https://api.coingecko.com/api/v3/coins/{0}/market_chart/range'
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'jobs.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_planners_split_ranges(self):
+        # Act
+        charts = market_chart_units('bitcoin,ethereum', 'usd', 0, 100 * DAY)
+        ohlc = ohlc_range_units(['bitcoin'], 'usd', 0, 40 * DAY, interval='hourly')
+
+        # Assert
+        assert windows(0, 10, 4) == [(0, 4), (4, 8), (8, 10)]
+        assert [u.params['to_timestamp'] for u in charts] == [90 * DAY, 100 * DAY, 90 * DAY, 100 * DAY]
+        assert charts[0].key == ('get_coin_market_chart_range_by_id?from_timestamp=0&id=bitcoin'
+                                 '&to_timestamp=7776000&vs_currency=usd')
+        assert [(u.params['from_timestamp'], u.params['to_timestamp']) for u in ohlc] == [(0, 31 * DAY),
+                                                                                          (31 * DAY, 40 * DAY)]
+
+    @responses.activate
+    def test_run_units_retries_with_backoff(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/ping'
+        responses.add(responses.GET, url, json={"error": "busy"}, status=429)
+        responses.add(responses.GET, url, json={"gecko_says": "(V3) To the Moon!"}, status=200)
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/coins/unknown/', status=404)
+        cg = CoinGeckoAPI(retries=0)
+        committed = []
+
+        # Act
+        report = run_units(cg, [Unit('ping'), Unit('get_coin_by_id', {'id': 'unknown'})],
+                           lambda done, failed: committed.append((done, failed)), backoff=0.01)
+
+        # Assert
+        assert (report['units'], report['done'], report['failed'], report['retries']) == (2, 1, 1, 1)
+        assert committed[0][0][0][1] == b'{"gecko_says": "(V3) To the Moon!"}'
+        assert committed[0][1][0][0].key == 'get_coin_by_id?id=unknown'
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_run_units_leaves_retries_to_a_retrying_client(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json={"error": "busy"}, status=503)
+        cg = CoinGeckoAPI(retry_policy=RetryPolicy(retries=1, backoff=0), circuit_breakers=False)
+
+        # Act
+        report = run_units(cg, [Unit('ping')], lambda done, failed: None, backoff=0.01)
+
+        # Assert
+        assert (report['failed'], report['retries']) == (1, 0)
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_run_units_retries_calls_the_client_did_not_retry(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json={"error": "busy"}, status=429)
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json={"gecko_says": "hi"}, status=200)
+        policy = RetryPolicy(retries=1, backoff=0, budget=RetryBudget(capacity=0))
+        cg = CoinGeckoAPI(retry_policy=policy, circuit_breakers=False)
+
+        # Act
+        report = run_units(cg, [Unit('ping')], lambda done, failed: None, backoff=0.01)
+
+        # Assert
+        assert (report['done'], report['retries']) == (1, 1)
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_job_resumes_remaining_units(self):
+        # Arrange
+        units = market_chart_units('bitcoin,ethereum', 'usd', 0, 100 * DAY)
+        chart = {"prices": [[0, 1.0]], "market_caps": [], "total_volumes": []}
+        responses.add(responses.GET, URL.format('bitcoin'), json=chart, status=200)
+        responses.add(responses.GET, URL.format('ethereum'), status=404)
+        job = Job(self.path, 'charts')
+
+        # Act
+        planned = job.plan(units)
+        first = job.run(CoinGeckoAPI(), max_workers=2)
+        failures = job.failures()
+        replanned = Job(self.path, 'charts').plan(units)
+        responses.replace(responses.GET, URL.format('ethereum'), json=chart, status=200)
+        second = Job(self.path, 'charts').run(CoinGeckoAPI(), max_workers=2)
+
+        # Assert
+        assert (planned, replanned) == (4, 0)
+        assert first['status'] == {'pending': 0, 'done': 2, 'failed': 2, 'units': 4}
+        assert len(failures) == 2 and '404' in next(iter(failures.values()))
+        assert (second['units'], second['done']) == (2, 2)
+        assert second['status']['done'] == 4
+        assert [unit.params['id'] for unit, _ in job.results()] == ['bitcoin', 'bitcoin', 'ethereum', 'ethereum']
+        assert next(job.results())[1] == chart
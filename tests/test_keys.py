@@ -0,0 +1,74 @@
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.keys import ApiKey, KeyPool
+
+
+def key_of(call):
+    request = call.request
+    return request.params.get('x_cg_pro_api_key') or request.params.get('x_cg_demo_api_key')
+
+
+class TestKeys(unittest.TestCase):
+
+    def test_pool_distributes_by_headroom(self):
+        # Arrange
+        pool = KeyPool([ApiKey('key-aaaa', rate_limit=3), ApiKey('key-bbbb', rate_limit=1)], poll_interval=None)
+
+        # Act
+        picked = [pool.acquire().key for _ in range(4)]
+
+        # Assert
+        assert picked == ['key-aaaa', 'key-aaaa', 'key-aaaa', 'key-bbbb']
+        assert pool.snapshot()['pro:...aaaa']['headroom'] == 0
+
+    @responses.activate
+    def test_rotates_away_from_rate_limited_and_unauthorized_keys(self):
+        # Arrange
+        def callback(request):
+            key = request.params.get('x_cg_pro_api_key') or request.params.get('x_cg_demo_api_key')
+            if key == 'pro-1111':
+                return 429, {'Retry-After': '30'}, '{"status": {"error_code": 429}}'
+            if key == 'pro-2222':
+                return 401, {}, '{"status": {"error_code": 401}}'
+            return 200, {}, '{"gecko_says": "(V3) To the Moon!"}'
+
+        responses.add_callback(responses.GET, 'https://pro-api.coingecko.com/api/v3/ping', callback = callback)
+        responses.add_callback(responses.GET, 'https://api.coingecko.com/api/v3/ping', callback = callback)
+        pool = KeyPool([ApiKey('pro-1111', rate_limit=100), ApiKey('pro-2222', rate_limit=50),
+                        ApiKey('demo-3333', 'demo')], poll_interval=None)
+        cg = CoinGeckoAPI(api_keys=pool, cache=False)
+
+        # Act
+        first = cg.ping()
+        second = cg.ping()
+
+        # Assert
+        assert first == second == {'gecko_says': '(V3) To the Moon!'}
+        assert [key_of(call) for call in responses.calls] == ['pro-1111', 'pro-2222', 'demo-3333', 'demo-3333']
+        assert responses.calls[2].request.url.startswith('https://api.coingecko.com/api/v3/ping')
+        keys = cg.stats.key_snapshot()
+        assert keys['pro:...1111']['rate_limited'] == 1
+        assert 29 < keys['pro:...1111']['cooldown'] <= 30
+        assert keys['pro:...2222']['disabled']
+        assert cg.stats.snapshot()['ping']['retries'] == 2
+        assert 'coingecko_api_key_requests_total{key="demo:...3333"} 2' in cg.stats.prometheus()
+
+    @responses.activate
+    def test_refresh_key_usage(self):
+        # Arrange
+        usage = {"plan": "Analyst", "rate_limit_request_per_minute": 1000, "monthly_call_credit": 500000,
+                 "current_total_monthly_calls": 1000, "current_remaining_monthly_calls": 499000}
+        responses.add(responses.GET, 'https://pro-api.coingecko.com/api/v3/key', json = usage, status = 200,
+                      headers = {'Cache-Control': 'max-age=60'})
+        cg = CoinGeckoAPI(api_keys=KeyPool(['pro-1111', 'pro-2222'], poll_interval=None))
+
+        # Act
+        cg.refresh_key_usage()
+
+        # Assert
+        assert [key_of(call) for call in responses.calls] == ['pro-1111', 'pro-2222']
+        for state in cg.stats.key_snapshot().values():
+            assert state['rate_limit'] == 1000
+            assert state['remaining_credits'] == 499000
@@ -0,0 +1,69 @@
+import unittest
+
+from pycoingecko import models
+
+
+TICKER_SAMPLE = {"base": "BTC", "target": "USDT", "market": {"name": "Binance", "identifier": "binance", "has_trading_incentive": False},
+                 "last": 60000.0, "volume": 12000.5, "converted_last": {"btc": 1.0, "eth": 20.1, "usd": 60010.0},
+                 "converted_volume": {"btc": 12000.5, "eth": 241000.0, "usd": 720000000.0}, "trust_score": "green",
+                 "bid_ask_spread_percentage": 0.010001, "timestamp": "2024-10-10T10:10:10+00:00",
+                 "last_traded_at": "2024-10-10T10:10:10+00:00", "last_fetch_at": "2024-10-10T10:11:00+00:00",
+                 "is_anomaly": False, "is_stale": False, "trade_url": "https://www.binance.com/en/trade/BTC_USDT",
+                 "token_info_url": None, "coin_id": "bitcoin", "target_coin_id": "tether"}
+
+
+class TestModels(unittest.TestCase):
+
+    def test_market_row_round_trip(self):
+        # Arrange
+        row = {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 60000, "market_cap": 1200000000000,
+               "price_change_percentage_1h_in_currency": 0.1}
+
+        # Act
+        record = models.MarketRow.from_dict(row)
+
+        # Assert
+        assert record.id == 'bitcoin'
+        assert record.market_cap == 1200000000000
+        assert record.ath is None
+        assert record.extra == {"price_change_percentage_1h_in_currency": 0.1}
+        assert not hasattr(record, '__dict__')
+        expected = dict.fromkeys(models.MarketRow._fields)
+        expected.update(row)
+        assert record.to_dict() == expected
+
+    def test_ticker_flattens_nested_fields(self):
+        # Act
+        ticker = models.tickers({"name": "Bitcoin", "tickers": [TICKER_SAMPLE]})[0]
+
+        # Assert
+        assert ticker.market_identifier == 'binance'
+        assert ticker.converted_volume_usd == 720000000.0
+        assert ticker.extra is None
+        assert ticker.to_dict() == TICKER_SAMPLE
+
+    def test_record_list_converts_lazily(self):
+        # Arrange
+        rows = [{"id": "bitcoin"}, {"id": "ethereum"}]
+
+        # Act
+        records = models.markets(rows)
+        first = records[-1]
+
+        # Assert
+        assert first.id == 'ethereum'
+        assert records._pending == 1
+        assert [r.id for r in records.materialize()] == ['bitcoin', 'ethereum']
+        assert records._pending == 0
+
+    def test_candle_table(self):
+        # Arrange
+        ohlc = [[1594382400000, 1.1, 1.1, 1.1, 1.1], [1594396800000, 1.1, 1.2, 1.0, 1.15]]
+
+        # Act
+        table = models.candles(ohlc)
+
+        # Assert
+        assert len(table) == 2
+        assert table[1] == models.Candle(1594396800000, 1.1, 1.2, 1.0, 1.15)
+        assert table.to_ohlc() == ohlc
@@ -0,0 +1,83 @@
+import threading
+import unittest
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.poller import PricePoller
+
+
+class TestPoller(unittest.TestCase):
+
+    @responses.activate
+    def test_one_merged_request_for_all_subscriptions(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/price', status=200, json={
+            'bitcoin': {'usd': 60000, 'eur': 55000, 'usd_24h_change': 1.5, 'eur_24h_change': 1.4,
+                        'last_updated_at': 1700000000},
+            'ethereum': {'usd': 3000, 'eur': 2750, 'usd_24h_change': 2.0, 'eur_24h_change': 1.9,
+                         'last_updated_at': 1700000000},
+        })
+        poller = PricePoller(CoinGeckoAPI(cache=False), interval=3600)
+        poller._thread = threading.current_thread()  # poll by hand
+        first = poller.subscribe('bitcoin', 'usd')
+        second = poller.subscribe(['bitcoin', 'ethereum'], 'eur')
+
+        # Act
+        changed = poller.poll()
+        first_changes = poller.changes(first)
+        second_changes = poller.changes(second, since=0)
+        unchanged = poller.changes(second, since=second_changes['version'], timeout=0.01)
+
+        # Assert
+        assert changed == 2
+        assert len(responses.calls) == 1
+        assert 'ids=bitcoin%2Cethereum' in responses.calls[0].request.url
+        assert 'vs_currencies=eur%2Cusd' in responses.calls[0].request.url
+        assert first_changes['prices'] == {'bitcoin': {'usd': 60000, 'usd_24h_change': 1.5,
+                                                       'last_updated_at': 1700000000}}
+        assert set(second_changes['prices']) == {'bitcoin', 'ethereum'}
+        assert second_changes['prices']['ethereum']['eur'] == 2750
+        assert unchanged['prices'] == {}
+
+    @responses.activate
+    def test_changes_wakes_on_poll(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/price', status=200,
+                      json={'bitcoin': {'usd': 60000, 'last_updated_at': 1700000000}})
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/price', status=200,
+                      json={'bitcoin': {'usd': 60100, 'last_updated_at': 1700000030}})
+        poller = PricePoller(CoinGeckoAPI(cache=False), interval=3600)
+        poller._thread = threading.current_thread()
+        subscription = poller.subscribe('bitcoin', 'usd')
+        poller.poll()
+        version = poller.changes(subscription)['version']
+
+        # Act
+        threading.Timer(0.05, poller.poll).start()
+        changes = poller.changes(subscription, since=version, timeout=5)
+
+        # Assert
+        assert changes['version'] == version + 1
+        assert changes['prices']['bitcoin']['usd'] == 60100
+        assert poller.unsubscribe(subscription)
+        with self.assertRaises(KeyError):
+            poller.changes(subscription)
+
+    @responses.activate
+    def test_listeners_are_called_on_change(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/price', status=200,
+                      json={'bitcoin': {'usd': 60000, 'last_updated_at': 1700000000}})
+        poller = PricePoller(CoinGeckoAPI(cache=False), interval=3600)
+        poller._thread = threading.current_thread()
+        poller.subscribe('bitcoin', 'usd')
+        calls = []
+        poller.add_listener(lambda: calls.append(poller.version))
+
+        # Act
+        poller.poll()
+        poller.poll()
+
+        # Assert
+        assert calls == [1]
@@ -0,0 +1,55 @@
+import time
+import unittest
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.reference import ReferenceData
+
+
+class TestReference(unittest.TestCase):
+
+    @responses.activate
+    def test_page_loads_once(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/exchanges/list', status=200,
+                      json=[{'id': 'exchange-{0}'.format(i), 'name': 'Exchange {0}'.format(i)} for i in range(25)])
+        reference = ReferenceData(CoinGeckoAPI(cache=False), page_size=10)
+
+        # Act
+        first = reference.page('exchanges', 1)
+        last = reference.page('exchanges', 3)
+
+        # Assert
+        assert len(responses.calls) == 1
+        assert (first['total'], first['pages']) == (25, 3)
+        assert first['items'][0]['id'] == 'exchange-0'
+        assert [e['id'] for e in last['items']] == ['exchange-20', 'exchange-21', 'exchange-22', 'exchange-23',
+                                                    'exchange-24']
+        assert reference.index()['exchanges']['total'] == 25
+        with self.assertRaises(ValueError):
+            reference.page('exchanges', 4)
+        with self.assertRaises(ValueError):
+            reference.page('unknown')
+
+    @responses.activate
+    def test_stale_dataset_is_served_while_refreshing(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/supported_vs_currencies', status=200,
+                      json=['usd', 'eur'])
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/supported_vs_currencies', status=200,
+                      json=['usd', 'eur', 'jpy'])
+        reference = ReferenceData(CoinGeckoAPI(cache=False), ttl=0)
+        reference.get('vs_currencies')
+        time.sleep(0.01)
+
+        # Act
+        stale = reference.get('vs_currencies')
+        for _ in range(100):
+            if len(reference.get('vs_currencies')) == 3:
+                break
+            time.sleep(0.01)
+
+        # Assert
+        assert stale == ('usd', 'eur')
+        assert reference.get('vs_currencies') == ('usd', 'eur', 'jpy')
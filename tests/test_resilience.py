@@ -0,0 +1,182 @@
+import json
+import pytest
+import responses
+import threading
+import time
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.resilience import (CircuitBreaker, CircuitBreakers, CircuitOpenError, HedgePolicy, RetryBudget,
+                                    RetryPolicy, parse_retry_after)
+
+
+class TestResilience(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        # Assert
+        assert parse_retry_after('3') == 3.0
+        assert parse_retry_after('Thu, 01 Jan 1970 00:01:00 GMT', now=30) == 30.0
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(None) is None
+
+    def test_retry_budget(self):
+        # Arrange
+        budget = RetryBudget(ratio=0.5, capacity=1)
+
+        # Act / Assert
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+
+    @responses.activate
+    def test_retries_rate_limited_and_unavailable_responses(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/ping'
+        responses.add(responses.GET, url, json = {'status': {'error_code': 429}}, status = 429,
+                      headers = {'Retry-After': '1'})
+        responses.add(responses.GET, url, json = {'error': 'unavailable'}, status = 503)
+        responses.add(responses.GET, url, json = {'gecko_says': '(V3) To the Moon!'}, status = 200)
+        cg = CoinGeckoAPI(retry_policy=RetryPolicy(backoff=0, max_backoff=0))
+
+        # Act
+        response = cg.ping()
+
+        # Assert
+        assert response == {'gecko_says': '(V3) To the Moon!'}
+        assert len(responses.calls) == 3
+        stats = cg.stats.snapshot()['ping']
+        assert stats['retries'] == 2
+        assert stats['statuses'] == {200: 1}
+
+    @responses.activate
+    def test_retry_budget_stops_retries(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json = {'error': 'unavailable'},
+                      status = 503)
+        policy = RetryPolicy(backoff=0, max_backoff=0, budget=RetryBudget(ratio=0, capacity=1))
+        cg = CoinGeckoAPI(retry_policy=policy)
+
+        # Act
+        with pytest.raises(ValueError):
+            cg.ping()
+
+        # Assert
+        assert len(responses.calls) == 2
+        stats = cg.stats.snapshot()['ping']
+        assert stats['retries'] == 1
+        assert stats['retries_denied'] == 1
+
+    @responses.activate
+    def test_endpoint_timeouts(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json = {}, status = 200)
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/coins/list', json = [], status = 200)
+        cg = CoinGeckoAPI()
+        cg.timeouts['ping'] = (1, 2)
+
+        # Act
+        cg.ping()
+        cg.get_coins_list()
+
+        # Assert
+        assert responses.calls[0].request.req_kwargs['timeout'] == (1, 2)
+        assert responses.calls[1].request.req_kwargs['timeout'] == (5.0, 60.0)
+
+    @responses.activate
+    def test_hedged_request(self):
+        # Arrange
+        lock = threading.Lock()
+        calls = []
+
+        def callback(request):
+            with lock:
+                calls.append(request)
+                slow = len(calls) == 2
+            if slow:
+                time.sleep(0.5)
+            return 200, {}, json.dumps({'n': len(calls)})
+
+        responses.add_callback(responses.GET, 'https://api.coingecko.com/api/v3/ping', callback = callback)
+        cg = CoinGeckoAPI(cache=False, hedge=HedgePolicy(min_samples=1, min_delay=0.05, max_delay=0.05))
+
+        # Act
+        cg.ping()
+        start = time.perf_counter()
+        response = cg.ping()
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert response == {'n': 3}
+        assert elapsed < 0.4
+        assert cg.stats.snapshot()['ping']['hedges'] == {'fired': 1, 'won': 1}
+
+    def test_circuit_breaker_states(self):
+        # Arrange
+        breaker = CircuitBreaker(failure_threshold=2, slow_call_duration=1.0, reset_timeout=0.05)
+
+        # Act / Assert
+        breaker.record(False, 0.1)
+        assert breaker.state == 'closed'
+        breaker.record(True, 2.0)
+        assert breaker.state == 'open'
+        assert not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.state == 'half_open'
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record(True, 0.1)
+        assert breaker.state == 'closed'
+        assert breaker.snapshot() == {'state': 'closed', 'consecutive_failures': 0, 'opened': 1, 'rejected': 2}
+
+    @responses.activate
+    def test_retry_wait_is_not_a_slow_call(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd'
+        responses.add(responses.GET, url, json = {'error': 'busy'}, status = 429, headers = {'Retry-After': '1'})
+        responses.add(responses.GET, url, json = {'bitcoin': {'usd': 60000}}, status = 200)
+        cg = CoinGeckoAPI(retry_policy=RetryPolicy(retries=1, backoff=0, max_backoff=0.2),
+                          circuit_breakers=CircuitBreakers(failure_threshold=1, slow_call_duration=0.1))
+
+        # Act
+        price = cg.get_price('bitcoin', 'usd')
+
+        # Assert
+        assert price == {'bitcoin': {'usd': 60000}}
+        assert cg.stats.circuit_snapshot()['simple']['state'] == 'closed'
+
+    @responses.activate
+    def test_open_circuit_fails_fast_or_serves_stale_data(self):
+        # Arrange
+        coin_url = 'https://api.coingecko.com/api/v3/coins/bitcoin/'
+        responses.add(responses.GET, coin_url, json = {'id': 'bitcoin'}, status = 200,
+                      headers = {'Cache-Control': 'max-age=0', 'ETag': '"1"'})
+        responses.add(responses.GET, coin_url, json = {'error': 'unavailable'}, status = 503)
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd',
+                      json = {'bitcoin': {'usd': 60000}}, status = 200)
+        cg = CoinGeckoAPI(retry_policy=RetryPolicy(retries=0),
+                          circuit_breakers=CircuitBreakers(failure_threshold=1, reset_timeout=60))
+
+        # Act
+        cg.get_coin_by_id('bitcoin')
+        with pytest.raises(ValueError):
+            cg.get_coin_by_id('bitcoin')
+        stale = cg.get_coin_by_id('bitcoin')
+        with pytest.raises(CircuitOpenError):
+            cg.get_coin_ticker_by_id('bitcoin')
+        price = cg.get_price('bitcoin', 'usd')
+
+        # Assert
+        assert stale == {'id': 'bitcoin'}
+        assert price == {'bitcoin': {'usd': 60000}}
+        assert len(responses.calls) == 3
+        circuits = cg.stats.circuit_snapshot()
+        assert circuits['coins']['state'] == 'open'
+        assert circuits['coins']['rejected'] == 2
+        assert circuits['simple']['state'] == 'closed'
+        stats = cg.stats.snapshot()
+        assert stats['coins/{id}']['cache']['stale'] == 1
+        assert stats['coins/{id}']['upstream_requests'] == 2
+        assert stats['coins/{id}/tickers']['errors'] == {'CircuitOpenError': 1}
+        assert 'coingecko_circuit_state{family="coins",state="open"} 1' in cg.stats.prometheus()
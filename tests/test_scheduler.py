@@ -0,0 +1,132 @@
+import pytest
+import responses
+import threading
+import time
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.resilience import RetryPolicy
+from pycoingecko.scheduler import PriorityClass, RequestScheduler, current_priority, priority
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_priority_context(self):
+        # Act / Assert
+        assert current_priority() == 'interactive'
+        with priority('background'):
+            assert current_priority() == 'background'
+        assert current_priority() == 'interactive'
+        with pytest.raises(ValueError):
+            RequestScheduler().acquire('bulk')
+
+    def test_concurrency_cap(self):
+        # Arrange
+        scheduler = RequestScheduler(classes=[PriorityClass('interactive', 0, 1), PriorityClass('background', 1, 1)])
+        admitted = []
+        scheduler.acquire('interactive')
+
+        def run(name):
+            with scheduler.slot(name):
+                admitted.append(name)
+
+        waiter = threading.Thread(target=run, args=('interactive',))
+
+        # Act
+        waiter.start()
+        run('background')
+        time.sleep(0.05)
+        blocked = list(admitted)
+        scheduler.release('interactive')
+        waiter.join(1)
+
+        # Assert
+        assert blocked == ['background']
+        assert admitted == ['background', 'interactive']
+
+    def test_higher_priority_gets_the_next_token(self):
+        # Arrange
+        scheduler = RequestScheduler(rate=10, burst=1)
+        scheduler.acquire('interactive')
+        scheduler.release('interactive')
+        admitted = []
+
+        def run(name):
+            with scheduler.slot(name):
+                admitted.append(name)
+
+        background = threading.Thread(target=run, args=('background',))
+        interactive = threading.Thread(target=run, args=('interactive',))
+
+        # Act
+        background.start()
+        time.sleep(0.02)
+        interactive.start()
+        background.join(1)
+        interactive.join(1)
+
+        # Assert
+        assert admitted == ['interactive', 'background']
+
+    def test_background_backlog_does_not_starve_interactive_calls(self):
+        # Arrange
+        scheduler = RequestScheduler(rate=50, burst=1)
+        stop = threading.Event()
+
+        def backfill():
+            while not stop.is_set():
+                with scheduler.slot('background'):
+                    time.sleep(0.01)
+
+        workers = [threading.Thread(target=backfill) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+
+        # Act
+        time.sleep(0.1)
+        waits = []
+        for _ in range(5):
+            waits.append(scheduler.acquire('interactive'))
+            scheduler.release('interactive')
+        stop.set()
+        for worker in workers:
+            worker.join(1)
+
+        # Assert
+        assert max(waits) < 0.2
+        state = scheduler.snapshot()
+        assert state['interactive']['admitted'] == 5
+        assert state['background']['in_flight'] == 0
+
+    @responses.activate
+    def test_client_admits_upstream_requests(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/ping', json = {}, status = 200,
+                      headers = {'Cache-Control': 'max-age=60'})
+        cg = CoinGeckoAPI(scheduler=RequestScheduler(rate=100))
+
+        # Act
+        with priority('background'):
+            cg.ping()
+            cg.ping()
+
+        # Assert
+        assert cg.stats.scheduler_snapshot()['background']['admitted'] == 1
+        assert cg.stats.scheduler_snapshot()['interactive']['admitted'] == 0
+        assert 'coingecko_scheduler_admitted_total{priority="background"} 1' in cg.stats.prometheus()
+
+    @responses.activate
+    def test_every_retry_is_admitted(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/ping'
+        responses.add(responses.GET, url, json = {'error': 'busy'}, status = 429)
+        responses.add(responses.GET, url, json = {}, status = 200)
+        scheduler = RequestScheduler(rate=100)
+        cg = CoinGeckoAPI(scheduler=scheduler, retry_policy=RetryPolicy(backoff=0))
+
+        # Act
+        cg.ping()
+
+        # Assert
+        assert scheduler.snapshot()['interactive']['admitted'] == 2
+        assert scheduler.snapshot()['interactive']['in_flight'] == 0
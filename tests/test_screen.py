@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.scheduler import BACKGROUND, RequestScheduler, priority
+from pycoingecko.screen import MarketScreener, MarketTable, fetch_markets, parse_filter, screen
+
+
+MARKETS_SAMPLE = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 60000, "market_cap": 1200000000000,
+     "total_volume": 30000000000, "price_change_percentage_24h": 1.5, "ath_change_percentage": -10.0},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum", "current_price": 3000, "market_cap": 360000000000,
+     "total_volume": 36000000000, "price_change_percentage_24h": 6.2, "ath_change_percentage": -38.0},
+    {"id": "tinycoin", "symbol": "tny", "name": "Tiny", "current_price": 0.01, "market_cap": None,
+     "total_volume": 1000, "price_change_percentage_24h": 40.0, "ath_change_percentage": None},
+]
+
+
+class TestScreen(unittest.TestCase):
+
+    def test_parse_filter(self):
+        # Act
+        name, op, value = parse_filter('market_cap >= 1e9')
+
+        # Assert
+        assert name == 'market_cap'
+        assert op(1e9, value)
+        assert not op(1e8, value)
+
+    def test_invalid_filter(self):
+        # Act Assert
+        with pytest.raises(ValueError):
+            parse_filter('market_cap >>> 1')
+
+    def test_unknown_column(self):
+        # Arrange
+        table = MarketTable.from_rows(MARKETS_SAMPLE)
+
+        # Act Assert
+        with pytest.raises(ValueError):
+            screen(table, filters='not_a_column > 1')
+
+    def test_screen_filters_and_sort(self):
+        # Arrange
+        table = MarketTable.from_rows(MARKETS_SAMPLE)
+
+        # Act
+        result = screen(table, filters='price_change_percentage_24h > 1, volume_to_market_cap > 0.01',
+                        sort='-volume_to_market_cap', fields=['market_cap'])
+
+        # Assert
+        assert result['total'] == 2
+        assert [row['id'] for row in result['rows']] == ['ethereum', 'bitcoin']
+        assert result['rows'][0] == {'id': 'ethereum', 'symbol': 'eth', 'name': 'Ethereum', 'market_cap': 360000000000}
+
+    def test_screen_missing_values_sort_last(self):
+        # Arrange
+        table = MarketTable.from_rows(MARKETS_SAMPLE)
+
+        # Act
+        result = screen(table, sort='-market_cap', limit=3, fields=['market_cap'])
+
+        # Assert
+        assert [row['id'] for row in result['rows']] == ['bitcoin', 'ethereum', 'tinycoin']
+        assert result['rows'][2]['market_cap'] is None
+
+    @responses.activate
+    def test_fetch_markets_stops_on_short_page(self):
+        # Arrange
+        for page, rows in ((1, MARKETS_SAMPLE[:2]), (2, MARKETS_SAMPLE[2:]), (3, [])):
+            responses.add(responses.GET,
+                          'https://api.coingecko.com/api/v3/coins/markets?per_page=2&page={0}&vs_currency=usd'.format(page),
+                          json = rows, status = 200)
+
+        # Act
+        table = fetch_markets(CoinGeckoAPI(), 'usd', per_page=2, max_workers=3)
+
+        ## Assert
+        assert table.ids == ['bitcoin', 'ethereum', 'tinycoin']
+
+    @responses.activate
+    def test_fetch_markets_keeps_caller_priority(self):
+        # Arrange
+        for page, rows in ((1, MARKETS_SAMPLE[:2]), (2, MARKETS_SAMPLE[2:])):
+            responses.add(responses.GET,
+                          'https://api.coingecko.com/api/v3/coins/markets?per_page=2&page={0}&vs_currency=usd'.format(page),
+                          json = rows, status = 200)
+        scheduler = RequestScheduler()
+        cg = CoinGeckoAPI(scheduler=scheduler)
+
+        # Act
+        with priority(BACKGROUND):
+            fetch_markets(cg, 'usd', per_page=2, max_workers=2)
+
+        # Assert
+        assert scheduler.snapshot()['background']['admitted'] == 2
+        assert scheduler.snapshot()['interactive']['admitted'] == 0
+
+    @responses.activate
+    def test_concurrent_refreshes_share_one_fetch(self):
+        # Arrange
+        def slow_markets(request):
+            time.sleep(0.1)
+            return 200, {}, json.dumps(MARKETS_SAMPLE)
+        responses.add_callback(responses.GET, 'https://api.coingecko.com/api/v3/coins/markets', callback=slow_markets)
+        screener = MarketScreener(CoinGeckoAPI(cache=False), ttl=60, max_workers=1)
+        tables = []
+
+        # Act
+        threads = [threading.Thread(target=lambda: tables.append(screener.table('usd'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert len(responses.calls) == 1
+        assert len(tables) == 4 and all(table is tables[0] for table in tables)
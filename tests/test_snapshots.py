@@ -0,0 +1,100 @@
+import threading
+import unittest
+
+from pycoingecko.screen import MarketTable
+from pycoingecko.snapshots import MarketChangeTracker, diff_tables
+
+
+def market_row(coin_id, rank, price, market_cap, volume):
+    return {"id": coin_id, "symbol": coin_id[:3], "name": coin_id.title(), "market_cap_rank": rank,
+            "current_price": price, "market_cap": market_cap, "total_volume": volume}
+
+
+def market_table(rows, fetched_at):
+    table = MarketTable.from_rows(rows)
+    table.fetched_at = fetched_at
+    return table
+
+
+PREVIOUS = [
+    market_row('bitcoin', 1, 60000, 1.2e12, 3e10),
+    market_row('ethereum', 2, 3000, 3.6e11, 1.5e10),
+    market_row('tether', 3, 1.0, 1.1e11, 5e10),
+    market_row('dogecoin', 4, 0.1, 1.4e10, 1e9),
+]
+
+CURRENT = [
+    market_row('bitcoin', 1, 60100, 1.201e12, 3.1e10),
+    market_row('ethereum', 2, 3100, 3.72e11, 1.5e10),
+    market_row('solana', 3, 150, 7e10, 4e9),
+    market_row('tether', 4, 1.0, 1.1e11, 6e10),
+]
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def test_diff_tables(self):
+        # Arrange
+        previous = market_table(PREVIOUS, 100.0)
+        current = market_table(CURRENT, 160.0)
+
+        # Act
+        events = diff_tables(previous, current)
+
+        # Assert
+        changes = {(e['type'], e['id'], e.get('field')) for e in events}
+        assert changes == {
+            ('field', 'ethereum', 'current_price'),
+            ('field', 'ethereum', 'market_cap'),
+            ('added', 'solana', None),
+            ('rank', 'tether', None),
+            ('field', 'tether', 'total_volume'),
+            ('removed', 'dogecoin', None),
+        }
+        rank = next(e for e in events if e['type'] == 'rank')
+        assert (rank['from'], rank['to']) == (3, 4)
+        assert all(e['time'] == 160.0 for e in events)
+
+    def test_tracker_changes_since(self):
+        # Arrange
+        tables = [market_table(PREVIOUS, 100.0), market_table(CURRENT, 160.0), market_table(CURRENT, 220.0)]
+        tracker = MarketChangeTracker(lambda: tables[0], max_events=4)
+
+        # Act
+        baseline = tracker.update()
+        unchanged = tracker.update()
+        tables.pop(0)
+        events = tracker.update()
+        tables.pop(0)
+        tracker.update()
+        changes = tracker.changes_since(100.0, types={'field'})
+        latest = tracker.changes_since(160.0)
+
+        # Assert
+        assert baseline == [] and unchanged == []
+        assert len(events) == 6
+        assert not changes['complete']
+        assert [e['id'] for e in changes['events']] == ['tether']
+        assert latest == {'since': 160.0, 'until': 220.0, 'complete': True, 'total': 0, 'events': []}
+
+    def test_stream(self):
+        # Arrange
+        tables = iter([market_table(PREVIOUS, 100.0), market_table(CURRENT, 160.0)])
+        stop = threading.Event()
+
+        def source():
+            table = next(tables, None)
+            if table is None:
+                stop.set()
+                return current
+            return table
+
+        current = market_table(CURRENT, 160.0)
+        tracker = MarketChangeTracker(source)
+
+        # Act
+        events = list(tracker.stream(interval=0, stop=stop))
+
+        # Assert
+        assert len(events) == 6
+        assert {e['time'] for e in events} == {160.0}
@@ -0,0 +1,73 @@
+import gzip
+import json
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.stats import endpoint_template
+
+
+class TestStats(unittest.TestCase):
+
+    def test_endpoint_template(self):
+        # Arrange
+        base = 'https://api.coingecko.com/api/v3/'
+
+        # Assert
+        assert endpoint_template(base + 'coins/list', base) == 'coins/list'
+        assert endpoint_template(base + 'coins/bitcoin/', base) == 'coins/{id}'
+        assert endpoint_template(base + 'coins/bitcoin/market_chart', base) == 'coins/{id}/market_chart'
+        assert endpoint_template(base + 'token_lists/ethereum/all.json', base) == 'token_lists/{asset_platform_id}/all.json'
+        assert endpoint_template(base + 'derivatives/exchanges/list', base) == 'derivatives/exchanges/list'
+
+    @responses.activate
+    def test_bandwidth_accounting(self):
+        # Arrange
+        derivatives_json = [{"market": "BitMEX", "symbol": "XBTUSD", "index_id": "BTC", "price": "60000"}] * 200
+        body = gzip.compress(json.dumps(derivatives_json).encode('utf-8'))
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/derivatives',
+                      body = body, status = 200, headers = {'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+        cg = CoinGeckoAPI()
+
+        # Act
+        response = cg.get_derivatives()
+
+        # Assert
+        assert response == derivatives_json
+        assert 'gzip' in cg.session.headers['Accept-Encoding']
+        stats = cg.stats.snapshot()['derivatives']['bytes']
+        assert stats['compressed'] == len(body)
+        assert stats['decompressed'] == len(json.dumps(derivatives_json))
+        assert stats['encodings'] == {'gzip': 1}
+        assert stats['compression_ratio'] > 1
+
+    @responses.activate
+    def test_request_stats(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days=1'
+        responses.add(responses.GET, url, json = {'prices': []}, status = 200, headers = {'Cache-Control': 'max-age=30'})
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/coins/nocoin/market_chart?vs_currency=usd&days=1',
+                      json = {'error': 'coin not found'}, status = 404)
+        cg = CoinGeckoAPI()
+
+        # Act
+        cg.get_coin_market_chart_by_id('bitcoin', 'usd', 1)
+        cg.get_coin_market_chart_by_id('bitcoin', 'usd', 1)
+        with pytest.raises(ValueError):
+            cg.get_coin_market_chart_by_id('nocoin', 'usd', 1)
+
+        # Assert
+        stats = cg.stats.snapshot()['coins/{id}/market_chart']
+        assert stats['calls'] == 3
+        assert stats['upstream_requests'] == 2
+        assert stats['statuses'] == {200: 1, 404: 1}
+        assert stats['errors'] == {'ValueError': 1}
+        assert stats['cache'] == {'hits': 1, 'revalidated': 0, 'misses': 2, 'stale': 0, 'hit_rate': 1 / 3}
+        assert stats['latency']['p50'] is not None
+        assert sum(stats['latency']['buckets'].values()) == 3
+
+        text = cg.stats.prometheus()
+        assert 'coingecko_calls_total{endpoint="coins/{id}/market_chart"} 3' in text
+        assert 'coingecko_requests_total{endpoint="coins/{id}/market_chart",status="404"} 1' in text
+        assert 'coingecko_call_duration_seconds_count{endpoint="coins/{id}/market_chart"} 3' in text
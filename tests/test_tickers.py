@@ -0,0 +1,65 @@
+import pytest
+import responses
+import unittest
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.tickers import TickerTable, aggregate_tickers, summarize
+
+
+def ticker(exchange, target, last_usd, volume_usd, spread, trust_score='green', is_stale=False, is_anomaly=False):
+    return {"base": "BTC", "target": target, "market": {"name": exchange.title(), "identifier": exchange},
+            "converted_last": {"usd": last_usd}, "converted_volume": {"usd": volume_usd},
+            "bid_ask_spread_percentage": spread, "trust_score": trust_score, "is_stale": is_stale,
+            "is_anomaly": is_anomaly}
+
+
+TICKERS_SAMPLE = [
+    ticker('binance', 'USDT', 60000, 3000000, 0.01),
+    ticker('binance', 'FDUSD', 60010, 1000000, 0.02),
+    ticker('coinbase', 'USD', 59990, 2000000, 0.03),
+    ticker('tinyex', 'USD', 59000, 5000, 0.5, trust_score='yellow'),
+    ticker('oldex', 'USD', 50000, 9000000, 1.0, is_stale=True),
+]
+
+
+class TestTickers(unittest.TestCase):
+
+    def test_summarize(self):
+        # Arrange
+        table = TickerTable.from_pages([TICKERS_SAMPLE])
+
+        # Act
+        summary = summarize(table, top=1)
+
+        # Assert
+        assert summary['tickers'] == 5
+        assert summary['eligible_tickers'] == 4
+        assert summary['excluded'] == {'stale': 1, 'anomaly': 0}
+        assert summary['total_volume_usd'] == 6005000
+        assert summary['vwap_usd'] == pytest.approx((60000 * 3e6 + 60010 * 1e6 + 59990 * 2e6 + 59000 * 5000) / 6005000)
+        assert summary['best_venue']['pair'] == 'BTC/USDT'
+        assert summary['best_buy']['exchange'] == 'coinbase'
+        assert summary['best_sell']['exchange'] == 'binance'
+        assert summary['volume_share'] == [
+            {'exchange': 'binance', 'name': 'Binance', 'volume_usd': 4000000, 'tickers': 2, 'share': 4000000 / 6005000}]
+        assert summary['spread_percentage']['median'] == pytest.approx(0.025)
+        assert summarize(table, targets=['usd'])['eligible_tickers'] == 2
+
+    @responses.activate
+    def test_aggregate_tickers_reads_every_page(self):
+        # Arrange
+        url = 'https://api.coingecko.com/api/v3/coins/bitcoin/tickers'
+        full_page = [ticker('ex{0}'.format(i), 'USD', 60000, 1000000, 0.1) for i in range(100)]
+        responses.add(responses.GET, url + '?page=1', json = {"name": "Bitcoin", "tickers": full_page}, status = 200)
+        responses.add(responses.GET, url + '?page=2', json = {"name": "Bitcoin", "tickers": TICKERS_SAMPLE}, status = 200)
+        responses.add(responses.GET, url + '?page=3', json = {"name": "Bitcoin", "tickers": []}, status = 200)
+        cg = CoinGeckoAPI()
+
+        # Act
+        summary = aggregate_tickers(cg, 'bitcoin', max_workers=2)
+
+        # Assert
+        assert summary['id'] == 'bitcoin'
+        assert summary['tickers'] == 105
+        assert summary['exchanges'] == 103
+        assert len(summary['volume_share']) == 10
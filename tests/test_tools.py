@@ -0,0 +1,82 @@
+import json
+import unittest
+
+import responses
+
+from pycoingecko import CoinGeckoAPI
+from pycoingecko.endpoints import ENDPOINTS_BY_NAME
+from pycoingecko.resilience import CircuitOpenError
+from pycoingecko.tools import TOOLS, TOOLS_BY_NAME, budget, error_result, run_tool
+
+
+class TestTools(unittest.TestCase):
+
+    def test_tools_match_endpoints(self):
+        # Assert
+        assert len(TOOLS_BY_NAME) == len(TOOLS)
+        for tool in TOOLS:
+            endpoint = ENDPOINTS_BY_NAME[tool.method]
+            params = {p.name: p for p in tool.params}
+            for arg in endpoint.args:
+                assert arg in params, (tool.name, arg)
+            assert list(tool.signature().parameters) == [p.name for p in tool.params]
+
+    def test_budget(self):
+        # Act
+        cut, cut_info = budget(list(range(10)), 3)
+        series, series_info = budget({'prices': list(range(10)), 'name': 'x'}, 4, series=True)
+        small, small_info = budget({'prices': [1, 2]}, 4)
+
+        # Assert
+        assert (cut, cut_info) == ([0, 1, 2], {'': 10})
+        assert series == {'prices': [0, 3, 6, 9], 'name': 'x'}
+        assert series_info == {'prices': 10}
+        assert (small, small_info) == ({'prices': [1, 2]}, {})
+
+    def test_error_result(self):
+        # Act
+        error = error_result(CircuitOpenError('coins', 12.5))
+
+        # Assert
+        assert error['success'] is False
+        assert error['retry_in'] == 12.5
+
+    @responses.activate
+    def test_run_tool_omits_unset_params(self):
+        # Arrange
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/nfts/list', status=200,
+                      json=[{'id': 'nft-{0}'.format(i)} for i in range(600)])
+        tool = TOOLS_BY_NAME['get_nfts_list']
+
+        # Act
+        response = run_tool(CoinGeckoAPI(cache=False), tool, {'order': None, 'per_page': 600, 'page': None})
+
+        # Assert
+        url = responses.calls[0].request.url
+        assert 'per_page=600' in url
+        assert 'order=' not in url and 'page=' not in url.replace('per_page=', '')
+        assert response['success'] is True
+        assert len(response['data']) == 500
+        assert response['truncated'] == {'': 600}
+
+    @responses.activate
+    def test_passthrough(self):
+        # Arrange
+        body = {'id': 'binance', 'name': 'Binance', 'tickers': [{'base': 'BTC', 'target': 'USDT'}]}
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/exchanges/binance', status=200, json=body)
+        responses.add(responses.GET, 'https://api.coingecko.com/api/v3/exchanges/unknown', status=404,
+                      json={'error': 'exchange not found'})
+        cg = CoinGeckoAPI(cache=False)
+        tool = TOOLS_BY_NAME['get_exchange_by_id']
+
+        # Act
+        response = run_tool(cg, tool, {'id': 'binance'})
+        error = run_tool(cg, tool, {'id': 'unknown'})
+
+        # Assert
+        assert isinstance(response, str)
+        assert json.loads(response) == {'success': True, 'data': body}
+        assert error['success'] is False
+        for tool in TOOLS:
+            if tool.passthrough:
+                assert ENDPOINTS_BY_NAME[tool.method].result_key is None, tool.name